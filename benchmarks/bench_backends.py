@@ -0,0 +1,47 @@
+"""
+Throughput of ``run_batch`` spread over a pool of PSG backends.
+
+Run with ``python benchmarks/bench_backends.py``. Each backend is a local
+stub server that, like PSG, works on one call at a time and takes
+``--delay`` seconds per call.
+"""
+import argparse
+import contextlib
+from pathlib import Path
+import time
+
+from pypsg import PyConfig
+from pypsg.backends import BackendPool
+from pypsg.batch import run_batch
+
+from stub_server import StubServer
+
+CFG_PATH = Path(__file__).parent.parent / 'test' / 'data' / 'simple.cfg'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-n', type=int, default=64, help='number of calls')
+    parser.add_argument('--delay', type=float, default=0.05, help='seconds per call')
+    parser.add_argument('--backends', type=int, nargs='+', default=[1, 2, 4, 8],
+                        help='pool sizes to time')
+    args = parser.parse_args()
+    cfg = PyConfig.from_file(CFG_PATH)
+
+    baseline = None
+    for n_backends in args.backends:
+        with contextlib.ExitStack() as stack:
+            servers = [stack.enter_context(StubServer(delay=args.delay, serial=True))
+                       for _ in range(n_backends)]
+            pool = BackendPool.from_urls([server.url for server in servers])
+            start = time.perf_counter()
+            results = list(run_batch([cfg]*args.n, 'rad', workers=2*n_backends, backends=pool))
+            elapsed = time.perf_counter() - start
+        assert all(result.ok for result in results)
+        rate = args.n/elapsed
+        baseline = rate if baseline is None else baseline
+        print(f'{n_backends:2d} backends : {rate:7.1f} calls/s ({rate/baseline:.2f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Time to read a GlobES config from a file.
+
+Run with ``python benchmarks/bench_binconfig_dict.py``. The config holds a
+synthetic GCM at WACCM resolution and is written to a temporary file.
+``BinConfig.dict``, and reading the GCM from the file, are timed with the
+``dict`` used before the config was read in one pass timed for comparison.
+The GCM used to be read from the ``dict``, and is now read through
+``BinConfig.binary_view`` without copying the binary.
+
+``PyConfig.from_file`` cannot yet read back a config written with a GCM,
+because the atmosphere profile is written without its molecule names, so
+the GCM is read on its own with ``PyGCM.from_cfg``.
+"""
+import argparse
+from contextlib import contextmanager
+from pathlib import Path
+import tempfile
+import time
+
+import numpy as np
+from astropy import units as u
+
+from pypsg.cfg import PyConfig, BinConfig
+from pypsg.cfg import models
+from pypsg.globes import PyGCM, structure
+
+
+def make_config(shape) -> PyConfig:
+    pressure = structure.Pressure.from_limits(1*u.bar, 1e-5*u.bar, shape)
+    tsurf = structure.SurfaceTemperature(300*u.K*np.ones(shape[1:]))
+    temperature = structure.Temperature.from_adiabat(1.0, tsurf, pressure)
+    molecules = [structure.Molecule.constant(name, 1e-5, shape) for name in ('H2O', 'CO2', 'O3')]
+    gcm = PyGCM(pressure, temperature, *molecules, tsurf=tsurf)
+    target = models.Target(name='Exoplanet', object='Exoplanet', diameter=1*u.R_earth)
+    return PyConfig(target=target, gcm=gcm)
+
+
+def legacy_dict(self: BinConfig) -> dict:
+    content = self.content
+    binary = None
+    if self.has_binary:
+        content = content.split(b'<BINARY>')[0] + content.split(b'</BINARY>')[1]
+        binary = self.content.split(b'<BINARY>')[1].split(b'</BINARY>')[0]
+    content = str(content, encoding=self.encoding)
+    content = content.replace('\r', '')
+    _ = len(content.split('\n'))
+    cfg = {}
+    for line in content.split('\n'):
+        if not (line.isspace() or len(line) == 0 or line[0] == '#'):
+            end_of_kwd = line.index('>')+1
+            kwd = line[:end_of_kwd].replace('<', '').replace('>', '')
+            val = line[end_of_kwd:]
+            cfg[kwd] = val
+    if binary is not None:
+        cfg['BINARY'] = binary
+    return cfg
+
+
+@contextmanager
+def legacy_binconfig():
+    """
+    Use ``legacy_dict`` in place of ``BinConfig.dict``.
+    """
+    prop = BinConfig.dict
+    BinConfig.dict = property(legacy_dict)
+    try:
+        yield
+    finally:
+        BinConfig.dict = prop
+
+
+def best_of(func, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--shape', type=int, nargs=3, default=[70, 144, 96],
+                        help='layers, longitudes and latitudes of the GCM')
+    parser.add_argument('--repeat', type=int, default=5, help='take the best of this many runs')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / 'globes.cfg'
+        make_config(tuple(args.shape)).to_file(path)
+        binconfig = BinConfig.from_file(path)
+        assert legacy_dict(binconfig) == binconfig.dict
+        print(f'{len(binconfig.content)/1024**2:.1f} MiB config')
+        for name, before, after in (
+            ('BinConfig.dict', lambda: binconfig.dict, lambda: binconfig.dict),
+            ('GCM from file',
+             lambda: PyGCM.from_cfg(BinConfig.from_file(path).dict),
+             lambda: PyGCM.from_cfg(BinConfig.from_file(path))),
+        ):
+            with legacy_binconfig():
+                t_before = best_of(before, args.repeat)
+            t_after = best_of(after, args.repeat)
+            print(
+                f'{name:>14}: before {t_before*1e3:8.2f} ms, '
+                f'after {t_after*1e3:8.2f} ms ({t_before/t_after:.1f}x)'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Time to encode a config with a GCM, again and again.
+
+Run with ``python benchmarks/bench_config_content.py``. The config holds a
+synthetic GCM with a temperature profile and a few molecules. ``content``
+is read repeatedly, after changing nothing, one field, or the GCM. Encoding
+everything every time, as before the content was cached, is timed for
+comparison.
+"""
+import argparse
+import time
+
+import numpy as np
+from astropy import units as u
+
+from pypsg.cfg import PyConfig
+from pypsg.cfg import models
+from pypsg.globes import PyGCM, structure
+
+
+def make_config(shape) -> PyConfig:
+    pressure = structure.Pressure.from_limits(1*u.bar, 1e-5*u.bar, shape)
+    tsurf = structure.SurfaceTemperature(300*u.K*np.ones(shape[1:]))
+    temperature = structure.Temperature.from_adiabat(1.0, tsurf, pressure)
+    molecules = [structure.Molecule.constant(name, 1e-5, shape) for name in ('H2O', 'CO2', 'O3')]
+    gcm = PyGCM(pressure, temperature, *molecules, tsurf=tsurf)
+    target = models.Target(name='Exoplanet', object='Exoplanet', diameter=1*u.R_earth)
+    return PyConfig(target=target, gcm=gcm)
+
+
+def uncached_content(cfg: PyConfig) -> bytes:
+    """
+    Encode every model and the GCM, as before the content was cached.
+    """
+    lines = []
+    for model in [
+        cfg.target, cfg.geometry, cfg.gcm.update_params(cfg.atmosphere),
+        cfg.surface, cfg.generator, cfg.telescope, cfg.noise
+    ]:
+        c = b'\n'.join(field.content for _, field in model.fields.items() if not field.is_null)
+        if c != b'':
+            lines.append(c)
+    gcm = cfg.gcm
+    lines.append(
+        b'<ATMOSPHERE-GCM-PARAMETERS>' + gcm.header.encode() + b'\n'
+        + b'<BINARY>' + gcm.flat.tobytes(order='C') + b'</BINARY>'
+    )
+    return b'\n'.join(lines)
+
+
+def best_of(func, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--shape', type=int, nargs=3, default=[70, 144, 96],
+                        help='layers, longitudes and latitudes of the GCM')
+    parser.add_argument('--repeat', type=int, default=5, help='take the best of this many runs')
+    args = parser.parse_args()
+
+    cfg = make_config(tuple(args.shape))
+    assert uncached_content(cfg) == cfg.content
+    temperature = cfg.gcm.temperature
+    names = iter(range(10**9))
+
+    def change_field():
+        cfg.target.name = f'planet {next(names)}'
+        return cfg.content
+
+    def change_gcm():
+        cfg.gcm.temperature = structure.Temperature(temperature.dat + next(names)*u.K)
+        return cfg.content
+
+    print(f'{len(cfg.content)/1024**2:.1f} MiB config')
+    t_before = best_of(lambda: uncached_content(cfg), args.repeat)
+    for name, func in (
+        ('unchanged', lambda: cfg.content),
+        ('one field changed', change_field),
+        ('GCM changed', change_gcm),
+    ):
+        t_after = best_of(func, args.repeat)
+        print(
+            f'{name:>18}: before {t_before*1e3:9.3f} ms, '
+            f'after {t_after*1e3:9.3f} ms ({t_before/t_after:,.0f}x)'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Memory to write a config with a GCM to a file, or to prepare it for upload.
+
+Run with ``python benchmarks/bench_config_stream.py``. The config holds a
+synthetic GCM at WACCM resolution. Each run starts from a new config, so no
+cache is used. Writing ``content`` and sending a URL-encoded form, as before
+configs could be streamed, are measured for comparison. Peak memory is what
+``tracemalloc`` sees, as a multiple of the size of the GCM binary.
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import requests
+from astropy import units as u
+
+from pypsg.cfg import PyConfig
+from pypsg.cfg import models
+from pypsg.globes import PyGCM, structure
+from pypsg.upload import MultipartBody
+
+
+def make_config(shape) -> PyConfig:
+    pressure = structure.Pressure.from_limits(1*u.bar, 1e-5*u.bar, shape)
+    rng = np.random.default_rng(0)
+    tsurf = structure.SurfaceTemperature((250 + 50*rng.random(shape[1:]))*u.K)
+    temperature = structure.Temperature.from_adiabat(1.0, tsurf, pressure)
+    molecules = [
+        structure.Molecule(name, rng.random(shape)*1e-4*u.dimensionless_unscaled)
+        for name in ('H2O', 'CO2', 'O3', 'CH4', 'N2O')
+    ]
+    gcm = PyGCM(pressure, temperature, *molecules, tsurf=tsurf)
+    target = models.Target(name='Exoplanet', object='Exoplanet', diameter=1*u.R_earth)
+    return PyConfig(target=target, gcm=gcm)
+
+
+def write_content(cfg: PyConfig, path):
+    with open(path, 'wb') as file:
+        file.write(cfg.content)
+
+
+def write_stream(cfg: PyConfig, path):
+    with open(path, 'wb') as file:
+        cfg.write_to(file)
+
+
+def upload_form(cfg: PyConfig):
+    request = requests.Request('POST', 'http://localhost/api.php', data=dict(file=cfg.content, type='rad'))
+    return len(request.prepare().body)
+
+
+def upload_stream(cfg: PyConfig):
+    body = MultipartBody(cfg, {'type': 'rad'})
+    request = requests.Request('POST', 'http://localhost/api.php', data=body).prepare()
+    # what is sent over the socket
+    return sum(len(chunk) for chunk in request.body)
+
+
+def measure(func, shape, repeat: int):
+    """
+    The best time and the peak memory of running ``func`` on a new config.
+    """
+    times = []
+    peak = 0
+    for _ in range(repeat):
+        cfg = make_config(shape)
+        # the GCM variables are encoded in both cases
+        _ = cfg.gcm.flat
+        tracemalloc.start()
+        start = time.perf_counter()
+        func(cfg)
+        times.append(time.perf_counter() - start)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return min(times), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--shape', type=int, nargs=3, default=[70, 144, 96],
+                        help='layers, longitudes and latitudes of the GCM')
+    parser.add_argument('--repeat', type=int, default=3, help='take the best of this many runs')
+    args = parser.parse_args()
+
+    shape = tuple(args.shape)
+    size = make_config(shape).gcm.flat.nbytes
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'gcm.cfg')
+        print(f'binary of {size/1024**2:.1f} MiB')
+        for name, before, after in (
+            ('to file', lambda cfg: write_content(cfg, path), lambda cfg: write_stream(cfg, path)),
+            ('upload', upload_form, upload_stream),
+        ):
+            t_before, m_before = measure(before, shape, args.repeat)
+            t_after, m_after = measure(after, shape, args.repeat)
+            print(
+                f'{name:>8}: before {t_before*1e3:7.1f} ms, {m_before/size:4.2f}x binary; '
+                f'after {t_after*1e3:7.1f} ms, {m_after/size:4.2f}x binary'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""
+Time to read, set and remove the variables of a GCM decoder.
+
+Run with ``python benchmarks/bench_decoder.py``. The decoder holds random
+data for a GCM with winds, surface fields, a few molecules and aerosols. The
+lookups used before the offset index, which walk the header on every call,
+are timed for comparison.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from pypsg.globes.decoder import GCMdecoder, sep_header
+
+VARIABLES = [
+    'Winds', 'Tsurf', 'Psurf', 'Albedo', 'Emissivity', 'Temperature', 'Pressure',
+    'H2O', 'CO2', 'O3', 'CH4', 'N2O', 'CO', 'O2', 'Water', 'Water_size', 'WaterIce', 'WaterIce_size'
+]
+
+
+class LegacyDecoder(GCMdecoder):
+    """
+    ``GCMdecoder`` with the lookups used before the offset index.
+    """
+
+    def _array_length(self, var):
+        if var in self.DOUBLE:
+            return 2*self.get_3d_size(), 'double'
+        elif var in self.FLAT:
+            return self.get_2d_size(), 'flat'
+        else:
+            return self.get_3d_size(), 'single'
+
+    def __getitem__(self, item):
+        _, variables = sep_header(self.header)
+        if item not in variables:
+            raise KeyError(item)
+        start = 0
+        for var in variables:
+            size, key = self._array_length(var)
+            if item == var:
+                dat = self.dat[start:start+size]
+                Nlon, Nlat, Nlayer = self.get_shape()
+                if key == 'single':
+                    return dat.reshape(Nlayer, Nlon, Nlat)
+                elif key == 'flat':
+                    return dat.reshape(Nlon, Nlat)
+                return dat.reshape(2, Nlayer, Nlon, Nlat)
+            start += size
+
+    def __setitem__(self, item, new_value):
+        old_value = self.__getitem__(item)
+        new_value = new_value.astype(old_value.dtype)
+        _, variables = sep_header(self.header)
+        start = 0
+        for var in variables:
+            size, _ = self._array_length(var)
+            if item == var:
+                self.dat[start:start+size] = new_value.flatten(order='C')
+                return
+            start += size
+
+    def remove(self, *items):
+        for item in items:
+            coords, variables = sep_header(self.header)
+            start = 0
+            for var in variables:
+                size, _ = self._array_length(var)
+                if item == var:
+                    self.dat = np.delete(self.dat, slice(start, start+size))
+                else:
+                    start += size
+            self.header = ','.join(coords + [var for var in variables if var != item])
+
+
+def make_decoder(cls, shape):
+    nlayer, nlon, nlat = shape
+    header = ','.join(map(str, [nlon, nlat, nlayer, -180, -90, 360/nlon, 180/nlat] + VARIABLES))
+    n_2d = 4
+    n_3d = len(VARIABLES) - n_2d + 1
+    dat = np.random.default_rng(0).random(n_3d*nlayer*nlon*nlat + n_2d*nlon*nlat, dtype=np.float32)
+    return cls(header, dat)
+
+
+def best_of(func, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--shape', type=int, nargs=3, default=[70, 144, 96],
+                        help='layers, longitudes and latitudes of the GCM')
+    parser.add_argument('--number', type=int, default=100, help='lookups of each variable per run')
+    parser.add_argument('--repeat', type=int, default=5, help='take the best of this many runs')
+    args = parser.parse_args()
+
+    shape = tuple(args.shape)
+    legacy = make_decoder(LegacyDecoder, shape)
+    decoder = make_decoder(GCMdecoder, shape)
+    for var in VARIABLES:
+        assert np.all(legacy[var] == decoder[var])
+    removed = ['CH4', 'N2O', 'CO', 'O2', 'Water', 'Water_size']
+
+    def read(d):
+        for _ in range(args.number):
+            for var in VARIABLES:
+                _ = d[var]
+
+    def write(d):
+        values = {var: d[var].copy() for var in VARIABLES}
+        for var, value in values.items():
+            d[var] = value
+
+    def remove(cls):
+        d = make_decoder(cls, shape)
+        start = time.perf_counter()
+        d.remove(*removed)
+        return time.perf_counter() - start, d
+
+    print(f'{len(VARIABLES)} variables, {decoder.dat.nbytes/1024**2:.1f} MiB')
+    for name, before, after in (
+        (f'{args.number}x read all', lambda: read(legacy), lambda: read(decoder)),
+        ('set all', lambda: write(legacy), lambda: write(decoder)),
+    ):
+        t_before = best_of(before, args.repeat)
+        t_after = best_of(after, args.repeat)
+        print(f'{name:>14}: before {t_before*1e3:8.2f} ms, after {t_after*1e3:8.2f} ms ({t_before/t_after:.1f}x)')
+    t_before, d_before = min((remove(LegacyDecoder) for _ in range(args.repeat)), key=lambda r: r[0])
+    t_after, d_after = min((remove(GCMdecoder) for _ in range(args.repeat)), key=lambda r: r[0])
+    assert d_before.header == d_after.header and np.all(d_before.dat == d_after.dat)
+    print(
+        f'{f"remove {len(removed)}":>14}: before {t_before*1e3:8.2f} ms, '
+        f'after {t_after*1e3:8.2f} ms ({t_before/t_after:.1f}x)'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Time and memory to encode the binary of a GCM.
+
+Run with ``python benchmarks/bench_gcm_encode.py``. The GCM is synthetic, at
+WACCM resolution, with winds, surface fields, a few molecules and an aerosol.
+Each run encodes a new GCM, so no cache is used. The encoder used before the
+preallocated binary, which flattens a copy of every variable and then joins
+them, is timed for comparison. Peak memory is what ``tracemalloc`` sees
+above the size of the GCM data.
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+from astropy import units as u
+
+from pypsg.globes import PyGCM, structure
+
+DTYPE = np.float32
+
+
+def make_gcm(shape) -> PyGCM:
+    pressure = structure.Pressure.from_limits(1*u.bar, 1e-5*u.bar, shape)
+    rng = np.random.default_rng(0)
+    tsurf = structure.SurfaceTemperature((250 + 50*rng.random(shape[1:]))*u.K)
+    temperature = structure.Temperature.from_adiabat(1.0, tsurf, pressure)
+    psurf = structure.SurfacePressure.from_pressure(pressure)
+    albedo = structure.Albedo.constant(0.3, shape[1:])
+    molecules = [
+        structure.Molecule(name, rng.random(shape)*1e-4*u.dimensionless_unscaled)
+        for name in ('H2O', 'CO2', 'O3', 'CH4', 'N2O')
+    ]
+    water = structure.Aerosol('Water', rng.random(shape)*1e-6*u.dimensionless_unscaled)
+    water_size = structure.AerosolSize.constant('Water_size', 1e-5*u.m, shape)
+    return PyGCM(pressure, temperature, *molecules, water, water_size, tsurf=tsurf, psurf=psurf, albedo=albedo)
+
+
+def legacy_variable_flat(variable: structure.Variable) -> np.ndarray:
+    values = variable.dat.to_value(variable.psg_unit).astype(DTYPE)
+    if values.ndim == 2:
+        return np.swapaxes(values, 0, 1).flatten('C')
+    return np.swapaxes(values, 1, 2).flatten('C')
+
+
+def legacy_content(gcm: PyGCM) -> bytes:
+    flat = np.concatenate([legacy_variable_flat(v).astype(DTYPE) for v in gcm.variables]).astype(DTYPE)
+    return b''.join([
+        b'<ATMOSPHERE-GCM-PARAMETERS>', gcm.header.encode(),
+        b'\n<BINARY>', flat.tobytes(order='C'), b'</BINARY>'
+    ])
+
+
+def measure(func, shape, repeat: int):
+    """
+    The best time and the peak memory of encoding a new GCM.
+    """
+    times = []
+    peak = 0
+    for _ in range(repeat):
+        gcm = make_gcm(shape)
+        tracemalloc.start()
+        start = time.perf_counter()
+        func(gcm)
+        times.append(time.perf_counter() - start)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return min(times), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--shape', type=int, nargs=3, default=[70, 144, 96],
+                        help='layers, longitudes and latitudes of the GCM')
+    parser.add_argument('--repeat', type=int, default=3, help='take the best of this many runs')
+    args = parser.parse_args()
+
+    shape = tuple(args.shape)
+    gcm = make_gcm(shape)
+    assert legacy_content(gcm) == gcm.content
+    size = gcm.flat.nbytes
+
+    print(f'{len(gcm.variables)} variables, binary of {size/1024**2:.1f} MiB')
+    for name, before, after in (
+        ('flat', lambda g: np.concatenate([legacy_variable_flat(v) for v in g.variables]).astype(DTYPE),
+         lambda g: g.flat),
+        ('content', legacy_content, lambda g: g.content),
+    ):
+        t_before, m_before = measure(before, shape, args.repeat)
+        t_after, m_after = measure(after, shape, args.repeat)
+        print(
+            f'{name:>8}: before {t_before*1e3:7.1f} ms, {m_before/size:4.1f}x binary; '
+            f'after {t_after*1e3:7.1f} ms, {m_after/size:4.1f}x binary'
+        )
+
+
+if __name__ == '__main__':
+    main()
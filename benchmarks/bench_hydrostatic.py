@@ -0,0 +1,107 @@
+"""
+Time to find the altitude and column densities of a GCM.
+
+Run with ``python benchmarks/bench_hydrostatic.py``. The GCM is synthetic,
+at WACCM resolution, with a few molecules and an aerosol. The layer by layer
+``Quantity`` arithmetic used before the NumPy kernel, which also found the
+altitude again for every column, is timed for comparison.
+"""
+import argparse
+import time
+
+import numpy as np
+from astropy import units as u, constants as c
+
+from pypsg.globes import PyGCM, structure
+
+MASS = 1*u.M_earth
+RADIUS = 1*u.R_earth
+MMM = 28.97
+
+
+def make_gcm(shape) -> PyGCM:
+    pressure = structure.Pressure.from_limits(1*u.bar, 1e-5*u.bar, shape)
+    rng = np.random.default_rng(0)
+    tsurf = structure.SurfaceTemperature((250 + 50*rng.random(shape[1:]))*u.K)
+    temperature = structure.Temperature.from_adiabat(1.0, tsurf, pressure)
+    molecules = [
+        structure.Molecule(name, rng.random(shape)*1e-4*u.dimensionless_unscaled)
+        for name in ('H2O', 'CO2', 'O3', 'CH4', 'N2O')
+    ]
+    water = structure.Aerosol('Water', rng.random(shape)*1e-6*u.dimensionless_unscaled)
+    water_size = structure.AerosolSize.constant('Water_size', 1e-5*u.m, shape)
+    return PyGCM(pressure, temperature, *molecules, water, water_size)
+
+
+def legacy_altitude(gcm: PyGCM, mass, radius, mean_molecular_mass):
+    pressure = gcm.pressure
+    temperature = gcm.temperature
+    nlayer, nlon, nlat = gcm.shape
+    z_unit = u.km
+    z = np.zeros(shape=(nlayer, nlon, nlat))
+    for i in range(nlayer-1):
+        pressure_bottom = pressure.dat[i, :, :].to(u.bar)
+        pressure_top = pressure.dat[i+1, :, :].to(u.bar)
+        dP = pressure_top - pressure_bottom
+        rho = mean_molecular_mass*u.Unit('g mol-1') * \
+            (pressure_bottom + 0.5*dP) / c.R / temperature.dat[i, :, :]
+        distance_from_planet_center = radius + z[i, :, :]*z_unit
+        accel_due_to_gravity = c.G * mass / distance_from_planet_center**2
+        dz = -dP / rho / accel_due_to_gravity
+        z[i+1, :, :] = z[i, :, :] + dz.to_value(z_unit)
+    return z*z_unit
+
+
+def legacy_column(gcm: PyGCM, var, mass, radius, mean_molecular_mass):
+    variable = getattr(gcm, var)
+    pressure = gcm.pressure.dat.to(u.bar)
+    altitude = legacy_altitude(gcm, mass, radius, mean_molecular_mass)
+    temperature = gcm.temperature.dat.to(u.K)
+    heights = np.diff(altitude, axis=0)
+    if isinstance(variable, structure.Molecule):
+        abundance = variable.dat.to(u.dimensionless_unscaled)
+        surface_density = (pressure*abundance)[:-1] * heights / c.R / temperature[:-1]
+        return surface_density.sum(axis=0).to(u.mol/u.cm**2)
+    mass_frac = variable.dat.to_value(u.dimensionless_unscaled)[:-1, :, :]
+    moles = pressure[:-1]*heights / c.R / temperature[:-1]
+    return (moles * mean_molecular_mass*u.g/u.mol * mass_frac).sum(axis=0).to(u.kg/u.cm**2)
+
+
+def best_of(func, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--shape', type=int, nargs=3, default=[70, 144, 96],
+                        help='layers, longitudes and latitudes of the GCM')
+    parser.add_argument('--repeat', type=int, default=3, help='take the best of this many runs')
+    args = parser.parse_args()
+
+    gcm = make_gcm(tuple(args.shape))
+    names = [variable.name for variable in [*gcm.molecules, *gcm.aerosols]]
+    columns = gcm.columns(MASS, RADIUS, MMM)
+    for name in names:
+        assert np.allclose(columns[name], legacy_column(gcm, name, MASS, RADIUS, MMM), rtol=1e-9)
+
+    print(f'{args.shape[0]} layers, {args.shape[1]}x{args.shape[2]} columns, {len(names)} variables')
+    for name, before, after in (
+        ('altitude', lambda: legacy_altitude(gcm, MASS, RADIUS, MMM), lambda: gcm.altitude(MASS, RADIUS, MMM)),
+        (
+            'all columns',
+            lambda: {name: legacy_column(gcm, name, MASS, RADIUS, MMM) for name in names},
+            lambda: gcm.columns(MASS, RADIUS, MMM)
+        ),
+    ):
+        t_before = best_of(before, args.repeat)
+        t_after = best_of(after, args.repeat)
+        print(f'{name:>11}: before {t_before*1e3:8.1f} ms, after {t_after*1e3:8.1f} ms ({t_before/t_after:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
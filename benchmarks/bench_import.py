@@ -0,0 +1,83 @@
+"""
+Wall time of importing PyPSG in a fresh interpreter.
+
+Run with ``python benchmarks/bench_import.py``. Each import runs in a new
+subprocess with an empty home directory, so no settings file exists. The
+time of an empty interpreter is subtracted.
+
+The script exits with status 1 if ``import pypsg`` takes longer than
+``--budget`` milliseconds. Pass ``--record`` to add the results for the
+current version to ``benchmarks/results/import.json``, so the numbers can be
+compared across releases.
+"""
+import argparse
+import json
+import os
+from pathlib import Path
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = Path(__file__).parent.parent
+RESULTS_PATH = Path(__file__).parent / 'results' / 'import.json'
+DEFAULT_BUDGET_MS = 100.0
+MODULES = ('pypsg', 'pypsg.cfg', 'pypsg.request', 'pypsg.globes')
+
+
+def _time_import(statement: str, env: dict) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', statement], env=env, check=True)
+    return time.perf_counter() - start
+
+
+def _version(env: dict) -> str:
+    result = subprocess.run(
+        [sys.executable, '-c', 'import pypsg; print(pypsg.__version__)'],
+        env=env, check=True, capture_output=True, text=True
+    )
+    return result.stdout.strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-n', type=int, default=10, help='number of imports to time')
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET_MS,
+                        help='maximum time of `import pypsg` in ms')
+    parser.add_argument('--record', action='store_true',
+                        help=f'save the results to {RESULTS_PATH.relative_to(ROOT)}')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as home:
+        env = dict(os.environ)
+        env['HOME'] = home
+        env['USERPROFILE'] = home
+        env['PYTHONPATH'] = os.pathsep.join([str(ROOT), env.get('PYTHONPATH', '')])
+        interpreter = statistics.median(_time_import('pass', env) for _ in range(args.n))
+        results = {}
+        for module in MODULES:
+            times = [_time_import(f'import {module}', env) for _ in range(args.n)]
+            results[module] = round(1e3*(statistics.median(times) - interpreter), 1)
+        created = (Path(home) / '.pypsg').exists()
+        version = _version(env)
+
+    print(f'pypsg {version}, interpreter startup {1e3*interpreter:.1f} ms')
+    for module, ms in results.items():
+        print(f'import {module:<14} : {ms:7.1f} ms (median of {args.n})')
+    print(f'created ~/.pypsg      : {created}')
+
+    if args.record:
+        RESULTS_PATH.parent.mkdir(exist_ok=True)
+        history = json.loads(RESULTS_PATH.read_text()) if RESULTS_PATH.exists() else {}
+        history[version] = results
+        RESULTS_PATH.write_text(json.dumps(history, indent=4) + '\n')
+        print(f'Saved results to {RESULTS_PATH}')
+
+    if results['pypsg'] > args.budget:
+        print(f'import pypsg is over budget ({results["pypsg"]:.1f} > {args.budget:.1f} ms)')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
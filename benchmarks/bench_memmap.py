@@ -0,0 +1,80 @@
+"""
+Time and memory to load a GCM config from disk, read or memory-mapped.
+
+Run with ``python benchmarks/bench_memmap.py``. A config with a synthetic
+GCM is written to a temporary file and loaded with ``GCMdecoder.from_psg``
+and with ``BinConfig.from_file`` followed by ``PyGCM.from_cfg``. Memory is
+the peak traced by ``tracemalloc`` while loading, which counts the file
+contents only when they are read into memory.
+"""
+import argparse
+from pathlib import Path
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+from astropy import units as u
+
+from pypsg.cfg import PyConfig, BinConfig
+from pypsg.cfg import models
+from pypsg.globes import PyGCM, GCMdecoder, structure
+
+
+def make_config(shape) -> PyConfig:
+    pressure = structure.Pressure.from_limits(1*u.bar, 1e-5*u.bar, shape)
+    tsurf = structure.SurfaceTemperature(300*u.K*np.ones(shape[1:]))
+    temperature = structure.Temperature.from_adiabat(1.0, tsurf, pressure)
+    molecules = [structure.Molecule.constant(name, 1e-5, shape) for name in ('H2O', 'CO2', 'O3')]
+    gcm = PyGCM(pressure, temperature, *molecules, tsurf=tsurf)
+    target = models.Target(name='Exoplanet', object='Exoplanet', diameter=1*u.R_earth)
+    return PyConfig(target=target, gcm=gcm)
+
+
+def gcm_from_file(path, memmap: bool) -> PyGCM:
+    with BinConfig.from_file(path, memmap=memmap) as cfg:
+        return PyGCM.from_cfg(cfg)
+
+
+def measure(func, repeat: int):
+    """
+    The best time and the peak memory of ``func``.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return min(times), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--shape', type=int, nargs=3, default=[70, 144, 96],
+                        help='layers, longitudes and latitudes of the GCM')
+    parser.add_argument('--repeat', type=int, default=5, help='take the best of this many runs')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / 'globes.cfg'
+        make_config(tuple(args.shape)).to_file(path)
+        print(f'{path.stat().st_size/1024**2:.1f} MiB config')
+        for name, func in (
+            ('GCMdecoder.from_psg', lambda memmap: GCMdecoder.from_psg(path, memmap=memmap)),
+            ('PyGCM from file', lambda memmap: gcm_from_file(path, memmap)),
+        ):
+            t_read, m_read = measure(lambda: func(False), args.repeat)
+            t_map, m_map = measure(lambda: func(True), args.repeat)
+            print(
+                f'{name:>19}: read {t_read*1e3:8.2f} ms {m_read/1024**2:7.1f} MiB, '
+                f'mapped {t_map*1e3:8.2f} ms {m_map/1024**2:7.1f} MiB'
+            )
+
+
+if __name__ == '__main__':
+    main()
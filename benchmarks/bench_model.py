@@ -0,0 +1,136 @@
+"""
+Time to build, read and write PSG config models.
+
+Run with ``python benchmarks/bench_model.py``. The ``dir`` and ``deepcopy``
+based code used before ``Model._fields`` is timed for comparison.
+"""
+import argparse
+from contextlib import contextmanager
+from copy import deepcopy
+from pathlib import Path
+import time
+
+from pypsg.cfg import PyConfig, BinConfig
+from pypsg.cfg import models
+from pypsg.cfg.base import Field
+
+CFG_PATH = Path(__file__).parent.parent / 'test' / 'data' / 'advanced.cfg'
+
+
+def legacy_init(self: models.Model, **kwargs):
+    for field_name in dir(self):
+        if not field_name == 'content':
+            field = getattr(self, field_name)
+            if isinstance(field, Field):
+                newfield = deepcopy(field)
+                newfield.value = kwargs.get(field_name, field.default)
+                self.__setattr__(field_name, newfield)
+
+
+@contextmanager
+def legacy_models():
+    """
+    Use ``legacy_init`` in place of ``Model.__init__``.
+    """
+    init = models.Model.__init__
+    models.Model.__init__ = legacy_init
+    try:
+        yield
+    finally:
+        models.Model.__init__ = init
+
+
+def legacy_from_cfg(cls, cfg: dict) -> models.Model:
+    initialized = cls()
+    cls_to_create = initialized._type_to_create(cfg=cfg)
+    kwargs = {}
+    for field_name in dir(cls_to_create):
+        if not field_name == 'content':
+            field = getattr(cls_to_create, field_name)
+            if isinstance(field, Field):
+                kwargs[field_name] = field.read(cfg)
+    return cls_to_create(**kwargs)
+
+
+def legacy_content(self: models.Model) -> bytes:
+    lines = []
+    for field_name in dir(self):
+        if not field_name == 'content':
+            field = getattr(self, field_name)
+            if isinstance(field, Field):
+                if not field.is_null:
+                    lines.append(field.content)
+    return b'\n'.join(lines)
+
+
+MODELS = (
+    models.Target, models.Geometry, models.Atmosphere, models.Surface,
+    models.Generator, models.Telescope, models.Noise
+)
+
+
+def best_of(func, repeat: int, number: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - start)/number)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--number', type=int, default=200, help='calls per run')
+    parser.add_argument('--repeat', type=int, default=5, help='take the best of this many runs')
+    args = parser.parse_args()
+
+    d = BinConfig.from_file(CFG_PATH).dict
+    cfg = PyConfig.from_dict(d)
+    built = [getattr(cfg, name) for name in (
+        'target', 'geometry', 'atmosphere', 'surface', 'generator', 'telescope', 'noise')]
+    for model in built:
+        assert legacy_content(model) == model.content
+
+    def legacy_empty():
+        with legacy_models():
+            for cls in MODELS:
+                cls()
+
+    def empty():
+        for cls in MODELS:
+            cls()
+
+    def legacy_read():
+        with legacy_models():
+            for cls in MODELS:
+                legacy_from_cfg(cls, d)
+
+    def read():
+        for cls in MODELS:
+            cls.from_cfg(d)
+
+    def legacy_write():
+        for model in built:
+            legacy_content(model)
+
+    def write():
+        for model in built:
+            _ = model.content
+
+    cases = (
+        ('empty models', legacy_empty, empty),
+        ('models from a dict', legacy_read, read),
+        ('model content', legacy_write, write),
+    )
+    for name, before, after in cases:
+        t_before = best_of(before, args.repeat, args.number)
+        t_after = best_of(after, args.repeat, args.number)
+        print(
+            f'{name:>20}: before {t_before*1e6:8.1f} us, '
+            f'after {t_after*1e6:8.1f} us ({t_before/t_after:.1f}x)'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Time to look up the molecules of many GCM snapshots.
+
+Run with ``python benchmarks/bench_molecules.py``. Each snapshot is a small
+decoder with a few molecules, on a square grid because the code used before
+could not sum the masses over any other. Reading ``molec.json`` on every call, as was
+done before the database was cached, is timed for comparison.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from pypsg.globes.decoder import GCMdecoder, sep_header
+from pypsg.globes.molecules import MOLEC_DATA_PATH
+
+HEADER = '8,8,10,-180,-90,45,22.5,Pressure,Temperature,H2O,CO2,O3,CH4,N2'
+
+
+def legacy_get_molecules(decoder: GCMdecoder):
+    with open(MOLEC_DATA_PATH, 'rt', encoding='UTF-8') as file:
+        molec_data = json.loads(file.read())
+    _, variables = sep_header(decoder.header)
+    return [var for var in variables if var in molec_data.keys()]
+
+
+def legacy_mean_molec_mass(decoder: GCMdecoder):
+    with open(MOLEC_DATA_PATH, 'rt', encoding='UTF-8') as file:
+        molec_data = json.loads(file.read())
+    Nlon, Nlat, Nlayer = decoder.get_shape()
+    mean_molec_mass = np.zeros(shape=(Nlayer, Nlat, Nlon))
+    for mol, dat in molec_data.items():
+        try:
+            mean_molec_mass = mean_molec_mass + 10**decoder[mol]*dat['mass']
+        except KeyError:
+            pass
+    return mean_molec_mass
+
+
+def best_of(func, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--snapshots', type=int, default=1000, help='number of GCM snapshots')
+    parser.add_argument('--repeat', type=int, default=5, help='take the best of this many runs')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    size = 7*8*8*10
+    decoders = [GCMdecoder(HEADER, np.log10(rng.random(size))) for _ in range(args.snapshots)]
+    for decoder in decoders[:10]:
+        assert legacy_get_molecules(decoder) == decoder.get_molecules()
+        assert np.all(legacy_mean_molec_mass(decoder) == decoder.get_mean_molec_mass().value)
+    for name, before, after in (
+        ('get_molecules', legacy_get_molecules, GCMdecoder.get_molecules),
+        ('get_mean_molec_mass', legacy_mean_molec_mass, GCMdecoder.get_mean_molec_mass),
+    ):
+        t_before = best_of(lambda: [before(d) for d in decoders], args.repeat)
+        t_after = best_of(lambda: [after(d) for d in decoders], args.repeat)
+        print(
+            f'{name:>19}: before {t_before/args.snapshots*1e6:7.1f} us, '
+            f'after {t_after/args.snapshots*1e6:7.1f} us per snapshot ({t_before/t_after:.1f}x)'
+        )
+
+
+if __name__ == '__main__':
+    main()
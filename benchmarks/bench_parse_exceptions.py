@@ -0,0 +1,96 @@
+"""
+Time to check a reply that echoes a GCM config for PSG errors.
+
+Run with ``python benchmarks/bench_parse_exceptions.py``. The replies are
+synthetic: a short config with a ``<BINARY>`` block of the given size, and
+a warning after it. The regular expression scan used before is timed for
+comparison.
+
+The old scan only removes a binary block that holds no newline bytes, and
+then decodes the whole reply. Real ``float32`` data holds newline bytes and
+is rarely valid UTF-8, so the old scan raises ``UnicodeDecodeError`` on it.
+Printable blocks, with and without newlines, are timed as well so that the
+old scan can be compared at all.
+"""
+import argparse
+import re
+import time
+import warnings
+
+import numpy as np
+
+from pypsg import settings
+from pypsg import exceptions
+from pypsg.request import parse_exceptions
+
+
+def binary_block(n_bytes: int, kind: str) -> bytes:
+    """
+    Build ``n_bytes`` bytes of binary data.
+    """
+    rng = np.random.default_rng(0)
+    if kind == 'float32':
+        return rng.random(n_bytes//4, dtype=np.float32).tobytes()
+    data = rng.integers(32, 127, n_bytes, dtype=np.uint8)
+    if kind == 'lines':
+        data[::80] = ord('\n')
+    return data.tobytes()
+
+
+def reply(n_bytes: int, kind: str) -> bytes:
+    """
+    Build a reply with a binary block of ``n_bytes`` bytes.
+    """
+    return (
+        b'<OBJECT>Exoplanet\n<GENERATOR-RANGE1>1\n'
+        b'<BINARY>' + binary_block(n_bytes, kind) + b'</BINARY>\n'
+        b'WARNING | PUMAS | slow\n'
+    )
+
+
+def legacy_parse_exceptions(content: bytes):
+    """
+    The scan used before offsets were used to skip binary blocks.
+    """
+    content = re.sub(b'<BINARY>.*</BINARY>', b'', content)
+    content = content.replace(b'\r', b'')
+    content = str(content, encoding=settings.get_setting('encoding'))
+    matchs = re.findall(r'WARNING \| ([\w]+) \| (.*)', content)
+    for match in matchs:
+        warnings.warn(exceptions.UnknownPSGWarning(match[1]))
+    matchs = re.findall(r'ERROR \| ([\w]+) \| (.*)', content)
+    if matchs:
+        raise exceptions.UnknownPSGError(matchs[0][1])
+
+
+def best_of(func, b: bytes, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(b)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--mib', type=float, nargs='+', default=[1, 10, 100],
+                        help='sizes of the binary block in MiB')
+    parser.add_argument('--repeat', type=int, default=5, help='take the best of this many runs')
+    args = parser.parse_args()
+
+    warnings.simplefilter('ignore')
+    for kind in ('printable', 'lines', 'float32'):
+        for mib in args.mib:
+            b = reply(int(mib*1024**2), kind)
+            t_after = best_of(parse_exceptions, b, args.repeat)
+            try:
+                t_before = best_of(legacy_parse_exceptions, b, args.repeat)
+                before = f'before {t_before*1e3:8.2f} ms ({t_before/t_after:4.1f}x)'
+            except UnicodeDecodeError:
+                before = 'before raises UnicodeDecodeError'
+            print(f'{kind:>9} {mib:6.1f} MiB: after {t_after*1e3:8.2f} ms, {before}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Parse throughput of ``PyLyr.from_bytes``.
+
+Run with ``python benchmarks/bench_parse_lyr.py``. The files are synthetic,
+with the same layout as PSG ``.lyr`` output, and grow with the number of
+layers and molecules. The regex-based parser used before the single-pass
+tokenizer is timed for comparison, and both must give the same tables.
+"""
+import argparse
+import re
+import time
+
+import numpy as np
+from astropy import units as u
+
+from pypsg import PyLyr, settings
+
+
+def synthetic(n_layers: int, n_molecules: int, n_aerosols: int = 2) -> bytes:
+    """
+    Build a PSG-like ``.lyr`` file.
+    """
+    rng = np.random.default_rng(0)
+    molecs = [f'M{i}' for i in range(n_molecules)]
+    aeros = [f'Aero{i}' for i in range(n_aerosols)]
+    rule = '# ' + '-'*100
+    lines = [
+        rule,
+        '# Layering information synthesized with the NASA-GSFC Planetary Spectrum Generator (PSG, v2.1)',
+        '# Synthesized on 2024/06/26 12:00:00 by the NASA-GSFC Planetary Spectrum Generator',
+        '# Radiative transfer method: line-by-line, 3 term Legendre expansion',
+        '# Synthesis resolution [um]: 0.01 100 500 2',
+        '# Molecular abundance profile: from config',
+        f'# Molecules considered: {",".join(molecs)}',
+        f'# Molecular sources: {",".join("HIT" for _ in molecs)}',
+        f'# Molecular abundances: {",".join("1" for _ in molecs)}',
+        f'# Molecular abundance units: {",".join("scl" for _ in molecs)}',
+        f'# Aerosols considered: {",".join(aeros)}',
+        f'# Aerosols sources: {",".join("CRISM_Wolff" for _ in aeros)}',
+        f'# Aerosols abundances: {",".join("1" for _ in aeros)}',
+        f'# Aerosol abundance units: {",".join("scl" for _ in aeros)}',
+        f'# Aerosol sizes: {",".join("1" for _ in aeros)}',
+        f'# Aerosol size units: {",".join("um" for _ in aeros)}',
+        '# Refraction Rmax-1 and bending [deg]: 2.7e-04 0.0',
+        rule,
+        '# Atmospheric vertical profile',
+        '# Alt[km] Pressure[bar] Temperature[K] ' + ' '.join(molecs) + ' '
+        + ' '.join(f'{a} {a}_size[um]' for a in aeros),
+    ]
+    n_cols = 3 + n_molecules + 2*n_aerosols
+    alt = np.linspace(0, 100, n_layers)
+    for table in ('profile', 'column'):
+        if table == 'column':
+            lines += [rule, '# Layer column densities [molecules/m2] [kg/m2]']
+        values = rng.random((n_layers, n_cols))
+        values[:, 0] = alt
+        for row in values:
+            lines.append('# ' + ' '.join(f'{v:11.4e}' if j else f'{v:8.3f}' for j, v in enumerate(row)))
+    lines += [rule, '# Integrated column densities: ' + ' '.join('1.0e+20' for _ in molecs), rule, '']
+    return '\n'.join(lines).encode('utf-8')
+
+
+def legacy_parse(text: str):
+    """
+    The regex-based scan used before the single-pass tokenizer.
+    """
+    def find(s: str):
+        try:
+            return re.findall(s, text)[0]
+        except IndexError:
+            return None
+    metadata = {}
+    other_data = {}
+    metadata['molecules'] = re.findall(r'# Molecules considered: (.*)', text)[0]
+    metadata['molec_sources'] = re.findall(r'# Molecular sources: (.*)', text)[0]
+    metadata['molec_abuns'] = re.findall(r'# Molecular abundances: (.*)', text)[0]
+    metadata['molec_abun_units'] = re.findall(r'# Molecular abundance units: (.*)', text)[0]
+    metadata['aerosols'] = find(r'Aerosols considered: (.*)')
+    metadata['aero_sources'] = find(r'Aerosols sources: (.*)')
+    metadata['aero_abns'] = find(r'Aerosols abundances: (.*)')
+    metadata['aero_abn_units'] = find(r'Aerosol abundance units: (.*)')
+    metadata['aero_sizes'] = find(r'Aerosol sizes: (.*)')
+    metadata['aero_size_units'] = find(r'Aerosol size units: (.*)')
+    other_data['tab1_names'] = re.findall(r'#[ ]*(Alt\[km\].*)', text)[0]
+    other_data['tab2_names'] = re.findall(r'#[ ]*(Alt\[km\].*)', text)[0]
+    possible_table_lines = re.compile(r"(#[ ]+[\de\-\+\.\s]+)\n").findall(text, re.MULTILINE)
+    tabs = []
+    current_tab = []
+    for line in possible_table_lines:
+        if not '.' in line:
+            if len(current_tab) != 0:
+                tabs.append(current_tab)
+                current_tab = []
+        else:
+            current_tab.append(line)
+    tab1_raw = '\n'.join(tabs[0])
+    tab2_raw = '\n'.join(tabs[1])
+    integrated_vals = re.findall(r'Integrated[a-z ]+(.*)', text)[0]
+    return metadata, other_data, tab1_raw, tab2_raw, integrated_vals
+
+
+def legacy_from_bytes(b: bytes) -> PyLyr:
+    b = b.replace(b'\r', b'')
+    s = b.decode(settings.get_setting('encoding'))
+    metadata, other_data, tab1_raw, tab2_raw, _ = legacy_parse(s)
+
+    def tab_data(tab_raw: str):
+        return np.array([np.fromstring(line[1:], sep=' ') for line in tab_raw.split('\n')])
+    tabs = []
+    for raw, molec_unit, aero_unit in (
+        (tab1_raw, u.dimensionless_unscaled, u.dimensionless_unscaled),
+        (tab2_raw, u.m**-2, u.kg*u.m**-2)
+    ):
+        names, units = PyLyr._get_tab_cols(
+            other_data['tab1_names'].split(), molec_unit, aero_unit,
+            molecs=metadata['molecules'], aeros=metadata['aerosols'])
+        tabs.append(PyLyr._build_tab(names, units, tab_data(raw)))
+    return PyLyr(prof=tabs[0], cg=tabs[1])
+
+
+def same(a: PyLyr, b: PyLyr) -> bool:
+    for name in ('prof', 'cg'):
+        ta, tb = getattr(a, name), getattr(b, name)
+        if ta.colnames != tb.colnames:
+            return False
+        for col in ta.colnames:
+            if ta[col].unit != tb[col].unit or not np.array_equal(ta[col].value, tb[col].value):
+                return False
+    return True
+
+
+def best_of(func, b: bytes, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(b)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--layers', type=int, nargs='+', default=[60, 1000, 10000],
+                        help='numbers of layers to time')
+    parser.add_argument('--molecules', type=int, default=20, help='number of molecules')
+    parser.add_argument('--repeat', type=int, default=3, help='take the best of this many runs')
+    args = parser.parse_args()
+    for n_layers in args.layers:
+        b = synthetic(n_layers, args.molecules)
+        assert same(legacy_from_bytes(b), PyLyr.from_bytes(b))
+        t_before = best_of(legacy_from_bytes, b, args.repeat)
+        t_after = best_of(PyLyr.from_bytes, b, args.repeat)
+        print(
+            f'{n_layers:>6d} layers x {args.molecules} molecules ({len(b)/1024**2:5.1f} MiB): '
+            f'before {len(b)/1024**2/t_before:6.1f} MiB/s, '
+            f'after {len(b)/1024**2/t_after:6.1f} MiB/s ({t_before/t_after:.1f}x)'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Rows per second parsed by ``PyRad.from_bytes`` and ``PyTrn.from_bytes``.
+
+Run with ``python benchmarks/bench_parse_rad.py``. The files are synthetic,
+with the same header and number format as PSG output. The line-by-line
+parser used before ``pypsg.parse`` is timed for comparison.
+"""
+import argparse
+import time
+
+import numpy as np
+from astropy import units as u
+
+from pypsg import PyRad, PyTrn, settings
+from pypsg.parse import split_header
+
+RAD_HEADER = b'''# ------------------------------------------------------------------------------------------------
+# Planet spectrum (Exoplanet) synthesized with the NASA-GSFC Planetary Spectrum Generator (PSG, v2.1)
+# Spectral unit: Wavelength [um]
+# Radiance unit: Spectral radiance [W/sr/m2/um]
+# Wave/freq Total Noise Stellar Planet
+'''
+TRN_HEADER = b'''# ------------------------------------------------------------------------------------------------
+# Transmittance spectrum synthesized with the NASA-GSFC Planetary Spectrum Generator (PSG, v2.1)
+# Spectral unit: Wavelength [um]
+# Wave/freq Total H2O CO2 O3 N2 Rayleigh
+'''
+
+
+def synthetic(header: bytes, n_rows: int, n_cols: int) -> bytes:
+    """
+    Build a PSG-like table with ``n_rows`` rows.
+    """
+    rng = np.random.default_rng(0)
+    data = rng.random((n_rows, n_cols))
+    data[:, 0] = np.linspace(1, 20, n_rows)
+    fmt = '%9.5f' + '   %.5e'*(n_cols - 1)
+    body = '\n'.join(fmt % tuple(row) for row in data)
+    return header + body.encode('utf-8') + b'\n'
+
+
+def legacy_table(b: bytes):
+    """
+    The line-by-line parse used before ``pypsg.parse``.
+    """
+    b = b.replace(b'\r', b'')
+    lines = b.split(b'\n')
+    encoding = settings.get_setting('encoding')
+    header = [line.decode(encoding) for line in lines if line.startswith(b'#')]
+    content = [line.decode(encoding) for line in lines if (not line.startswith(b'#') and len(line) > 0)]
+    return '\n'.join(header), np.array([np.fromstring(line, sep=' ') for line in content])
+
+
+def legacy_rad(b: bytes) -> PyRad:
+    header, content = legacy_table(b)
+    metadata = PyRad._get_metadata(header)
+    names = metadata[PyRad._NAMES].split(' ')
+    data = {}
+    for i, name in enumerate(names):
+        data[name] = content[:, i] * (metadata[PyRad.SPEC_UNIT] if i == 0 else metadata[PyRad.RAD_UNIT])
+    return PyRad(data=data)
+
+
+def legacy_trn(b: bytes) -> PyTrn:
+    header, content = legacy_table(b)
+    metadata = PyTrn._get_metadata(header)
+    names = metadata[PyTrn._NAMES].split(' ')
+    data = {}
+    for i, name in enumerate(names):
+        data[name] = content[:, i] * (metadata[PyTrn.SPEC_UNIT] if i == 0 else u.dimensionless_unscaled)
+    return PyTrn(data=data)
+
+
+def best_of(func, b: bytes, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(b)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10**4, 10**5, 10**6],
+                        help='numbers of rows to time')
+    parser.add_argument('--repeat', type=int, default=3, help='take the best of this many runs')
+    args = parser.parse_args()
+
+    cases = (
+        ('rad', RAD_HEADER, 5, legacy_rad, PyRad.from_bytes),
+        ('trn', TRN_HEADER, 7, legacy_trn, PyTrn.from_bytes),
+    )
+    for kind, header, n_cols, before, after in cases:
+        for n_rows in args.rows:
+            b = synthetic(header, n_rows, n_cols)
+            assert np.array_equal(before(b)['Wave/freq'], after(b)['Wave/freq'])
+            t_before = best_of(before, b, args.repeat)
+            t_after = best_of(after, b, args.repeat)
+            print(
+                f'{kind} {n_rows:>8d} rows ({len(b)/1024**2:6.1f} MiB): '
+                f'before {n_rows/t_before:11,.0f} rows/s, '
+                f'after {n_rows/t_after:11,.0f} rows/s '
+                f'({t_before/t_after:.1f}x)'
+            )
+
+
+if __name__ == '__main__':
+    main()
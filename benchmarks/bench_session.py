@@ -0,0 +1,60 @@
+"""
+Per-call latency of ``APICall`` with and without connection pooling.
+
+Run with ``python benchmarks/bench_session.py``. Every call goes to a local
+stub server, so the numbers are dominated by connection setup and parsing
+rather than by PSG itself.
+"""
+import argparse
+import time
+from pathlib import Path
+import statistics
+import requests
+
+from pypsg import PyConfig, APICall
+from pypsg.session import SessionPool
+
+from stub_server import StubServer
+
+CFG_PATH = Path(__file__).parent.parent / 'test' / 'data' / 'simple.cfg'
+
+
+class _NoPool:
+    """
+    Mimic the old behaviour: one ``requests.post`` (and connection) per call.
+    """
+    def post(self, url, **kwargs):
+        return requests.post(url=url, **kwargs)
+
+
+def _time_calls(cfg, url, session, n_calls: int):
+    latencies = []
+    for _ in range(n_calls):
+        start = time.perf_counter()
+        APICall.call(cfg, 'rad', None, None, url, {}, timeout=10, session=session)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-n', '--n-calls', type=int, default=500)
+    args = parser.parse_args()
+
+    cfg = PyConfig.from_file(CFG_PATH)
+    with StubServer() as server:
+        # warm up
+        _time_calls(cfg, server.url, _NoPool(), 10)
+        no_pool = _time_calls(cfg, server.url, _NoPool(), args.n_calls)
+        with SessionPool() as pool:
+            pooled = _time_calls(cfg, server.url, pool, args.n_calls)
+
+    print(f'{"":>12} {"median [ms]":>12} {"p95 [ms]":>12}')
+    for name, lat in [('no pool', no_pool), ('pooled', pooled)]:
+        p95 = statistics.quantiles(lat, n=20)[-1]
+        print(f'{name:>12} {1e3*statistics.median(lat):12.3f} {1e3*p95:12.3f}')
+    print(f'speedup: {statistics.median(no_pool)/statistics.median(pooled):.2f}x')
+
+
+if __name__ == '__main__':
+    main()
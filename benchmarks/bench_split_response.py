@@ -0,0 +1,100 @@
+"""
+Time and peak memory of splitting a multi-file reply into its files.
+
+Run with ``python benchmarks/bench_split_response.py``. The replies are
+synthetic, with a large ``.rad``, ``.noi`` and ``.trn`` section each. The
+regular expression splitter used before ``pypsg.parse.split_sections`` is
+timed for comparison. Only the splitting is timed, not the parsing of each
+file.
+"""
+import argparse
+import re
+import time
+import tracemalloc
+
+from pypsg.parse import split_sections, SectionSplitter
+
+from bench_parse_rad import synthetic, RAD_HEADER, TRN_HEADER
+
+
+def reply(n_rows: int, crlf: bool) -> bytes:
+    """
+    Build a reply of type ``all`` with ``n_rows`` rows in each table.
+    """
+    parts = [
+        b'results_rad.txt\n' + synthetic(RAD_HEADER, n_rows, 5),
+        b'results_noi.txt\n' + synthetic(RAD_HEADER, n_rows, 5),
+        b'results_trn.txt\n' + synthetic(TRN_HEADER, n_rows, 7),
+    ]
+    b = b'\n'.join(parts)
+    return b.replace(b'\n', b'\r\n') if crlf else b
+
+
+def legacy_split(b: bytes) -> dict:
+    """
+    The splitter used before ``pypsg.parse.split_sections``.
+    """
+    b = b.replace(b'\r', b'')
+    split_text = re.split(rb'results_([\w]+).txt', b)
+    return {name: dat.strip() for name, dat in zip(split_text[1::2], split_text[2::2])}
+
+
+def offset_split(b: bytes) -> dict:
+    """
+    The current splitter, with the copy handed to each parser.
+    """
+    if b'\r' in b:
+        b = b.replace(b'\r', b'')
+    return {name: bytes(content) for name, content in split_sections(b)}
+
+
+def chunked_split(b: bytes, size: int = 2**16) -> dict:
+    """
+    The splitter used for streamed replies.
+    """
+    splitter = SectionSplitter()
+    data = {}
+    for i in range(0, len(b), size):
+        data.update(splitter.feed(b[i:i+size]))
+    data.update(splitter.close())
+    return data
+
+
+def measure(func, b: bytes, repeat: int):
+    """
+    The best time of ``repeat`` runs, and the peak memory allocated.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(b)
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func(b)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(times), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10**4, 10**5, 10**6],
+                        help='numbers of rows in each table')
+    parser.add_argument('--repeat', type=int, default=5, help='take the best of this many runs')
+    args = parser.parse_args()
+
+    for crlf in (False, True):
+        for n_rows in args.rows:
+            b = reply(n_rows, crlf)
+            expected = legacy_split(b)
+            mib = len(b)/1024**2
+            line = f'{"CRLF" if crlf else "LF  "} {mib:7.1f} MiB:'
+            for name, func in (('before', legacy_split), ('after', offset_split), ('chunked', chunked_split)):
+                assert func(b) == expected
+                t, peak = measure(func, b, args.repeat)
+                line += f' {name} {mib/t:8,.0f} MiB/s, peak {peak/len(b):4.1f}x reply;'
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Configs per second generated for a parameter sweep.
+
+Run with ``python benchmarks/bench_sweep.py``. Two fields of
+``test/data/advanced.cfg`` are varied over a grid, with and without a
+synthetic GCM. Deep-copying the base config and encoding it in full at each
+point, as was done before ``PyConfig.sweep``, is timed for comparison.
+"""
+import argparse
+from copy import deepcopy
+from pathlib import Path
+import time
+
+import numpy as np
+from astropy import units as u
+
+from pypsg.cfg import PyConfig
+from pypsg.globes import PyGCM, structure
+
+CFG_PATH = Path(__file__).parent.parent / 'test' / 'data' / 'advanced.cfg'
+
+
+def make_gcm(shape) -> PyGCM:
+    pressure = structure.Pressure.from_limits(1*u.bar, 1e-5*u.bar, shape)
+    tsurf = structure.SurfaceTemperature(300*u.K*np.ones(shape[1:]))
+    temperature = structure.Temperature.from_adiabat(1.0, tsurf, pressure)
+    h2o = structure.Molecule.constant('H2O', 1e-5, shape)
+    return PyGCM(pressure, temperature, h2o, tsurf=tsurf)
+
+
+def copy_and_encode(base: PyConfig, distances, seasons):
+    for distance in distances:
+        for season in seasons:
+            cfg = deepcopy(base)
+            cfg.target.star_distance = distance
+            cfg.target.season = season
+            _ = cfg.content
+
+
+def sweep(base: PyConfig, distances, seasons):
+    for cfg in base.sweep(target__star_distance=distances, target__season=seasons):
+        _ = cfg.content
+
+
+def updates(base: PyConfig, distances, seasons):
+    for cfg in base.sweep(target__star_distance=distances, target__season=seasons).updates():
+        _ = cfg.content
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--points', type=int, default=20, help='values along each axis')
+    parser.add_argument('--shape', type=int, nargs=3, default=[40, 72, 48],
+                        help='layers, longitudes and latitudes of the GCM')
+    args = parser.parse_args()
+
+    distances = np.linspace(0.05, 1, args.points)*u.AU
+    seasons = np.linspace(0, 360, args.points, endpoint=False)*u.deg
+    n = args.points**2
+    plain = PyConfig.from_file(CFG_PATH)
+    with_gcm = PyConfig.from_file(CFG_PATH)
+    with_gcm.gcm = make_gcm(tuple(args.shape))
+    for name, base in (('no GCM', plain), (f'{len(with_gcm.content)/1024**2:.1f} MiB GCM', with_gcm)):
+        times = {}
+        for label, func in (('before', copy_and_encode), ('sweep', sweep), ('updates', updates)):
+            start = time.perf_counter()
+            func(base, distances, seasons)
+            times[label] = time.perf_counter() - start
+        print(
+            f'{name:>14}: before {n/times["before"]:9,.0f} configs/s, '
+            f'sweep {n/times["sweep"]:9,.0f} configs/s ({times["before"]/times["sweep"]:.0f}x), '
+            f'updates {n/times["updates"]:9,.0f} configs/s'
+        )
+
+
+if __name__ == '__main__':
+    main()
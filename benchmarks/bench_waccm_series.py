@@ -0,0 +1,100 @@
+"""
+Time to convert many timesteps of a WACCM file to GCMs.
+
+Run with ``python benchmarks/bench_waccm_series.py``. A WACCM-like netCDF
+file with random data is written, compressed, to a temporary directory. Like
+the WACCM test data it has no surface temperature, so it is taken from the
+temperature. Converting each timestep with ``to_pygcm``, which reads every
+variable from the file again for each getter that needs it, is timed for
+comparison.
+"""
+import argparse
+import os
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import netCDF4 as nc
+
+from pypsg.globes.structure import VariableAssumptionWarning
+from pypsg.globes.waccm import waccm
+
+VARIABLES = [
+    # name, units, low, high
+    ('T', 'K', 150, 300),
+    ('U', 'm/s', -10, 10),
+    ('V', 'm/s', -10, 10),
+    ('CO2', 'mol/mol', 1e-5, 1e-3),
+    ('H2O', 'mol/mol', 1e-6, 1e-2),
+    ('O3', 'mol/mol', 1e-8, 1e-5),
+    ('CLDLIQ', 'kg/kg', 0, 1e-6),
+    ('REL', 'micron', 1, 10),
+]
+
+
+def make_waccm(path, n_time, n_layer, n_lat, n_lon, zlib=True):
+    rng = np.random.default_rng(0)
+    with nc.Dataset(path, 'w', format='NETCDF4') as data:
+        for name, size in (('time', None), ('nbnd', 2), ('lev', n_layer), ('lat', n_lat), ('lon', n_lon)):
+            data.createDimension(name, size)
+        data.createVariable('time', 'f8', ('time',))[:] = np.arange(n_time) + 1.
+        data.createVariable('time_bnds', 'f8', ('time', 'nbnd'))[:] = np.stack(
+            [np.arange(n_time), np.arange(n_time) + 1.], axis=1)
+        data.createVariable('lat', 'f8', ('lat',))[:] = np.linspace(-90, 90, n_lat)
+        data.createVariable('lon', 'f8', ('lon',))[:] = np.linspace(0, 360, n_lon, endpoint=False)
+        data.createVariable('hyam', 'f8', ('lev',))[:] = np.linspace(1e-3, 0, n_layer)
+        data.createVariable('hybm', 'f8', ('lev',))[:] = np.linspace(0, 1, n_layer)
+        p0 = data.createVariable('P0', 'f8')
+        p0.units = 'Pa'
+        p0.assignValue(1e5)
+        ps = data.createVariable('PS', 'f4', ('time', 'lat', 'lon'), zlib=zlib)
+        ps.units = 'Pa'
+        ps[:] = rng.uniform(9e4, 1.1e5, size=(n_time, n_lat, n_lon))
+        data.createVariable('ASDIR', 'f4', ('time', 'lat', 'lon'), zlib=zlib)[:] = rng.random((n_time, n_lat, n_lon))
+        for name, units, low, high in VARIABLES:
+            variable = data.createVariable(
+                name, 'f4', ('time', 'lev', 'lat', 'lon'), zlib=zlib, chunksizes=(1, n_layer, n_lat, n_lon))
+            variable.units = units
+            for itime in range(n_time):
+                variable[itime] = rng.uniform(low, high, size=(n_layer, n_lat, n_lon))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--shape', type=int, nargs=3, default=[70, 144, 96],
+                        help='layers, longitudes and latitudes of the GCM')
+    parser.add_argument('--n-time', type=int, default=16, help='timesteps in the file')
+    parser.add_argument('--block-size', type=int, default=waccm.BLOCK_SIZE, help='timesteps read at once')
+    parser.add_argument('--no-zlib', action='store_true', help='do not compress the file')
+    args = parser.parse_args()
+
+    n_layer, n_lon, n_lat = args.shape
+    kwargs = dict(molecules=['CO2', 'H2O', 'O3'], aerosols=['Water'], background='N2')
+    warnings.simplefilter('ignore', VariableAssumptionWarning)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'waccm.nc')
+        make_waccm(path, args.n_time, n_layer, n_lat, n_lon, zlib=not args.no_zlib)
+        print(f'{args.n_time} timesteps, {os.path.getsize(path)/1024**2:.0f} MiB file')
+        with nc.Dataset(path, 'r', format='NETCDF4') as data:
+            itimes = range(args.n_time)
+            assert waccm.to_pygcm(data, 1, **kwargs).content == list(
+                waccm.to_pygcm_series(data, [0, 1], **kwargs))[1].content
+
+            start = time.perf_counter()
+            for itime in itimes:
+                _ = waccm.to_pygcm(data, itime, **kwargs)
+            t_before = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for _ in waccm.to_pygcm_series(data, itimes, block_size=args.block_size, **kwargs):
+                pass
+            t_after = time.perf_counter() - start
+    print(
+        f'per timestep: before {t_before/args.n_time*1e3:7.1f} ms, '
+        f'after {t_after/args.n_time*1e3:7.1f} ms ({t_before/t_after:.1f}x)'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+A local stand-in for the PSG API used by the benchmarks.
+"""
+from pathlib import Path
+import contextlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import socket
+import threading
+import time
+
+RAD_PATH = Path(__file__).parent.parent / 'test' / 'data' / 'simple.rad'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        with self.server.busy:
+            if self.server.delay > 0:
+                time.sleep(self.server.delay)
+        body = self.server.reply
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer:
+    """
+    Serve a fixed reply to every ``POST`` from a background thread.
+
+    Parameters
+    ----------
+    reply : bytes, optional
+        The reply body. Defaults to ``test/data/simple.rad``.
+    delay : float, optional
+        Seconds to wait before replying, to mimic PSG compute time.
+    serial : bool, optional
+        If True, like PSG, only one call is worked on at a time.
+    """
+
+    def __init__(self, reply: bytes = None, delay: float = 0.0, serial: bool = False):
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.reply = RAD_PATH.read_bytes() if reply is None else reply
+        self._server.delay = delay
+        self._server.busy = threading.Lock() if serial else contextlib.nullcontext()
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self._server.server_address[1]}/api.php'
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._server.shutdown()
+        self._server.server_close()
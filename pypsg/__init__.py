@@ -1,15 +1,44 @@
 """
 PyPSG top-level module
 ======================
+
+Submodules and the classes re-exported here are imported the first time
+they are used, so ``import pypsg`` on its own is cheap.
 """
+import importlib
+
 __version__ = '0.3.2'
-from .request import APICall, PSGResponse
-from . import cfg
-from .cfg import PyConfig
-from .rad import PyRad
-from .lyr import PyLyr
-from .trn import PyTrn
-from . import settings
-from . import units
-from . import docker
-from . import globes
+
+_LAZY_ATTRS = {
+    'APICall': ('pypsg.request', 'APICall'),
+    'PSGResponse': ('pypsg.request', 'PSGResponse'),
+    'PyConfig': ('pypsg.cfg', 'PyConfig'),
+    'PyRad': ('pypsg.rad', 'PyRad'),
+    'PyLyr': ('pypsg.lyr', 'PyLyr'),
+    'PyTrn': ('pypsg.trn', 'PyTrn'),
+}
+_LAZY_SUBMODULES = (
+    'cfg',
+    'settings',
+    'units',
+    'docker',
+    'globes',
+)
+
+__all__ = ['__version__', *_LAZY_ATTRS, *_LAZY_SUBMODULES]
+
+
+def __getattr__(name: str):
+    if name in _LAZY_ATTRS:
+        module, attr = _LAZY_ATTRS[name]
+        value = getattr(importlib.import_module(module), attr)
+    elif name in _LAZY_SUBMODULES:
+        value = importlib.import_module(f'{__name__}.{name}')
+    else:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
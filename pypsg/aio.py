@@ -0,0 +1,283 @@
+"""
+PyPSG asyncio client
+--------------------
+
+Call the PSG API from ``asyncio`` code.
+
+The blocking parts of a call -- the HTTP request and parsing the reply --
+run in a worker thread so that the event loop stays free to schedule other
+requests. Parsing a large ``.rad`` file therefore never stalls other calls
+that are in flight.
+"""
+from typing import Iterable, AsyncIterator, Tuple, List, Union
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+import logging
+
+from pypsg.cfg import PyConfig, BinConfig
+from pypsg.request import APICall, PSGResponse
+from pypsg.session import SessionPool
+from pypsg.cache import ResponseCache
+from pypsg.backends import BackendPool
+from pypsg.retry import RetryPolicy
+
+
+class AsyncAPICall(APICall):
+    """
+    An awaitable call to the PSG API.
+
+    Parameters
+    ----------
+    cfg : Config
+        The PSG configuration.
+    output_type : str or None
+        The type of output to ask for.
+    app : str or None
+        The app to use.
+    url : str
+        The URL to send the request to.
+    logger : logging.Logger, optional
+        A logger to write the request and reply to.
+    session : SessionPool, optional
+        The pool of keep-alive connections to send the request over.
+    cache : ResponseCache, optional
+        A cache of previous replies.
+    backends : BackendPool, optional
+        A pool of PSG servers to send the request to, in place of ``url``.
+    retry : RetryPolicy, optional
+        When to try the request again if it fails.
+    stream : bool, optional
+        Parse a multi-file reply as it is received.
+    executor : concurrent.futures.Executor, optional
+        The executor to run blocking work in. If None, the event loop's
+        default executor is used.
+    stream_upload : bool, optional
+        Send the config as a multipart form read from it a piece at a time,
+        rather than URL-encoded. By default False.
+
+    Examples
+    --------
+    >>> response = await AsyncAPICall(cfg, 'rad')()
+    """
+
+    def __init__(
+        self,
+        cfg: Union[BinConfig, PyConfig],
+        output_type: str = None,
+        app: str = None,
+        url: str = None,
+        logger: logging.Logger = None,
+        session: SessionPool = None,
+        cache: ResponseCache = None,
+        backends: BackendPool = None,
+        retry: RetryPolicy = None,
+        stream: bool = False,
+        executor: Executor = None,
+        stream_upload: bool = False
+    ):
+        super().__init__(
+            cfg=cfg,
+            output_type=output_type,
+            app=app,
+            url=url,
+            logger=logger,
+            session=session,
+            cache=cache,
+            backends=backends,
+            retry=retry,
+            stream=stream,
+            stream_upload=stream_upload
+        )
+        self.executor = executor
+
+    async def __call__(self) -> PSGResponse:
+        """
+        Call the PSG API
+
+        Returns
+        -------
+        PSGResponse
+            The reply from PSG.
+        """
+        loop = asyncio.get_running_loop()
+        if self._streams:
+            return await loop.run_in_executor(self.executor, self._call_streaming)
+        content, key = await loop.run_in_executor(self.executor, self._fetch)
+        response = await loop.run_in_executor(self.executor, self._parse_content, content)
+        if key is not None:
+            await loop.run_in_executor(self.executor, self.cache.put, key, content)
+        return response
+
+
+async def iter_many(
+    configs: Iterable[Union[BinConfig, PyConfig]],
+    concurrency: int = 4,
+    output_type: str = None,
+    app: str = None,
+    url: str = None,
+    session: SessionPool = None,
+    cache: ResponseCache = None,
+    return_exceptions: bool = False,
+    backends: BackendPool = None,
+    retry: RetryPolicy = None,
+    stream_upload: bool = False
+) -> AsyncIterator[Tuple[int, Union[PSGResponse, Exception]]]:
+    """
+    Call PSG for many configurations, yielding replies as they complete.
+
+    At most ``concurrency`` calls are in flight at once, and a new config is
+    only taken from ``configs`` when there is room for it. A slow consumer
+    therefore pauses the producer rather than letting work pile up.
+
+    Parameters
+    ----------
+    configs : iterable of PyConfig or BinConfig
+        The configurations to send. This may be a lazy iterator, such as a
+        ``Sweep``. It is advanced in a worker thread, so building a config
+        does not block the event loop.
+    concurrency : int, optional
+        The maximum number of calls in flight. By default 4.
+    output_type : str or None
+        The type of output to ask for.
+    app : str or None
+        The app to use.
+    url : str
+        The URL to send the requests to.
+    session : SessionPool, optional
+        The pool of keep-alive connections to use.
+    cache : ResponseCache, optional
+        A cache of previous replies to serve identical calls from.
+    return_exceptions : bool, optional
+        If True, errors are yielded in place of a response. Otherwise the
+        first error cancels every pending call and is raised. By default False.
+    backends : BackendPool, optional
+        A pool of PSG servers to spread the calls over, in place of ``url``.
+    retry : RetryPolicy, optional
+        When to try a failed call again. By default calls are not retried.
+    stream_upload : bool, optional
+        Send each config as a multipart form read from it a piece at a time,
+        rather than URL-encoded. By default False.
+
+    Yields
+    ------
+    int
+        The position of the config in ``configs``.
+    PSGResponse or Exception
+        The reply from PSG.
+    """
+    if concurrency < 1:
+        raise ValueError('concurrency must be at least 1.')
+    pending = set()
+    configs = enumerate(configs)
+    exhausted = False
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    loop = asyncio.get_running_loop()
+
+    async def run(index: int, cfg: Union[BinConfig, PyConfig]):
+        caller = AsyncAPICall(
+            cfg,
+            output_type=output_type,
+            app=app,
+            url=url,
+            session=session,
+            cache=cache,
+            backends=backends,
+            retry=retry,
+            executor=executor,
+            stream_upload=stream_upload
+        )
+        try:
+            return index, await caller()
+        except Exception as err:  # pylint: disable=broad-except
+            if not return_exceptions:
+                raise
+            return index, err
+    try:
+        while True:
+            while not exhausted and len(pending) < concurrency:
+                # StopIteration cannot be raised through a future
+                item = await loop.run_in_executor(executor, next, configs, None)
+                if item is None:
+                    exhausted = True
+                    break
+                index, cfg = item
+                pending.add(asyncio.ensure_future(run(index, cfg)))
+            if len(pending) == 0:
+                break
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        # Calls already running in a thread cannot be interrupted, so do not
+        # block the event loop waiting for them.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def run_many(
+    configs: Iterable[Union[BinConfig, PyConfig]],
+    concurrency: int = 4,
+    output_type: str = None,
+    app: str = None,
+    url: str = None,
+    session: SessionPool = None,
+    cache: ResponseCache = None,
+    return_exceptions: bool = False,
+    backends: BackendPool = None,
+    retry: RetryPolicy = None,
+    stream_upload: bool = False
+) -> List[Union[PSGResponse, Exception]]:
+    """
+    Call PSG for many configurations with bounded concurrency.
+
+    Parameters
+    ----------
+    configs : iterable of PyConfig or BinConfig
+        The configurations to send.
+    concurrency : int, optional
+        The maximum number of calls in flight. By default 4.
+    output_type : str or None
+        The type of output to ask for.
+    app : str or None
+        The app to use.
+    url : str
+        The URL to send the requests to.
+    session : SessionPool, optional
+        The pool of keep-alive connections to use.
+    cache : ResponseCache, optional
+        A cache of previous replies to serve identical calls from.
+    return_exceptions : bool, optional
+        If True, errors are returned in place of a response. Otherwise the
+        first error cancels every pending call and is raised. By default False.
+    backends : BackendPool, optional
+        A pool of PSG servers to spread the calls over, in place of ``url``.
+    retry : RetryPolicy, optional
+        When to try a failed call again. By default calls are not retried.
+    stream_upload : bool, optional
+        Send each config as a multipart form read from it a piece at a time,
+        rather than URL-encoded. By default False.
+
+    Returns
+    -------
+    list of PSGResponse
+        The replies, in the same order as ``configs``.
+    """
+    results = {}
+    async for index, response in iter_many(
+        configs,
+        concurrency=concurrency,
+        output_type=output_type,
+        app=app,
+        url=url,
+        session=session,
+        cache=cache,
+        return_exceptions=return_exceptions,
+        backends=backends,
+        retry=retry,
+        stream_upload=stream_upload
+    ):
+        results[index] = response
+    return [results[i] for i in range(len(results))]
@@ -0,0 +1,464 @@
+"""
+PyPSG Backend Pools
+-------------------
+
+Spread calls over several PSG servers.
+
+A single PSG instance handles one call at a time, so throughput is capped by
+the number of instances. A :class:`BackendPool` holds the URLs of several
+instances, for example a set of local docker containers, and hands each call
+to the one with the fewest calls in flight.
+
+A backend that fails to answer is taken out of rotation. It is checked
+again once ``recheck_interval`` seconds have passed, and put back as soon as
+it passes a health check.
+"""
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple, Union
+from contextlib import contextmanager
+import threading
+import time
+
+import requests
+
+from pypsg import docker
+from pypsg import exceptions
+from pypsg.session import SessionPool, get_default_pool
+
+DEFAULT_RECHECK_INTERVAL = 30.0
+"""
+The default number of seconds to wait before checking a failed backend again.
+
+:type: float
+"""
+DEFAULT_CHECK_TIMEOUT = 5.0
+"""
+The default timeout of a health check in seconds.
+
+:type: float
+"""
+
+
+def container_url(port: int) -> str:
+    """
+    Get the URL of a local PSG container.
+
+    Parameters
+    ----------
+    port : int
+        The port the container is published on.
+
+    Returns
+    -------
+    str
+        The URL of the container's API.
+    """
+    return f'http://localhost:{port}/api.php'
+
+
+class Backend:
+    """
+    A single PSG server.
+
+    Parameters
+    ----------
+    url : str
+        The URL of the server's API.
+    container : str, optional
+        The name of the docker container running the server, if any.
+
+    Attributes
+    ----------
+    url : str
+        The URL of the server's API.
+    container : str or None
+        The name of the docker container running the server.
+    outstanding : int
+        The number of calls in flight.
+    healthy : bool
+        False if the backend has been taken out of rotation.
+    failures : int
+        The number of consecutive failed calls or health checks.
+    n_calls : int
+        The total number of calls sent to the backend.
+    """
+
+    def __init__(self, url: str, container: str = None):
+        if '/api.php' not in url:
+            url = f'{url}/api.php'
+        self.url = url
+        self.container = container
+        self.outstanding = 0
+        self.healthy = True
+        self.failures = 0
+        self.n_calls = 0
+        self._recheck_at = 0.0
+
+    def __repr__(self):
+        status = 'healthy' if self.healthy else 'unhealthy'
+        return f'{self.__class__.__name__}({self.url!r}, {status}, outstanding={self.outstanding})'
+
+
+def http_check(backend: Backend, session: SessionPool, timeout: float) -> bool:
+    """
+    The default health check.
+
+    A backend is healthy if a ``GET`` request to its URL does not fail with
+    a connection error or a server error.
+
+    Parameters
+    ----------
+    backend : Backend
+        The backend to check.
+    session : SessionPool
+        The pool of connections to use.
+    timeout : float
+        The timeout of the request in seconds.
+
+    Returns
+    -------
+    bool
+        True if the backend is healthy.
+    """
+    try:
+        reply = session.get(backend.url, timeout=timeout)
+    except requests.RequestException:
+        return False
+    return reply.status_code < 500
+
+
+def is_backend_failure(err: BaseException) -> bool:
+    """
+    Decide if an error means a backend could not answer.
+
+    Parameters
+    ----------
+    err : Exception
+        The error raised by a call.
+
+    Returns
+    -------
+    bool
+        True for a connection error, a timeout, or a ``PSGConnectionError``
+        caused by a 5xx reply.
+    """
+    if isinstance(err, (requests.ConnectionError, requests.Timeout)):
+        return True
+    cause = err.__cause__
+    if isinstance(err, exceptions.PSGConnectionError) and isinstance(cause, requests.HTTPError):
+        return cause.response is not None and cause.response.status_code >= 500
+    return False
+
+
+class BackendPool:
+    """
+    A load-balanced set of PSG servers.
+
+    Parameters
+    ----------
+    backends : iterable of str or Backend
+        The servers to use. Strings are treated as URLs.
+    max_failures : int, optional
+        The number of consecutive failures after which a backend is taken
+        out of rotation. By default 1.
+    recheck_interval : float, optional
+        The number of seconds to wait before checking a failed backend again.
+    check : callable, optional
+        The health check, called as ``check(backend, session, timeout)``.
+        By default ``http_check``.
+    check_timeout : float, optional
+        The timeout of a health check in seconds.
+    session : SessionPool, optional
+        The pool of connections used for health checks. If None, the default
+        pool from ``pypsg.session`` is used.
+
+    Notes
+    -----
+    Replies from every backend are assumed to be interchangeable, so all of
+    them should run the same version of PSG.
+
+    Examples
+    --------
+    >>> pool = BackendPool.from_containers({'psg0': 3000, 'psg1': 3001})
+    >>> for result in run_batch(grid, 'rad', workers=4, backends=pool):
+    ...     ...
+    """
+
+    def __init__(
+        self,
+        backends: Iterable[Union[str, Backend]],
+        max_failures: int = 1,
+        recheck_interval: float = DEFAULT_RECHECK_INTERVAL,
+        check: Callable[[Backend, SessionPool, float], bool] = http_check,
+        check_timeout: float = DEFAULT_CHECK_TIMEOUT,
+        session: SessionPool = None
+    ):
+        if max_failures < 1:
+            raise ValueError('max_failures must be at least 1.')
+        if recheck_interval < 0:
+            raise ValueError('recheck_interval cannot be negative.')
+        self.max_failures = max_failures
+        self.recheck_interval = recheck_interval
+        self.check = check
+        self.check_timeout = check_timeout
+        self.session = session
+        self._lock = threading.Lock()
+        self._backends: Dict[str, Backend] = {}
+        for backend in backends:
+            self.add(backend)
+
+    @classmethod
+    def from_urls(cls, urls: Iterable[str], **kwargs):
+        """
+        Create a pool from a list of URLs.
+
+        Parameters
+        ----------
+        urls : iterable of str
+            The URLs of the servers.
+        **kwargs
+            Passed to ``BackendPool``.
+
+        Returns
+        -------
+        BackendPool
+            The new pool.
+        """
+        return cls([Backend(url) for url in urls], **kwargs)
+
+    @classmethod
+    def from_containers(
+        cls,
+        containers: Union[Dict[str, int], Iterable[Tuple[str, int]]],
+        start: bool = False,
+        **kwargs
+    ):
+        """
+        Create a pool of local PSG containers.
+
+        Parameters
+        ----------
+        containers : dict or iterable of tuple
+            The name and published port of each container.
+        start : bool, optional
+            If True, start any container that is stopped. By default False.
+        **kwargs
+            Passed to ``BackendPool``.
+
+        Returns
+        -------
+        BackendPool
+            The new pool.
+        """
+        if isinstance(containers, dict):
+            containers = containers.items()
+        backends = []
+        for name, port in containers:
+            if start:
+                docker.start_psg(strict=True, name=name)
+            backends.append(Backend(container_url(port), container=name))
+        return cls(backends, **kwargs)
+
+    def add(self, backend: Union[str, Backend]):
+        """
+        Add a server to the pool.
+
+        Parameters
+        ----------
+        backend : str or Backend
+            The server, or its URL.
+        """
+        if isinstance(backend, str):
+            backend = Backend(backend)
+        if not isinstance(backend, Backend):
+            raise TypeError('backend must be a str or Backend object')
+        with self._lock:
+            if backend.url in self._backends:
+                raise ValueError(f'{backend.url} is already in the pool.')
+            self._backends[backend.url] = backend
+
+    def remove(self, url: str) -> Backend:
+        """
+        Remove a server from the pool.
+
+        Calls already sent to it are allowed to finish.
+
+        Parameters
+        ----------
+        url : str
+            The URL of the server.
+
+        Returns
+        -------
+        Backend
+            The removed backend.
+        """
+        if '/api.php' not in url:
+            url = f'{url}/api.php'
+        with self._lock:
+            return self._backends.pop(url)
+
+    @property
+    def backends(self) -> List[Backend]:
+        """
+        Every backend in the pool.
+
+        :type: list of Backend
+        """
+        with self._lock:
+            return list(self._backends.values())
+
+    @property
+    def healthy(self) -> List[Backend]:
+        """
+        The backends that are in rotation.
+
+        :type: list of Backend
+        """
+        with self._lock:
+            return [b for b in self._backends.values() if b.healthy]
+
+    def __len__(self) -> int:
+        return len(self._backends)
+
+    def _check(self, backend: Backend) -> bool:
+        """
+        Run the health check and update the backend.
+        """
+        session = get_default_pool() if self.session is None else self.session
+        ok = self.check(backend, session, self.check_timeout)
+        with self._lock:
+            if ok:
+                backend.healthy = True
+                backend.failures = 0
+            else:
+                backend.healthy = False
+                backend.failures += 1
+                backend._recheck_at = time.monotonic() + self.recheck_interval
+        return ok
+
+    def check_all(self) -> Dict[str, bool]:
+        """
+        Run the health check on every backend.
+
+        Returns
+        -------
+        dict
+            Whether each backend is healthy, keyed by URL.
+        """
+        return {backend.url: self._check(backend) for backend in self.backends}
+
+    def _recheck(self, force: bool = False):
+        """
+        Check the failed backends that are due to be checked again.
+        """
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            for backend in self._backends.values():
+                if not backend.healthy and (force or backend._recheck_at <= now):
+                    # claim it, so other threads do not check it as well
+                    backend._recheck_at = now + self.recheck_interval
+                    due.append(backend)
+        for backend in due:
+            self._check(backend)
+
+    def _select(self) -> Union[Backend, None]:
+        """
+        Reserve the healthy backend with the fewest calls in flight.
+        """
+        with self._lock:
+            healthy = [b for b in self._backends.values() if b.healthy]
+            if len(healthy) == 0:
+                return None
+            backend = min(healthy, key=lambda b: (b.outstanding, b.n_calls))
+            backend.outstanding += 1
+            backend.n_calls += 1
+            return backend
+
+    def acquire(self) -> Backend:
+        """
+        Reserve a backend for a call.
+
+        Every backend returned must be handed back to ``release``.
+
+        Returns
+        -------
+        Backend
+            The healthy backend with the fewest calls in flight.
+
+        Raises
+        ------
+        pypsg.exceptions.PSGBackendUnavailableError
+            If no backend passes its health check.
+        """
+        self._recheck()
+        backend = self._select()
+        if backend is None:
+            self._recheck(force=True)
+            backend = self._select()
+        if backend is None:
+            raise exceptions.PSGBackendUnavailableError(
+                f'None of the {len(self)} PSG backends are available.')
+        return backend
+
+    def release(self, backend: Backend, ok: bool = True):
+        """
+        Hand back a backend after a call.
+
+        Parameters
+        ----------
+        backend : Backend
+            The backend returned by ``acquire``.
+        ok : bool, optional
+            False if the call failed because the backend could not answer.
+        """
+        with self._lock:
+            backend.outstanding -= 1
+            if ok:
+                backend.failures = 0
+                return None
+            backend.failures += 1
+            if backend.failures >= self.max_failures:
+                backend.healthy = False
+                backend._recheck_at = time.monotonic() + self.recheck_interval
+
+    @contextmanager
+    def lease(self) -> Iterator[str]:
+        """
+        Reserve a backend for the duration of a ``with`` block.
+
+        The backend is marked as failed if the block raises a connection
+        error, a timeout, or a ``PSGConnectionError`` caused by a 5xx reply.
+        A 4xx reply means the backend answered, so it stays healthy.
+
+        Yields
+        ------
+        str
+            The URL of the backend.
+        """
+        backend = self.acquire()
+        ok = True
+        try:
+            yield backend.url
+        except Exception as err:
+            ok = not is_backend_failure(err)
+            raise
+        finally:
+            self.release(backend, ok)
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, Union[int, bool]]]:
+        """
+        The state of each backend, keyed by URL.
+
+        :type: dict
+        """
+        with self._lock:
+            return {
+                url: {
+                    'healthy': b.healthy,
+                    'outstanding': b.outstanding,
+                    'failures': b.failures,
+                    'n_calls': b.n_calls
+                } for url, b in self._backends.items()
+            }
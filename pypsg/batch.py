@@ -0,0 +1,221 @@
+"""
+PyPSG Batches
+-------------
+
+Run large grids of configurations through the PSG API.
+
+Results are yielded as soon as they are available, and configurations are
+only read from the input when there is room for them. Neither the grid nor
+the replies are ever held in memory all at once.
+"""
+from typing import Iterable, Iterator, Union
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+import logging
+
+from pypsg.cfg import PyConfig, BinConfig
+from pypsg.request import APICall, PSGResponse
+from pypsg.session import SessionPool
+from pypsg.cache import ResponseCache
+from pypsg.backends import BackendPool
+from pypsg.retry import RetryPolicy
+
+
+class BatchResult:
+    """
+    The outcome of a single call in a batch.
+
+    Parameters
+    ----------
+    index : int
+        The position of the config in the input.
+    cfg : PyConfig or BinConfig
+        The config that was sent.
+    response : PSGResponse, optional
+        The reply from PSG, if the call succeeded.
+    error : Exception, optional
+        The error raised by the call, if it failed.
+
+    Attributes
+    ----------
+    index : int
+        The position of the config in the input.
+    cfg : PyConfig or BinConfig
+        The config that was sent.
+    response : PSGResponse or None
+        The reply from PSG, if the call succeeded.
+    error : Exception or None
+        The error raised by the call, if it failed.
+    """
+
+    def __init__(
+        self,
+        index: int,
+        cfg: Union[BinConfig, PyConfig],
+        response: PSGResponse = None,
+        error: Exception = None
+    ):
+        self.index = index
+        self.cfg = cfg
+        self.response = response
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        """
+        True if the call succeeded.
+
+        :type: bool
+        """
+        return self.error is None
+
+    def __repr__(self):
+        status = 'ok' if self.ok else repr(self.error)
+        return f'{self.__class__.__name__}(index={self.index}, {status})'
+
+
+def _run_one(
+    index: int,
+    cfg: Union[BinConfig, PyConfig],
+    output_type: str,
+    app: str,
+    url: str,
+    logger: logging.Logger,
+    session: SessionPool,
+    cache: ResponseCache,
+    backends: BackendPool,
+    retry: RetryPolicy,
+    stream_upload: bool
+) -> BatchResult:
+    """
+    Make a single call, capturing any error.
+    """
+    try:
+        response = APICall(
+            cfg,
+            output_type=output_type,
+            app=app,
+            url=url,
+            logger=logger,
+            session=session,
+            cache=cache,
+            backends=backends,
+            retry=retry,
+            stream_upload=stream_upload
+        )()
+        return BatchResult(index, cfg, response=response)
+    except Exception as err:  # pylint: disable=broad-except
+        return BatchResult(index, cfg, error=err)
+
+
+def run_batch(
+    configs: Iterable[Union[BinConfig, PyConfig]],
+    output_type: str = None,
+    workers: int = 4,
+    ordered: bool = True,
+    app: str = None,
+    url: str = None,
+    logger: logging.Logger = None,
+    session: SessionPool = None,
+    cache: ResponseCache = None,
+    max_pending: int = None,
+    backends: BackendPool = None,
+    retry: RetryPolicy = None,
+    stream_upload: bool = False
+) -> Iterator[BatchResult]:
+    """
+    Call PSG for every configuration in ``configs``.
+
+    Parameters
+    ----------
+    configs : iterable of PyConfig or BinConfig
+        The configurations to send. This may be a lazy iterator.
+    output_type : str or None
+        The type of output to ask for.
+    workers : int, optional
+        The number of calls to make at once. By default 4.
+    ordered : bool, optional
+        If True, results are yielded in the same order as ``configs``.
+        Otherwise they are yielded as they complete. By default True.
+    app : str or None
+        The app to use.
+    url : str
+        The URL to send the requests to.
+    logger : logging.Logger, optional
+        A logger to write each request and reply to.
+    session : SessionPool, optional
+        The pool of keep-alive connections to use.
+    cache : ResponseCache, optional
+        A cache of previous replies to serve identical calls from.
+    max_pending : int, optional
+        The maximum number of configs that are in flight or waiting to be
+        yielded at once. By default ``2*workers``.
+    backends : BackendPool, optional
+        A pool of PSG servers to spread the calls over, in place of ``url``.
+        ``workers`` should be at least the number of backends.
+    retry : RetryPolicy, optional
+        When to try a failed call again. By default calls are not retried.
+    stream_upload : bool, optional
+        Send each config as a multipart form read from it a piece at a time,
+        rather than URL-encoded. By default False.
+
+    Yields
+    ------
+    BatchResult
+        The outcome of each call. Errors, including those raised by
+        ``pypsg.request.parse_exceptions``, are stored in ``BatchResult.error``
+        rather than raised.
+
+    Examples
+    --------
+    >>> for result in run_batch(grid, 'rad', workers=8):
+    ...     if result.ok:
+    ...         save(result.index, result.response.rad)
+    """
+    if workers < 1:
+        raise ValueError('workers must be at least 1.')
+    max_pending = 2*workers if max_pending is None else max_pending
+    if max_pending < workers:
+        raise ValueError('max_pending must be at least as large as workers.')
+    configs = enumerate(configs)
+    exhausted = False
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        def submit() -> Union[Future, None]:
+            nonlocal exhausted
+            try:
+                index, cfg = next(configs)
+            except StopIteration:
+                exhausted = True
+                return None
+            return executor.submit(
+                _run_one, index, cfg, output_type, app, url, logger, session, cache, backends, retry,
+                stream_upload)
+
+        queue: deque[Future] = deque()
+        pending = set()
+        try:
+            if ordered:
+                while True:
+                    while not exhausted and len(queue) < max_pending:
+                        future = submit()
+                        if future is not None:
+                            queue.append(future)
+                    if len(queue) == 0:
+                        break
+                    yield queue.popleft().result()
+            else:
+                while True:
+                    while not exhausted and len(pending) < max_pending:
+                        future = submit()
+                        if future is not None:
+                            pending.add(future)
+                    if len(pending) == 0:
+                        break
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+        finally:
+            # Do not start calls whose results nobody will read.
+            for future in (*queue, *pending):
+                future.cancel()
@@ -0,0 +1,259 @@
+"""
+PyPSG Response Cache
+--------------------
+
+A content-addressed, on-disk cache of replies from PSG.
+
+Replies are keyed on a hash of everything that determines them: the config
+content, the output type, the app, and the URL. A cache hit skips the network
+entirely. The cache is bounded in size and evicts the least recently used
+replies first.
+"""
+from typing import Dict, Iterable, Union
+from pathlib import Path
+from collections import OrderedDict
+import hashlib
+import os
+import threading
+import uuid
+
+from pypsg import settings
+
+DEFAULT_CACHE_PATH = settings.USER_DATA_PATH / 'cache'
+"""
+The default location of the response cache.
+
+:type: pathlib.Path
+"""
+DEFAULT_MAX_BYTES = 1024**3
+"""
+The default size limit of the response cache, 1 GiB.
+
+:type: int
+"""
+
+
+class ResponseCache:
+    """
+    A size-bounded LRU cache of raw PSG replies.
+
+    Parameters
+    ----------
+    path : pathlib.Path or str, optional
+        The directory to store replies in. Created on first write.
+    max_bytes : int, optional
+        The maximum total size of the stored replies.
+
+    Attributes
+    ----------
+    path : pathlib.Path
+        The directory replies are stored in.
+    max_bytes : int
+        The maximum total size of the stored replies.
+    hits : int
+        The number of lookups that found a reply.
+    misses : int
+        The number of lookups that did not find a reply.
+    bytes_served : int
+        The total size of the replies served from the cache.
+
+    Examples
+    --------
+    >>> cache = ResponseCache(max_bytes=100*1024**2)
+    >>> response = APICall(cfg, 'rad', cache=cache)()
+    >>> response = APICall(cfg, 'rad', cache=cache)()
+    >>> cache.hits, cache.misses
+    (1, 1)
+    """
+    SUFFIX = '.psg'
+
+    def __init__(
+        self,
+        path: Union[Path, str] = DEFAULT_CACHE_PATH,
+        max_bytes: int = DEFAULT_MAX_BYTES
+    ):
+        if max_bytes < 0:
+            raise ValueError('max_bytes cannot be negative.')
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes_served = 0
+        self._lock = threading.Lock()
+        self._index: Union[OrderedDict, None] = None
+        self._size = 0
+
+    @staticmethod
+    def key(
+        content: Union[bytes, Iterable[bytes]],
+        output_type: str = None,
+        app: str = None,
+        url: str = None
+    ) -> str:
+        """
+        Compute the cache key of a call.
+
+        Parameters
+        ----------
+        content : bytes or iterable of bytes
+            The config content sent to PSG, whole or in pieces such as those
+            of ``PyConfig.iter_chunks``. The pieces are hashed one at a time,
+            and give the same key as the whole content.
+        output_type : str or None
+            The type of output asked for.
+        app : str or None
+            The app used.
+        url : str or None
+            The URL the request is sent to.
+
+        Returns
+        -------
+        str
+            The hex digest identifying the call.
+        """
+        digest = hashlib.sha256()
+        for part in (output_type, app, url):
+            digest.update(b'\x00' if part is None else part.encode('utf-8'))
+            digest.update(b'\x1f')
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            content = (content,)
+        for chunk in content:
+            digest.update(chunk)
+        return digest.hexdigest()
+
+    def _file(self, key: str) -> Path:
+        return self.path / key[:2] / f'{key}{self.SUFFIX}'
+
+    def _load_index(self) -> OrderedDict:
+        """
+        Scan the cache directory, oldest access first.
+        """
+        if self._index is None:
+            entries = []
+            if self.path.exists():
+                for file in self.path.glob(f'*/*{self.SUFFIX}'):
+                    try:
+                        stat = file.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, file.stem, stat.st_size))
+            entries.sort()
+            self._index = OrderedDict((key, size) for _, key, size in entries)
+            self._size = sum(self._index.values())
+        return self._index
+
+    def get(self, key: str) -> Union[bytes, None]:
+        """
+        Look up a reply.
+
+        Parameters
+        ----------
+        key : str
+            The cache key, from ``ResponseCache.key``.
+
+        Returns
+        -------
+        bytes or None
+            The stored reply, or None if there is none.
+        """
+        with self._lock:
+            index = self._load_index()
+            if key not in index:
+                self.misses += 1
+                return None
+            file = self._file(key)
+            try:
+                content = file.read_bytes()
+                os.utime(file)
+            except FileNotFoundError:
+                # removed by another process
+                self._size -= index.pop(key)
+                self.misses += 1
+                return None
+            index.move_to_end(key)
+            self.hits += 1
+            self.bytes_served += len(content)
+            return content
+
+    def put(self, key: str, content: bytes):
+        """
+        Store a reply, evicting old ones if the cache is full.
+
+        Parameters
+        ----------
+        key : str
+            The cache key, from ``ResponseCache.key``.
+        content : bytes
+            The reply to store.
+        """
+        size = len(content)
+        if size > self.max_bytes:
+            return None
+        with self._lock:
+            index = self._load_index()
+            file = self._file(key)
+            file.parent.mkdir(parents=True, exist_ok=True)
+            # write then rename, so readers never see a partial file
+            tmp = file.with_name(f'{file.name}.{uuid.uuid4().hex}.tmp')
+            tmp.write_bytes(content)
+            os.replace(tmp, file)
+            self._size += size - index.pop(key, 0)
+            index[key] = size
+            self._evict()
+
+    def _evict(self):
+        """
+        Remove the least recently used replies until the cache fits.
+        """
+        index = self._index
+        while self._size > self.max_bytes and len(index) > 0:
+            key, size = index.popitem(last=False)
+            self._file(key).unlink(missing_ok=True)
+            self._size -= size
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._load_index()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._load_index())
+
+    @property
+    def size(self) -> int:
+        """
+        The total size of the stored replies in bytes.
+
+        :type: int
+        """
+        with self._lock:
+            self._load_index()
+            return self._size
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        Hit and miss counters, and the current size of the cache.
+
+        :type: dict
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'bytes_served': self.bytes_served,
+            'entries': len(self),
+            'size': self.size
+        }
+
+    def clear(self):
+        """
+        Remove every stored reply and reset the counters.
+        """
+        with self._lock:
+            for key in self._load_index():
+                self._file(key).unlink(missing_ok=True)
+            self._index = OrderedDict()
+            self._size = 0
+            self.hits = 0
+            self.misses = 0
+            self.bytes_served = 0
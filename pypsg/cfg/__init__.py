@@ -29,4 +29,5 @@ from pypsg.cfg.models import (
     PowerEquivalentNoise,
     Detectability,
     CCD
-)
\ No newline at end of file
+)
+from pypsg.cfg.sweep import Sweep
\ No newline at end of file
@@ -19,6 +19,20 @@ from pypsg import units as u_psg
 ENCODING = 'UTF-8'
 
 
+def _read_only(value: Any) -> Any:
+    """
+    A read-only copy of an array, so that it cannot be changed in place
+    behind a cached content. Anything else is returned as it is.
+
+    Config values are small, so copying them is cheap, and the caller's
+    array is left writeable.
+    """
+    if isinstance(value, np.ndarray):
+        value = value.copy()
+        value.flags.writeable = False
+    return value
+
+
 class NullFieldComparisonError(Exception):
     """
     Exception raised when comparing a null field to a non-null field.
@@ -62,8 +76,8 @@ class Table:
     ):
         if not len(x) == len(y):
             raise ValueError('x and y must have the same length')
-        self.x = x
-        self.y = y
+        self.x = _read_only(x)
+        self.y = _read_only(y)
 
     def to_string(self, xunit: u.Unit = None, yunit: u.Unit = None, fmt='.2e'):
         """
@@ -161,6 +175,14 @@ class Field(ABC):
         The default value of the field.
     null : bool
         If false, the field cannot be empty.
+    _version : int
+        The number of times the value has been set.
+
+    Notes
+    -----
+    The content of a model is cached until one of its fields is set.
+    Array values are stored as read-only copies, so assign a new value
+    rather than changing the current one in place.
     """
 
     def __init__(self, name: str, default: Any = None, null: bool = True):
@@ -168,6 +190,7 @@ class Field(ABC):
         self.null = null
         self._name = name
         self._value = None
+        self._version = 0
 
     @property
     def is_null(self) -> bool:
@@ -236,7 +259,8 @@ class Field(ABC):
         """
         if value_to_set is None and not self.null:
             raise ValueError("Field cannot be null.")
-        self._value = value_to_set if value_to_set is not None else self.default
+        self._value = _read_only(value_to_set if value_to_set is not None else self.default)
+        self._version += 1
 
     @property
     def content(self) -> asbytes:
@@ -266,6 +290,26 @@ class Field(ABC):
 
     def __repr__(self):
         return f"{self.__class__.__name__}(name={self._name!r}, value={self._value!r})"
+
+    def clone(self) -> 'Field':
+        """
+        Create an empty field with the same settings.
+
+        The settings are shared with the original, because they are not
+        changed once a field is created. The default is copied, since it
+        becomes the value of the new field.
+
+        Returns
+        -------
+        Field
+            The new field.
+        """
+        new = object.__new__(self.__class__)
+        new.__dict__.update(self.__dict__)
+        new._value = None
+        if new.default is not None:
+            new.default = deepcopy(new.default)
+        return new
     
     @abstractmethod
     def read(self, d: dict):
@@ -1629,7 +1673,7 @@ class Profile:
         self.name = name
         if isinstance(dat, u.Quantity):
             raise TypeError('dat must be a numpy array.')
-        self._dat = dat
+        self._dat = _read_only(dat)
         self.unit = unit
         self._validate()
 
@@ -2007,18 +2051,48 @@ class Model(ABC):
     ----------
     **kwargs
         The keyword arguments to initialize the fields.
+
+    Notes
+    -----
+    The fields of each subclass are found once, when the class is created,
+    and kept in ``_fields`` in alphabetical order of attribute name.
+
+    The content of each field is cached, and is only formatted again once
+    the field has been set.
     """
+    _fields: Tuple[Tuple[str, Field], ...] = ()
+    _content_cache: Tuple[Tuple[int, ...], bytes] = None
 
-    def __init__(self, **kwargs):
-        field_names = dir(self)
-        for field_name in field_names:
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._fields = cls._compile_fields()
+
+    @classmethod
+    def _compile_fields(cls) -> Tuple[Tuple[str, Field], ...]:
+        """
+        Find the fields of the class, including inherited ones.
+
+        Returns
+        -------
+        tuple
+            The attribute name and class-level field of each field.
+        """
+        fields = []
+        for field_name in dir(cls):
             if not field_name == 'content':
-                field = getattr(self, field_name)
+                # ABCMeta sets __abstractmethods__ after this runs
+                field = getattr(cls, field_name, None)
                 if isinstance(field, Field):
-                    field_value = kwargs.get(field_name, field.default)
-                    newfield = deepcopy(field)
-                    newfield.value = field_value
-                    self.__setattr__(field_name, newfield)
+                    fields.append((field_name, field))
+        return tuple(fields)
+
+    def __init__(self, **kwargs):
+        instance_fields = self.__dict__
+        for field_name, field in self._fields:
+            newfield = field.clone()
+            newfield.value = kwargs.get(field_name, field.default)
+            instance_fields[field_name] = newfield
+        instance_fields['_field_content'] = {}
     # pylint: disable-next=unused-argument
     def _type_to_create(self, *args, **kwargs):
         return self.__class__
@@ -2038,12 +2112,8 @@ class Model(ABC):
 
         cls_to_create = initialized._type_to_create(cfg=cfg)
         kwargs = {}
-        field_names = dir(cls_to_create)
-        for field_name in field_names:
-            if not field_name == 'content':
-                field = getattr(cls_to_create, field_name)
-                if isinstance(field, Field):
-                    kwargs[field_name] = field.read(cfg)
+        for field_name, field in cls_to_create._fields:
+            kwargs[field_name] = field.read(cfg)
         return cls_to_create(**kwargs)
 
     def __setattr__(self, __name: str, __value: Any) -> None:
@@ -2053,6 +2123,16 @@ class Model(ABC):
         else:
             super().__setattr__(__name, __value)
 
+    @property
+    def _state(self) -> Tuple[int, ...]:
+        """
+        The version of each field. It changes whenever a field is set.
+
+        :type: tuple of int
+        """
+        instance_fields = self.__dict__
+        return tuple(instance_fields.get(field_name, field)._version for field_name, field in self._fields)
+
     @property
     def content(self) -> bytes:
         """
@@ -2060,15 +2140,24 @@ class Model(ABC):
 
         :type: bytes
         """
+        state = self._state
+        cache = self._content_cache
+        if cache is not None and cache[0] == state:
+            return cache[1]
         lines = []
-        field_names = dir(self)
-        for field_name in field_names:
-            if not field_name == 'content':
-                field = getattr(self, field_name)
-                if isinstance(field, Field):
-                    if not field.is_null:
-                        lines.append(field.content)
-        return b'\n'.join(lines)
+        instance_fields = self.__dict__
+        field_content = instance_fields.setdefault('_field_content', {})
+        for (field_name, field), version in zip(self._fields, state):
+            field = instance_fields.get(field_name, field)
+            if not field.is_null:
+                cached = field_content.get(field_name)
+                if cached is None or cached[0] != version:
+                    cached = (version, field.content)
+                    field_content[field_name] = cached
+                lines.append(cached[1])
+        content = b'\n'.join(lines)
+        instance_fields['_content_cache'] = (state, content)
+        return content
 
     @property
     def fields(self) -> dict:
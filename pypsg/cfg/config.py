@@ -1,14 +1,49 @@
 """
 Methods to parse config files.
 """
-from typing import Union, Dict, Any
+from typing import Union, Dict, Any, Tuple, Iterable, Iterator, BinaryIO
 from pathlib import Path
+import mmap
 
 import warnings
 
 from pypsg.cfg import models
 from pypsg import settings
-from pypsg.globes import PyGCM
+
+
+BINARY_START = b'<BINARY>'
+BINARY_END = b'</BINARY>'
+CHUNK_SIZE = 2**20
+"""
+The largest number of bytes given at a time when a config is streamed.
+
+:type: int
+"""
+
+
+def _chunked(pieces: Iterable[Union[bytes, memoryview, mmap.mmap]], chunk_size: int) -> Iterator[Union[bytes, memoryview]]:
+    """
+    Split each piece that is longer than ``chunk_size`` into views.
+    """
+    for piece in pieces:
+        if len(piece) <= chunk_size:
+            if len(piece) > 0:
+                yield piece
+            continue
+        view = memoryview(piece)
+        for start in range(0, len(view), chunk_size):
+            yield view[start:start+chunk_size]
+
+
+def _write_chunks(chunks: Iterable[Union[bytes, memoryview]], fileobj: BinaryIO) -> int:
+    """
+    Write each chunk to a file, and count the bytes written.
+    """
+    n_bytes = 0
+    for chunk in chunks:
+        fileobj.write(chunk)
+        n_bytes += len(chunk)
+    return n_bytes
 
 
 class ConfigTooLongWarning(UserWarning):
@@ -24,7 +59,7 @@ class BinConfig:
 
     Parameters
     ----------
-    content : bytes
+    content : bytes or mmap.mmap
         The content of the configuration.
 
     Attributes
@@ -38,11 +73,98 @@ class BinConfig:
     """
     encoding = 'UTF-8'
 
-    def __init__(self, content: bytes):
-        self.content = content
+    def __init__(self, content: Union[bytes, mmap.mmap]):
+        self._buffer = content
+        self._map = content if isinstance(content, mmap.mmap) else None
+
+    @property
+    def content(self) -> bytes:
+        """
+        The content of the config.
+
+        A memory-mapped config is only copied into memory the first time
+        this is read.
+
+        :type: bytes
+        """
+        if not isinstance(self._buffer, bytes):
+            self._buffer = bytes(self._buffer)
+        return self._buffer
+
+    @content.setter
+    def content(self, value: Union[bytes, mmap.mmap]):
+        self._buffer = value
+        if isinstance(value, mmap.mmap):
+            self._map = value
+
+    def close(self):
+        """
+        Close the file mapped into memory by ``from_file(memmap=True)``.
+
+        Nothing is done if the config was read into memory. A mapped config
+        cannot be read once it is closed, unless ``content`` has been read.
+
+        Raises
+        ------
+        BufferError
+            If a view of the file, such as ``binary_view`` or a piece from
+            ``iter_chunks``, is still in use.
+        """
+        if self._map is not None:
+            self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            self.close()
+        except BufferError:
+            # a view held by the traceback of an error is still in use,
+            # so that error is raised rather than this one
+            if exc_info[0] is None:
+                raise
+
+    def iter_chunks(self, chunk_size: int = CHUNK_SIZE) -> Iterator[Union[bytes, memoryview]]:
+        """
+        The content in pieces of at most ``chunk_size`` bytes.
+
+        The pieces are views of the content, so a memory-mapped config is
+        not copied into memory.
+
+        Parameters
+        ----------
+        chunk_size : int, optional
+            The largest piece to give at a time.
+
+        Yields
+        ------
+        bytes or memoryview
+            The next piece of the content.
+        """
+        return _chunked([self._buffer], chunk_size)
+
+    def write_to(self, fileobj: BinaryIO, chunk_size: int = CHUNK_SIZE) -> int:
+        """
+        Write the content to a file, a piece at a time.
+
+        Parameters
+        ----------
+        fileobj : file-like
+            Anything with a ``write`` method that takes bytes, such as a file
+            opened in binary mode or ``socket.makefile('wb')``.
+        chunk_size : int, optional
+            The largest piece to write at a time.
+
+        Returns
+        -------
+        int
+            The number of bytes written.
+        """
+        return _write_chunks(self.iter_chunks(chunk_size), fileobj)
 
     @classmethod
-    def from_file(cls, path: Path):
+    def from_file(cls, path: Path, memmap: bool = False):
         """
         Read a config from a file.
 
@@ -50,15 +172,30 @@ class BinConfig:
         ----------
         path : pathlib.Path
             The path to the file.
+        memmap : bool, optional
+            If True, map the file into memory rather than reading it, so that
+            ``dict`` and ``binary`` read only the parts they need. The file
+            must not change while the config is in use. Unmap it with
+            ``close``, or by using the config in a ``with`` block.
+            By default False.
 
         Returns
         -------
         Config
             A config constructed using the provided file.
+
+        Examples
+        --------
+        >>> with BinConfig.from_file('globes.cfg', memmap=True) as cfg:
+        ...     gcm = PyGCM.from_cfg(cfg)
         """
         # warnings.warn('This method has not been tested.',RuntimeWarning)
         with open(path, 'rb') as file:
-            content = file.read()
+            if memmap and file.seek(0, 2) > 0:
+                content = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                file.seek(0)
+                content = file.read()
         return cls(content=content)
 
     @property
@@ -69,7 +206,24 @@ class BinConfig:
         :type: bool
         """
         # warnings.warn('This method has not been tested.',RuntimeWarning)
-        return b'<BINARY>' in self.content
+        return self._buffer.find(BINARY_START) != -1
+
+    def _binary_span(self) -> Union[Tuple[int, int], None]:
+        """
+        The start and end of the data in the binary section, or None if
+        there is no binary section.
+        """
+        content = self._buffer
+        start = content.find(BINARY_START)
+        if start == -1:
+            return None
+        start += len(BINARY_START)
+        # the tag closes the last section, and scanning back to it
+        # avoids reading through the binary data
+        end = content.rfind(BINARY_END, start)
+        if end == -1:
+            raise ValueError('The binary section of this config is not closed.')
+        return start, end
 
     @property
     def binary(self) -> bytes:
@@ -79,41 +233,64 @@ class BinConfig:
         :type: bytes
         """
         # warnings.warn('This method has not been tested.',RuntimeWarning)
-        if not self.has_binary:
+        span = self._binary_span()
+        if span is None:
+            raise ValueError('This config contains no binary section.')
+        start, end = span
+        return self._buffer[start:end]
+
+    @property
+    def binary_view(self) -> memoryview:
+        """
+        The binary section of the config, as a read-only view of the content,
+        or of the file if it has been mapped into memory.
+
+        It can be read with ``np.frombuffer`` without being copied.
+
+        :type: memoryview
+        """
+        span = self._binary_span()
+        if span is None:
             raise ValueError('This config contains no binary section.')
-        return self.content.split(b'<BINARY>')[1].split(b'</BINARY>')[0]
+        start, end = span
+        return memoryview(self._buffer).toreadonly()[start:end]
+
+    def _keywords(self) -> dict:
+        """
+        The keyword, value pairs, without the binary section.
+        """
+        content = self._buffer
+        span = self._binary_span()
+        if span is not None:
+            start, end = span
+            # only the text on either side of the binary section is copied
+            content = content[:start - len(BINARY_START)] + content[end + len(BINARY_END):]
+        lines = str(content, encoding=self.encoding).replace('\r', '').split('\n')
+        if len(lines) > settings.get_setting('cfg_max_lines'):
+            warnings.warn('The config is too long.', ConfigTooLongWarning)
+        cfg = {}
+        for line in lines:
+            if not (len(line) == 0 or line[0] == '#' or line.isspace()):
+                kwd, close, val = line.partition('>')
+                if not close:
+                    raise ValueError(f'Invalid config line: {line}')
+                cfg[kwd.replace('<', '')] = val
+        return cfg
 
     @property
     def dict(self) -> dict:
         """
         A dictionary with all the keyword, value pairs.
 
+        The binary section, if any, is given under ``'BINARY'`` as bytes.
+        Use ``binary_view`` to read it without copying it.
+
         :type: dict
         """
         # warnings.warn('This method has not been tested.',RuntimeWarning)
-        content = self.content
-        binary = None
+        cfg = self._keywords()
         if self.has_binary:
-            content = content.split(b'<BINARY>')[
-                0] + content.split(b'</BINARY>')[1]
-            binary = self.binary
-        content = str(content, encoding=self.encoding)
-        content = content.replace('\r', '')
-        n_lines = len(content.split('\n'))
-        if n_lines > settings.get_setting('cfg_max_lines'):
-            warnings.warn('The config is too long.', ConfigTooLongWarning)
-        cfg = {}
-        for line in content.split('\n'):
-            if not (line.isspace() or len(line) == 0 or line[0] == '#'):
-                try:
-                    end_of_kwd = line.index('>')+1
-                except ValueError as err:
-                    raise ValueError(f'Invalid config line: {line}') from err
-                kwd = line[:end_of_kwd].replace('<', '').replace('>', '')
-                val = line[end_of_kwd:]
-                cfg[kwd] = val
-        if binary is not None:
-            cfg['BINARY'] = binary
+            cfg['BINARY'] = self.binary
         return cfg
 
 
@@ -150,7 +327,7 @@ class PyConfig:
         generator: models.Generator = None,
         telescope: models.Telescope = None,
         noise: models.Noise = None,
-        gcm: PyGCM = None
+        gcm: 'globes.PyGCM' = None
     ):
         self.target: models.Target = target
         if self.target is None:
@@ -189,7 +366,9 @@ class PyConfig:
         if self.noise is None:
             self.noise = models.Noise()
 
-        self.gcm: PyGCM | None = gcm
+        self.gcm: 'globes.PyGCM | None' = gcm
+        self._gcm_cache = None
+        self._content_cache = None
 
     @classmethod
     def from_dict(cls, d: Dict[str, Any]):
@@ -214,7 +393,12 @@ class PyConfig:
             if not key.isupper():
                 raise ValueError(f'Invalid config key: {key}')
         has_gcm = 'ATMOSPHERE-GCM-PARAMETERS' in d and 'BINARY' in d
-        gcm = PyGCM.from_cfg(d) if has_gcm else None
+        if has_gcm:
+            # ``pypsg.globes`` imports ``pypsg.cfg.models``, and is only needed for a GCM
+            from pypsg.globes import PyGCM  # pylint: disable=import-outside-toplevel
+            gcm = PyGCM.from_cfg(d)
+        else:
+            gcm = None
         atmosphere = models.Atmosphere.from_cfg(d)
         if has_gcm and isinstance(atmosphere, models.EquilibriumAtmosphere):
             atmosphere = gcm.update_params(atmosphere)
@@ -240,22 +424,28 @@ class PyConfig:
         config : BinConfig
             A BinConfig object.
         """
-        return cls.from_dict(config.dict)
+        d = config._keywords()
+        if config.has_binary:
+            # the GCM is decoded straight from the content, or the file
+            d['BINARY'] = config.binary_view
+        return cls.from_dict(d)
 
     @classmethod
-    def from_bytes(cls, config: bytes):
+    def from_bytes(cls, config: Union[bytes, memoryview]):
         """
         Construct a PyConfig from bytes.
 
         Parameters
         ----------
-        config : bytes
+        config : bytes or memoryview
             The bytes representation of a config file.
         """
+        if isinstance(config, memoryview):
+            config = bytes(config)
         return cls.from_binaryconfig(BinConfig(config))
 
     @classmethod
-    def from_file(cls, path: Path | str):
+    def from_file(cls, path: Path | str, memmap: bool = False):
         """
         Construct a PyConfig from a file.
 
@@ -263,31 +453,157 @@ class PyConfig:
         ----------
         path : pathlib.Path | str
             The path to the file.
+        memmap : bool, optional
+            If True, map the file into memory rather than reading it, so
+            that the GCM, if any, is decoded straight from the file. The
+            file is unmapped once it has been read. By default False.
         """
-        return cls.from_binaryconfig(BinConfig.from_file(path))
+        with BinConfig.from_file(path, memmap=memmap) as config:
+            return cls.from_binaryconfig(config)
 
-    @property
-    def content(self) -> bytes:
+    def sweep(self, **axes):
         """
-        Get the config content as a bytes string.
+        Vary some fields of this config across a grid.
+
+        Parameters
+        ----------
+        **axes : iterable
+            The values to take for each field, keyed by ``<model>__<field>``,
+            e.g. ``target__star_distance=[0.1, 0.2]*u.AU``.
+
+        Returns
+        -------
+        pypsg.cfg.sweep.Sweep
+            The grid. Iterating over it gives a ``BinConfig`` for each point.
+
+        Examples
+        --------
+        >>> for point, cfg in base.sweep(target__season=[0, 90, 180]*u.deg).items():
+        ...     ...
+        """
+        # ``pypsg.cfg.sweep`` imports this module
+        from pypsg.cfg.sweep import Sweep  # pylint: disable=import-outside-toplevel
+        return Sweep(self, **axes)
+
+    def _gcm_atmosphere(self) -> models.Atmosphere:
+        """
+        The atmosphere, updated to match the GCM.
+
+        The update is only run again once the GCM or the atmosphere
+        has changed.
+        """
+        gcm = self.gcm
+        atmosphere = self.atmosphere
+        cache = self._gcm_cache
+        if cache is not None:
+            cached_gcm, gcm_state, cached_atmosphere, atmosphere_state, updated = cache
+            if (
+                cached_gcm is gcm and cached_atmosphere is atmosphere
+                and gcm_state == gcm._state and atmosphere_state == atmosphere._state
+            ):
+                return updated
+        updated = gcm.update_params(atmosphere)
+        # the update may set the fields of ``atmosphere`` itself
+        self._gcm_cache = (gcm, gcm._state, atmosphere, atmosphere._state, updated)
+        return updated
+
+    def _parts(self) -> list:
         """
-        lines = []
-        for model in [
+        The models to encode, in order, followed by the GCM if there is one.
+        """
+        parts = [
             self.target,
             self.geometry,
-            self.gcm.update_params(self.atmosphere) if self.gcm is not None else self.atmosphere,
+            self._gcm_atmosphere() if self.gcm is not None else self.atmosphere,
             self.surface,
             self.generator,
             self.telescope,
             self.noise
-        ]:
-            model: models.Model
-            c = model.content
-            if c != b'':
-                lines.append(c)
+        ]
         if self.gcm is not None:
-            lines.append(self.gcm.content)
-        return b'\n'.join(lines)
+            parts.append(self.gcm)
+        return parts
+
+    def _pieces(self, parts: list) -> Iterator[Union[bytes, memoryview]]:
+        """
+        The content of each part, with the line breaks between them.
+        """
+        separator = b''
+        for model in parts:
+            if model is self.gcm:
+                pieces = model.iter_chunks()
+            else:
+                model: models.Model
+                c = model.content
+                if c == b'':
+                    continue
+                pieces = [c]
+            if separator:
+                yield separator
+            yield from pieces
+            separator = b'\n'
+
+    @property
+    def content(self) -> bytes:
+        """
+        Get the config content as a bytes string.
+
+        The content of each model and of the GCM is cached, so only the
+        parts that have changed since the last call are encoded again.
+        """
+        parts = self._parts()
+        state = tuple((id(part), part._state) for part in parts)
+        cache = self._content_cache
+        if cache is not None and cache[0] == state:
+            return cache[1]
+        content = b''.join(self._pieces(parts))
+        # keep the parts alive so that their ids are not reused
+        self._content_cache = (state, content, parts)
+        return content
+
+    def iter_chunks(self, chunk_size: int = CHUNK_SIZE) -> Iterator[Union[bytes, memoryview]]:
+        """
+        The content in pieces of at most ``chunk_size`` bytes.
+
+        Each model is encoded on its own and the GCM binary is given as
+        views of ``PyGCM.binary``, so the whole content is never held in
+        memory at once. Joining the pieces gives ``content``.
+
+        Parameters
+        ----------
+        chunk_size : int, optional
+            The largest piece to give at a time.
+
+        Yields
+        ------
+        bytes or memoryview
+            The next piece of the content.
+        """
+        parts = self._parts()
+        state = tuple((id(part), part._state) for part in parts)
+        cache = self._content_cache
+        if cache is not None and cache[0] == state:
+            return _chunked([cache[1]], chunk_size)
+        return _chunked(self._pieces(parts), chunk_size)
+
+    def write_to(self, fileobj: BinaryIO, chunk_size: int = CHUNK_SIZE) -> int:
+        """
+        Write the config to a file, a piece at a time.
+
+        Parameters
+        ----------
+        fileobj : file-like
+            Anything with a ``write`` method that takes bytes, such as a file
+            opened in binary mode or ``socket.makefile('wb')``.
+        chunk_size : int, optional
+            The largest piece to write at a time.
+
+        Returns
+        -------
+        int
+            The number of bytes written.
+        """
+        return _write_chunks(self.iter_chunks(chunk_size), fileobj)
 
     def to_file(self, path: Path | str):
         """
@@ -301,4 +617,4 @@ class PyConfig:
         path = Path(path)
         path.parent.mkdir(parents=True, exist_ok=True)
         with open(path, 'wb') as f:
-            f.write(self.content)
+            self.write_to(f)
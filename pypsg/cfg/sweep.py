@@ -0,0 +1,227 @@
+"""
+Parameter sweeps
+~~~~~~~~~~~~~~~~
+
+Vary a few fields of a config across a grid.
+
+The base config is encoded once. Each value of each axis is encoded once,
+and the configs of the grid are put together from those pieces as they are
+needed, so a sweep of any size costs little more than its first point.
+"""
+from typing import Any, Dict, Iterator, List, Tuple, Union
+from copy import deepcopy
+import itertools
+
+from pypsg.cfg.base import Field
+from pypsg.cfg.config import BinConfig
+
+SEPARATOR = '__'
+"""
+Separates the model from the field in the name of an axis.
+
+:type: str
+"""
+MODELS = (
+    'target',
+    'geometry',
+    'atmosphere',
+    'surface',
+    'generator',
+    'telescope',
+    'noise'
+)
+"""
+The models of a ``PyConfig``, in the order they are written.
+
+:type: tuple of str
+"""
+
+
+class Sweep:
+    """
+    A grid of configs that differ from a base config in a few fields.
+
+    Parameters
+    ----------
+    base : PyConfig
+        The config to start from.
+    **axes : iterable
+        The values to take for each field, keyed by ``<model>__<field>``,
+        e.g. ``target__star_distance=[0.1, 0.2]*u.AU``. The grid is the
+        product of the axes, with the last axis changing fastest.
+
+    Raises
+    ------
+    ValueError
+        If an axis does not name a field of the base config, or has no values.
+
+    Notes
+    -----
+    The model of each field is that of the base config, so an axis cannot
+    change the type of a model, e.g. from ``Observatory`` to ``Nadir``.
+
+    If the base config has a GCM, each value of an atmosphere axis is
+    passed through ``PyGCM.update_params``, as ``PyConfig.content`` does,
+    so a field that the GCM sets keeps the value the GCM gives it.
+
+    Examples
+    --------
+    >>> sweep = cfg.sweep(
+    ...     geometry__observer_altitude=[1, 2, 5]*u.pc,
+    ...     target__star_distance=[0.05, 0.1]*u.AU
+    ... )
+    >>> len(sweep)
+    6
+    >>> for result in run_batch(sweep, 'rad'):
+    ...     ...
+    """
+
+    def __init__(self, base, **axes):
+        if len(axes) == 0:
+            raise ValueError('A sweep needs at least one axis.')
+        self.base = base
+        self.axes: Dict[str, Tuple[Any, ...]] = {}
+        models = [
+            base._gcm_atmosphere() if name == 'atmosphere' and base.gcm is not None else getattr(base, name)
+            for name in MODELS
+        ]
+        # the content of each field of each model, or None if it is empty
+        self._template: List[List[Union[bytes, None]]] = []
+        positions: Dict[Tuple[str, str], Tuple[int, int]] = {}
+        fields: Dict[Tuple[str, str], Field] = {}
+        for i, (model_name, model) in enumerate(zip(MODELS, models)):
+            lines = []
+            for j, (field_name, field) in enumerate(model.fields.items()):
+                lines.append(None if field.is_null else field.content)
+                positions[(model_name, field_name)] = (i, j)
+                fields[(model_name, field_name)] = field
+            self._template.append(lines)
+        self._gcm = base.gcm.content if base.gcm is not None else None
+        self._positions: List[Tuple[int, int]] = []
+        self._encoded: List[Tuple[Union[bytes, None], ...]] = []
+        for key, values in axes.items():
+            model_name, _, field_name = key.partition(SEPARATOR)
+            if (model_name, field_name) not in positions:
+                raise ValueError(f'{key} is not a field of the base config.')
+            values = tuple(values)
+            if len(values) == 0:
+                raise ValueError(f'The axis {key} has no values.')
+            field = fields[(model_name, field_name)]
+            self.axes[key] = values
+            self._positions.append(positions[(model_name, field_name)])
+            if model_name == 'atmosphere' and base.gcm is not None:
+                encoded = tuple(self._encode_gcm_atmosphere(base, field_name, value) for value in values)
+            else:
+                encoded = tuple(self._encode(field, value) for value in values)
+            self._encoded.append(encoded)
+
+    @staticmethod
+    def _encode(field: Field, value: Any) -> Union[bytes, None]:
+        """
+        Format a value as the field would, or None if it is empty.
+        """
+        new = field.clone()
+        new.value = value
+        return None if new.is_null else new.content
+
+    @staticmethod
+    def _encode_gcm_atmosphere(base, field_name: str, value: Any) -> Union[bytes, None]:
+        """
+        Format a value of an atmosphere field once the GCM of ``base`` has
+        updated the atmosphere, or None if it is empty.
+        """
+        atmosphere = deepcopy(base.atmosphere)
+        setattr(atmosphere, field_name, value)
+        field = base.gcm.update_params(atmosphere).fields[field_name]
+        return None if field.is_null else field.content
+
+    def __len__(self) -> int:
+        n = 1
+        for values in self.axes.values():
+            n *= len(values)
+        return n
+
+    def _indices(self) -> Iterator[Tuple[int, ...]]:
+        return itertools.product(*(range(len(values)) for values in self.axes.values()))
+
+    def _content(self, indices: Tuple[int, ...]) -> bytes:
+        """
+        Put together the content of the config at a point of the grid.
+        """
+        template = [list(lines) for lines in self._template]
+        for (i, j), encoded, index in zip(self._positions, self._encoded, indices):
+            template[i][j] = encoded[index]
+        parts = [b'\n'.join(line for line in lines if line is not None) for lines in template]
+        parts = [part for part in parts if part != b'']
+        if self._gcm is not None:
+            parts.append(self._gcm)
+        return b'\n'.join(parts)
+
+    def points(self) -> Iterator[Dict[str, Any]]:
+        """
+        The value of each axis at each point of the grid.
+
+        Yields
+        ------
+        dict
+            The values, keyed by axis.
+        """
+        keys = list(self.axes)
+        for values in itertools.product(*self.axes.values()):
+            yield dict(zip(keys, values))
+
+    def __iter__(self) -> Iterator[BinConfig]:
+        """
+        The config at each point of the grid.
+
+        Yields
+        ------
+        BinConfig
+            The full config.
+        """
+        for indices in self._indices():
+            yield BinConfig(self._content(indices))
+
+    def items(self) -> Iterator[Tuple[Dict[str, Any], BinConfig]]:
+        """
+        The values and config at each point of the grid.
+
+        Yields
+        ------
+        dict
+            The value of each axis.
+        BinConfig
+            The full config.
+        """
+        return zip(self.points(), iter(self))
+
+    def updates(self) -> Iterator[BinConfig]:
+        """
+        The changes to make at each point of the grid, for PSG's ``upd`` mode.
+
+        The first config holds every swept field. Each one after it holds
+        only the fields that differ from the point before. Send the base
+        config first with the ``set`` mode.
+
+        Yields
+        ------
+        BinConfig
+            The changed fields.
+
+        Raises
+        ------
+        ValueError
+            If a swept field becomes empty, which ``upd`` cannot express.
+        """
+        previous = None
+        for indices in self._indices():
+            lines = []
+            for axis, (encoded, index) in enumerate(zip(self._encoded, indices)):
+                if previous is not None and previous[axis] == index:
+                    continue
+                if encoded[index] is None:
+                    key = list(self.axes)[axis]
+                    raise ValueError(f'{key} cannot be emptied with an update.')
+                lines.append(encoded[index])
+            previous = indices
+            yield BinConfig(b'\n'.join(lines))
@@ -2,6 +2,7 @@
 Helpers for running psg locally
 """
 import json
+import os
 import subprocess
 import platform
 import shutil
@@ -30,13 +31,34 @@ def _get_containers_json() -> dict:
     return containers_info
 
 
-def is_psg_installed() -> bool:
+def _find_container(containers_info: list, name: str) -> dict | None:
+    """
+    Find the PSG container called ``name``.
+    """
+    for info in containers_info:
+        image = info["Image"]
+        names = info["Names"]
+        if isinstance(names, list):
+            named_psg = name in names
+        else:
+            named_psg = name == names
+        if image == 'psg' and named_psg:
+            return info
+    return None
+
+
+def is_psg_installed(name: str = PSG_CONTAINER_NAME) -> bool:
     """
     Determine if a local version of PSG is installed.
 
     This function checks all docker containers and compares their
     `RepoTags` attribute to the string `psg:latest`.
 
+    Parameters
+    ----------
+    name : str, optional
+        The name of the container. By default `psg`.
+
     Returns
     -------
     bool
@@ -57,42 +79,27 @@ def is_psg_installed() -> bool:
     if not _is_docker_installed():
         return False
     try:
-        containers_info = _get_containers_json()
-
-        for info in containers_info:
-            image = info["Image"]
-            name = info["Names"]
-            if isinstance(name, list):
-                named_psg = 'psg' in name
-            else:
-                named_psg = 'psg' == name
-            if image == 'psg' and named_psg:
-                return True
-        return False
+        return _find_container(_get_containers_json(), name) is not None
     except json.JSONDecodeError:
         return False
 
 
-def get_psg_container_info() -> dict:
+def get_psg_container_info(name: str = PSG_CONTAINER_NAME) -> dict:
     """
     Get the psg container.
 
+    Parameters
+    ----------
+    name : str, optional
+        The name of the container. By default `psg`.
+
     Returns
     -------
     dict
         The info for the PSG container.
     """
     try:
-        containers_info = _get_containers_json()
-        for info in containers_info:
-            image = info["Image"]
-            name = info["Names"]
-            if isinstance(name, list):
-                named_psg = 'psg' in name
-            else:
-                named_psg = 'psg' == name
-            if image == 'psg' and named_psg:
-                return info
+        return _find_container(_get_containers_json(), name)
     except json.JSONDecodeError as e:
         raise RuntimeError(
             'Could not parse json output from `docker ps -a --format json`. Is docker installed?') from e
@@ -104,20 +111,25 @@ class PSGNotInstalledError(Exception):
     """
 
 
-def is_psg_running() -> bool:
+def is_psg_running(name: str = PSG_CONTAINER_NAME) -> bool:
     """
     Determine if a local version of PSG is running.
 
+    Parameters
+    ----------
+    name : str, optional
+        The name of the container. By default `psg`.
+
     Returns
     -------
     bool
         True if a local version of PSG is running.
     """
-    container = get_psg_container_info()
+    container = get_psg_container_info(name)
     return container['State'] == 'running'
 
 
-def start_psg(strict=True):
+def start_psg(strict=True, name: str = PSG_CONTAINER_NAME):
     """
     Start the psg container.
 
@@ -125,8 +137,10 @@ def start_psg(strict=True):
     ----------
     strict : bool, optional
         If True, raise an error if PSG is not installed locally. By default True.
+    name : str, optional
+        The name of the container. By default `psg`.
     """
-    if not is_psg_installed():
+    if not is_psg_installed(name):
         if strict:
             msg = 'PSG is not installed. '
             url = 'https://psg.gsfc.nasa.gov/helpapi.php#installation'
@@ -134,11 +148,11 @@ def start_psg(strict=True):
             raise PSGNotInstalledError(msg)
         else:
             return None
-    if not is_psg_running():
-        subprocess.call(['docker', 'start', 'psg'])
+    if not is_psg_running(name):
+        subprocess.call(['docker', 'start', name])
 
 
-def stop_psg(strict=True):
+def stop_psg(strict=True, name: str = PSG_CONTAINER_NAME):
     """
     Stop the psg container.
 
@@ -146,8 +160,10 @@ def stop_psg(strict=True):
     ----------
     strict : bool, optional
         If True, raise an error if PSG is not installed locally. By default True.
+    name : str, optional
+        The name of the container. By default `psg`.
     """
-    if not is_psg_installed():
+    if not is_psg_installed(name):
         if strict:
             msg = 'PSG is not installed. '
             url = 'https://psg.gsfc.nasa.gov/helpapi.php#installation'
@@ -155,8 +171,8 @@ def stop_psg(strict=True):
             raise PSGNotInstalledError(msg)
         else:
             return None
-    if is_psg_running():
-        subprocess.call(['docker', 'stop', 'psg'])
+    if is_psg_running(name):
+        subprocess.call(['docker', 'stop', name])
 
 
 def set_psg_url(internal=True):
@@ -173,6 +189,7 @@ def set_psg_url(internal=True):
     else:
         url = settings.PSG_URL
     settings.save_settings(url=url)
+    reset_url()
 
 
 def set_url_and_run():
@@ -191,3 +208,65 @@ def set_url_and_run():
     else:
         url = settings.PSG_URL
     settings.save_settings(url=url)
+    reset_url()
+
+
+_resolved_url = None
+_resolved_pid = None
+
+
+def resolve_url(auto_start: bool = None) -> str:
+    """
+    Find the URL of the PSG backend to use when none is given.
+
+    A local PSG container is used if it is installed and running. Otherwise
+    the ``url`` setting is used. The result is cached for the life of the process,
+    so docker is only queried once.
+
+    Parameters
+    ----------
+    auto_start : bool, optional
+        If True, start the local PSG container if it is installed but stopped.
+        By default the ``docker_autostart`` setting is used, which is False
+        unless changed by the user.
+
+    Returns
+    -------
+    str
+        The URL to send requests to.
+
+    Notes
+    -----
+    Unlike ``set_url_and_run``, this function never writes to the
+    settings file.
+    """
+    # pylint: disable-next=global-statement
+    global _resolved_url, _resolved_pid
+    if _resolved_url is not None and _resolved_pid == os.getpid():
+        return _resolved_url
+    if auto_start is None:
+        auto_start = settings.get_setting('docker_autostart')
+    url = settings.get_setting('url')
+    if is_psg_installed():
+        if is_psg_running():
+            url = settings.INTERNAL_PSG_URL
+        elif auto_start:
+            start_psg(strict=True)
+            url = settings.INTERNAL_PSG_URL
+        elif url == settings.INTERNAL_PSG_URL:
+            url = settings.PSG_URL
+    elif url == settings.INTERNAL_PSG_URL:
+        url = settings.PSG_URL
+    _resolved_url = url
+    _resolved_pid = os.getpid()
+    return url
+
+
+def reset_url():
+    """
+    Forget the URL found by ``resolve_url``, so that the next call checks again.
+    """
+    # pylint: disable-next=global-statement
+    global _resolved_url, _resolved_pid
+    _resolved_url = None
+    _resolved_pid = None
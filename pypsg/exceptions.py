@@ -27,6 +27,16 @@ class PSGConnectionError(PSGError):
     PSG Connection Error
     """
 
+class PSGBusyError(PSGConnectionError):
+    """
+    PSG is still working on another call made with the same API key.
+    """
+
+class PSGBackendUnavailableError(PSGConnectionError):
+    """
+    No PSG backend in a pool is available.
+    """
+
 class PSGMultiError(PSGError):
     """
     Multiple PSG Errors.
@@ -2,11 +2,41 @@
 Global Emission Spectra (GlobES)
 ================================
 
+The WACCM, exoCAM and ExoPlaSim converters depend on ``netCDF4`` and are
+imported the first time they are used.
 """
+import importlib
 
 from .globes import PyGCM
-from .waccm import waccm_to_pygcm
-from .exocam import exocam_to_pygcm
-from .exoplasim import exoplasim_to_pygcm
 from . import structure
 from .decoder import GCMdecoder
+
+_LAZY_ATTRS = {
+    'waccm_to_pygcm': ('.waccm', 'waccm_to_pygcm'),
+    'waccm_to_pygcm_series': ('.waccm', 'waccm_to_pygcm_series'),
+    'exocam_to_pygcm': ('.exocam', 'exocam_to_pygcm'),
+    'exoplasim_to_pygcm': ('.exoplasim', 'exoplasim_to_pygcm'),
+}
+_LAZY_SUBMODULES = (
+    'waccm',
+    'exocam',
+    'exoplasim',
+)
+
+__all__ = ['PyGCM', 'structure', 'GCMdecoder', *_LAZY_ATTRS]
+
+
+def __getattr__(name: str):
+    if name in _LAZY_ATTRS:
+        module, attr = _LAZY_ATTRS[name]
+        value = getattr(importlib.import_module(module, __name__), attr)
+    elif name in _LAZY_SUBMODULES:
+        value = importlib.import_module(f'.{name}', __name__)
+    else:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__) | set(_LAZY_SUBMODULES))
@@ -3,15 +3,16 @@ VSPEC gcm decoder module
 """
 
 from pathlib import Path
-import json
+import mmap
 import numpy as np
 from astropy import units as u, constants as c
-from typing import Tuple, List
+from typing import Dict, Tuple, List
 
-MOLEC_DATA_PATH = Path(__file__).parent / 'molec.json'
+from .molecules import MOLEC_DATA_PATH, get_molecule_database
+from . import hydrostatic
 
 
-def get_gcm_binary(config: str or Path or bytes):
+def get_gcm_binary(config: str or Path or bytes, memmap: bool = False):
     """
     Separate a GCM into it's text and binary components.
 
@@ -19,13 +20,17 @@ def get_gcm_binary(config: str or Path or bytes):
     ----------
     config : str, pathlib.Path, bytes
         The filename to read or the bytes to parse
+    memmap : bool, optional
+        If True, map the file into memory rather than reading it.
+        By default False.
 
     Returns
     -------
     head : str
         The value of the 'ATMOSPHERE-GCM-PARAMETERS' option.
     dat : np.ndarray
-        The data between '<BINARY></BINARY>' tags.
+        The data between '<BINARY></BINARY>' tags. This is a read-only
+        view of ``config``, or of the file.
 
     """
     key = '<ATMOSPHERE-GCM-PARAMETERS>'
@@ -33,15 +38,25 @@ def get_gcm_binary(config: str or Path or bytes):
     end = b'</BINARY>'
     if isinstance(config, (str, Path)):
         with open(config, 'rb') as file:
-            fdat = file.read()
+            if memmap:
+                fdat = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                fdat = file.read()
     else:
         fdat = config
-    header, dat = fdat.split(start)
-    dat = dat.replace(end, b'')
-    dat = np.frombuffer(dat, dtype='float32')
-    for line in str(header).split(r'\n'):
+    i_start = fdat.find(start)
+    if i_start == -1:
+        raise ValueError('The config contains no binary section.')
+    # the tag closes the data, and scanning back to it avoids reading through it
+    i_end = fdat.rfind(end)
+    if i_end == -1:
+        raise ValueError('The binary section is not closed.')
+    header = fdat[:i_start]
+    dat = np.frombuffer(memoryview(fdat)[i_start+len(start):i_end], dtype='float32')
+    dat.flags.writeable = False
+    for line in header.decode('UTF-8').split('\n'):
         if key in line:
-            return line.replace(key, ''), np.array(dat)
+            return line.replace(key, '').rstrip('\r'), dat
 
 
 def sep_header(header):
@@ -63,6 +78,11 @@ class GCMdecoder:
         The header of the GCM.
     dat : bytes
         The binary data of the GCM.
+
+    Notes
+    -----
+    ``dat`` may be a read-only view, for example of a file mapped into
+    memory. It is only copied when a variable is set.
     """
     
     DOUBLE = ['Winds']
@@ -78,8 +98,47 @@ class GCMdecoder:
         self.header = header
         self.dat = dat
 
+    @property
+    def header(self) -> str:
+        """
+        The header of the GCM.
+
+        :type: str
+        """
+        return self._header
+
+    @header.setter
+    def header(self, value: str):
+        self._header = value
+        self._index_cache = None
+
+    @property
+    def _index(self) -> Dict[str, Tuple[int, int, Tuple[int, ...]]]:
+        """
+        The offset, size and shape of each variable in ``dat``.
+
+        It is built the first time it is needed after the header is set.
+        """
+        if self._index_cache is None:
+            _, variables = sep_header(self.header)
+            Nlon, Nlat, Nlayer = self.get_shape()
+            index = {}
+            start = 0
+            for var in variables:
+                if var in self.DOUBLE:
+                    shape = (2, Nlayer, Nlon, Nlat)
+                elif var in self.FLAT:
+                    shape = (Nlon, Nlat)
+                else:
+                    shape = (Nlayer, Nlon, Nlat)
+                size = int(np.prod(shape))
+                index[var] = (start, size, shape)
+                start += size
+            self._index_cache = index
+        return self._index_cache
+
     @classmethod
-    def from_psg(cls, config: str or Path or bytes):
+    def from_psg(cls, config: str or Path or bytes, memmap: bool = False):
         """
         Construct a ``GCMdecoder`` from PSG.
 
@@ -87,8 +146,11 @@ class GCMdecoder:
         ----------
         config : str, pathlib.Path, bytes
             The filename to read or the bytes to parse
+        memmap : bool, optional
+            If True, map the file into memory rather than reading it.
+            By default False.
         """
-        head, dat = get_gcm_binary(config)
+        head, dat = get_gcm_binary(config, memmap=memmap)
         return cls(head, dat)
 
     def rename_var(self, oldname, newname):
@@ -157,10 +219,9 @@ class GCMdecoder:
         """
         Get the names of the molecules in the GCM
         """
-        with open(MOLEC_DATA_PATH, 'rt', encoding='UTF-8') as file:
-            molec_data = json.loads(file.read())
+        molec_data = get_molecule_database()
         _, variables = sep_header(self.header)
-        molecs = [var for var in variables if var in molec_data.keys()]
+        molecs = [var for var in variables if var in molec_data]
         return molecs
 
     def get_aerosols(self)->Tuple[List[str], List[str]]:
@@ -173,40 +234,12 @@ class GCMdecoder:
         return aerosols, aerosol_sizes
 
     def __getitem__(self, item):
-        _, variables = sep_header(self.header)
-        if not item in variables:
+        index = self._index
+        if not item in index:
             raise KeyError(
-                f'{item} not found. Acceptable keys are {variables}')
-        else:
-            start = 0
-
-            def get_array_length(var):
-                if var in self.DOUBLE:
-                    return 2*self.get_3d_size(), 'double'
-                elif var in self.FLAT:
-                    return self.get_2d_size(), 'flat'
-                else:
-                    return self.get_3d_size(), 'single'
-
-            def package_array(dat, key):
-                if key == 'single':
-                    Nlon, Nlat, Nlayer = self.get_shape()
-                    return dat.reshape(Nlayer, Nlon, Nlat)
-                elif key == 'flat':
-                    Nlon, Nlat, Nlayer = self.get_shape()
-                    return dat.reshape(Nlon, Nlat)
-                elif key == 'double':
-                    Nlon, Nlat, Nlayer = self.get_shape()
-                    return dat.reshape(2, Nlayer, Nlon, Nlat)
-                else:
-                    raise ValueError(f'Unknown value {key}')
-            for var in variables:
-                size, key = get_array_length(var)
-                if item == var:
-                    dat = self.dat[start:start+size]
-                    return package_array(dat, key)
-                else:
-                    start += size
+                f'{item} not found. Acceptable keys are {list(index)}')
+        start, size, shape = index[item]
+        return self.dat[start:start+size].reshape(shape)
 
     def __setitem__(self, item: str, new_value: np.ndarray):
         """
@@ -215,56 +248,36 @@ class GCMdecoder:
         old_value = self.__getitem__(item)
         if not old_value.shape == new_value.shape:
             raise ValueError('New shape must match old shape.')
-        new_value = new_value.astype(old_value.dtype)
-        _, variables = sep_header(self.header)
+        start, size, _ = self._index[item]
+        if not self.dat.flags.writeable:
+            self.dat = self.dat.copy()
+        # cast while copying in, rather than to a temporary array
+        self.dat[start:start+size] = np.ravel(new_value, order='C')
 
-        def get_array_length(var):
-            if var in self.DOUBLE:
-                return 2*self.get_3d_size(), 'double'
-            elif var in self.FLAT:
-                return self.get_2d_size(), 'flat'
-            else:
-                return self.get_3d_size(), 'single'
-        start = 0
-        for var in variables:
-            size, _ = get_array_length(var)
-            if item == var:
-                dat = new_value.flatten(order='C')
-                self.dat[start:start+size] = dat
-                return None
-            else:
-                start += size
-
-    def remove(self, item):
+    def remove(self, *items):
         """
-        Remove an item from the gcm
+        Remove items from the gcm
         
         Parameters
         ----------
-        item : str
-            The name of the item to remove.
+        *items : str
+            The names of the items to remove.
+
+        Raises
+        ------
+        ValueError
+            If any of the items is not in the GCM. Nothing is removed.
         """
         coords, variables = sep_header(self.header)
-        if item not in variables:
-            return ValueError(f'Unknown {item}')
-
-        def get_array_length(var):
-            if var in self.DOUBLE:
-                return 2*self.get_3d_size(), 'double'
-            elif var in self.FLAT:
-                return self.get_2d_size(), 'flat'
-            else:
-                return self.get_3d_size(), 'single'
-        start = 0
-        for var in variables:
-            size, _ = get_array_length(var)
-            if item == var:
-                s = slice(start, start+size)
-                self.dat = np.delete(self.dat, s)
-            else:
-                start += size
-        new_variables = [var for var in variables if item != var]
-        self.header = ','.join(coords+new_variables)
+        for item in items:
+            if item not in variables:
+                raise ValueError(f'Unknown {item}')
+        index = self._index
+        kept = [var for var in variables if var not in items]
+        # the data of every kept item is copied once
+        parts = [self.dat[start:start+size] for start, size, _ in (index[var] for var in kept)]
+        self.dat = np.concatenate(parts) if parts else self.dat[:0].copy()
+        self.header = ','.join(coords+kept)
 
     def copy_config(self, path_to_copy: Path, path_to_write: Path, NMAX=2, LMAX=2, mean_mass=28):
         """
@@ -296,11 +309,9 @@ class GCMdecoder:
                 molecs = ','.join(self.get_molecules())
                 return bytes(f'<ATMOSPHERE-GAS>{molecs}\n', encoding='UTF-8')
             elif b'<ATMOSPHERE-TYPE>' in line:
-                with open(MOLEC_DATA_PATH, 'rt', encoding='UTF-8') as file:
-                    molec_data = json.loads(file.read())
                 molecs = self.get_molecules()
                 atm_types = ','.join(
-                    [f'HIT[{molec_data[mol]["ID"]}]' for mol in molecs])
+                    [f'HIT[{i}]' for i in get_molecule_database().ids_of(molecs)])
                 return bytes(f'<ATMOSPHERE-TYPE>{atm_types}\n', encoding='UTF-8')
             elif b'<ATMOSPHERE-ABUN>' in line:
                 n_molecs = len(self.get_molecules())
@@ -359,18 +370,14 @@ class GCMdecoder:
         """
         Get the mean molecular mass at every point on the GCM
         """
-        with open(MOLEC_DATA_PATH, 'rt', encoding='UTF-8') as file:
-            molec_data = json.loads(file.read())
+        molec_data = get_molecule_database()
         Nlon, Nlat, Nlayer = self.get_shape()
-        mean_molec_mass = np.zeros(shape=(Nlayer, Nlat, Nlon))*u.g/u.mol
-        for mol, dat in molec_data.items():
-            mass = dat['mass']
-            try:
-                data = 10**self[mol]
-                mean_molec_mass += data*mass*u.g/u.mol
-            except KeyError:
-                pass
-        return mean_molec_mass
+        # in the order of the database, as the sum always has been
+        molecs = [mol for mol in molec_data if mol in self._index]
+        mean_molec_mass = np.zeros(shape=(Nlayer, Nlon, Nlat))
+        for mol, mass in zip(molecs, molec_data.masses_of(molecs)):
+            mean_molec_mass = mean_molec_mass + 10**self[mol]*mass
+        return mean_molec_mass*u.g/u.mol
 
     def get_alt(self, M: u.Quantity, R: u.Quantity)->u.Quantity:
         """
@@ -388,45 +395,83 @@ class GCMdecoder:
         z : astropy.units.Quantity
             The altitude of each GCM point.
         """
-        P = 10**self['Pressure']*u.bar
-        T = self['Temperature']*u.K
-        m = self.get_mean_molec_mass()
-        Nlon, Nlat, Nlayers = self.get_shape()
-        z_unit = u.km
-        z = [np.zeros(shape=(Nlat, Nlon))]
-        for i in range(Nlayers-1):
-            dP = P[i+1, :, :] - P[i, :, :]
-            rho = m[i, :, :]*(P[i, :, :] + 0.5*dP)/c.R/T[i, :, :]
-            r = z[-1]*z_unit + R
-            g = M*c.G/r**2
-            dz = -dP/rho/g
-            z.append((z[-1]*z_unit+dz).to(z_unit).value)
-        return z*z_unit
+        z = hydrostatic.altitude(
+            pressure=10**self['Pressure'],
+            temperature=self['Temperature'],
+            molar_mass=self.get_mean_molec_mass().to_value(u.kg/u.mol),
+            gm=(M*c.G).to_value(u.m**3/u.s**2),
+            radius=R.to_value(u.m)
+        )
+        return (z*u.m).to(u.km)
 
     def get_column_density(self, mol: str, M: u.Quantity, R: u.Quantity,)->u.Quantity:
         """
         Get the column density of a gas at each point on the gcm.
         """
-        abn = 10**self[mol]*u.mol/u.mol
-        P = 10**self['Pressure']*u.bar
-        T = self['Temperature']*u.K
-        partial_pressure = P*abn
-        alt = self.get_alt(M, R)
-        heights = np.diff(alt, axis=0)
-        density: u.Quantity = np.sum(
-            partial_pressure[:-1]*heights/c.R/T[:-1], axis=0)
-        return density.to(u.mol/u.cm**2)
+        return self._columns(M, R, gases=[mol], clouds=[])[mol]
 
     def get_column_clouds(self, var: str, M: u.Quantity, R: u.Quantity,):
         """
         Get the column density of a cloud at each point on the gcm.
         """
-        mass_frac = 10**self[var]*u.kg/u.kg
-        P = 10**self['Pressure']*u.bar
-        T = self['Temperature']*u.K
-        molar_mass = self.get_mean_molec_mass()
-        alt = self.get_alt(M, R)
-        heights = np.diff(alt, axis=0)
-        gas_mass_density = P[:-1]*heights/c.R/T[:-1]*molar_mass[:-1]  # g cm-2
-        mass_density = np.sum(mass_frac[:-1]*gas_mass_density, axis=0).cgs
-        return mass_density.to(u.kg/u.cm**2)
+        return self._columns(M, R, gases=[], clouds=[var])[var]
+
+    def get_columns(self, M: u.Quantity, R: u.Quantity, names: List[str] = None) -> Dict[str, u.Quantity]:
+        """
+        Get the column density of several gases and clouds at each point on the gcm.
+
+        The altitude is only found once for every variable.
+
+        Parameters
+        ----------
+        M : astropy.units.Quantity
+            The mass of the planet.
+        R : astropy.units.Quantity
+            The radius of the planet.
+        names : list of str, optional
+            The variables to get the column density of. Names that are not
+            aerosols are taken to be gases. By default every molecule and
+            aerosol.
+
+        Returns
+        -------
+        dict
+            The column density of each variable, keyed by name, in
+            mol/cm2 for gases and kg/cm2 for clouds.
+        """
+        aerosols, _ = self.get_aerosols()
+        if names is None:
+            names = self.get_molecules() + aerosols
+        columns = self._columns(
+            M, R,
+            gases=[name for name in names if name not in aerosols],
+            clouds=[name for name in names if name in aerosols]
+        )
+        return {name: columns[name] for name in names}
+
+    def _columns(self, M: u.Quantity, R: u.Quantity, gases: List[str], clouds: List[str]) -> Dict[str, u.Quantity]:
+        """
+        Get the column density of some gases and some clouds.
+        """
+        for name in gases + clouds:
+            if name not in self._index:
+                raise KeyError(f'{name} not found. Acceptable keys are {list(self._index)}')
+        pressure = (10**self['Pressure']*u.bar).to_value(u.Pa)
+        temperature = np.asarray(self['Temperature'], dtype=float)
+        molar_mass = self.get_mean_molec_mass().to_value(u.kg/u.mol)
+        z = hydrostatic.altitude(
+            pressure=pressure,
+            temperature=temperature,
+            molar_mass=molar_mass,
+            gm=(M*c.G).to_value(u.m**3/u.s**2),
+            radius=R.to_value(u.m)
+        )
+        moles = hydrostatic.layer_moles(pressure, temperature, z)
+        columns = {}
+        for name in gases:
+            abundance = 10**np.asarray(self[name], dtype=float)
+            columns[name] = (hydrostatic.gas_column(moles, abundance)*u.mol/u.m**2).to(u.mol/u.cm**2)
+        for name in clouds:
+            mass_fraction = 10**np.asarray(self[name], dtype=float)
+            columns[name] = (hydrostatic.aerosol_column(moles, molar_mass, mass_fraction)*u.kg/u.m**2).to(u.kg/u.cm**2)
+        return columns
@@ -1,15 +1,18 @@
 """
 Handling of PSG's Global Emission Spectra (GlobES) application
 """
-from typing import Any, Tuple, List
+from typing import Any, Dict, Iterator, Tuple, List, Union
 import numpy as np
 from astropy import units as u, constants as c
 
 from . import structure
+from ..cfg.config import BinConfig
 from ..cfg.models import EquilibriumAtmosphere
 from ..cfg.base import Molecule, Aerosol, Profile
-from ..settings import atmosphere_type_dict as mtype, aerosol_type_dict as atype, get_setting
+from ..settings import aerosol_type_dict as atype, get_setting
 from .decoder import GCMdecoder, sep_header
+from .molecules import get_molecule_database
+from . import hydrostatic
 
 ANGLE_UNIT = u.deg
 DTYPE = np.float32
@@ -46,7 +49,9 @@ class GCM:
         Parameters
         ----------
         d : dict
-            A dictionary read from a PSG config file.
+            A dictionary read from a PSG config file. ``d['BINARY']`` can be
+            bytes, or a view such as ``BinConfig.binary_view``, which is
+            decoded without being copied.
         """
         if cls.KEY not in d:
             return None
@@ -99,7 +104,15 @@ class PyGCM:
         The emissivity variable.
     *args : pypsg.globes.structure.Molecule | pypsg.globes.structure.Aerosol | pypsg.globes.structure.AerosolSize | pypsg.globes.structure.Surface
         Additional variables.
+
+    Notes
+    -----
+    ``content``, ``flat`` and ``binary`` are cached until an attribute of
+    the GCM or of one of its variables is set.
     """
+    _version = 0
+    _content_cache = None
+    _binary_cache = None
     _key_order = [
         'wind_u',
         'wind_v',
@@ -163,6 +176,17 @@ class PyGCM:
                         f'Dimension mismatch: {__value.shape} != ({nlon},{nlat})')
 
         super().__setattr__(__name, __value)
+        # bypass the shape check above
+        object.__setattr__(self, '_version', self._version + 1)
+
+    @property
+    def _state(self) -> Tuple[int, ...]:
+        """
+        A key that changes whenever the GCM or one of its variables is set.
+
+        :type: tuple of int
+        """
+        return (self._version,) + tuple(v._version for v in self.variables)
 
     @property
     def shape(self) -> Tuple[int, int, int]:
@@ -256,17 +280,62 @@ class PyGCM:
         var_names = ['Winds'] + [v.name for v in variables]
         return f'{coords},{",".join(var_names)}'
 
+    def _encode(self) -> np.ndarray:
+        """
+        The binary of the GCM, cached until the GCM or one of its variables is set.
+
+        The size of each variable sets its slice of one preallocated
+        ``float32`` array, and each variable writes its data straight into
+        its slice. Variables that have not changed since the last call are
+        copied from the old array rather than encoded again.
+        """
+        state = self._state
+        cache = self._binary_cache
+        if cache is not None and cache[0] == state:
+            return cache[1]
+        variables = self.variables
+        stops = np.cumsum([v.dat.size for v in variables])
+        binary = np.empty(stops[-1] if len(stops) else 0, dtype=DTYPE)
+        layout = {}
+        previous = cache[2] if cache is not None else {}
+        for variable, stop in zip(variables, stops):
+            start = stop - variable.dat.size
+            old = previous.get(id(variable))
+            if old is not None and old[0] is variable and old[1] == variable._version:
+                binary[start:stop] = cache[1][old[2]:old[3]]
+            else:
+                variable.write_flat(binary[start:stop])
+            layout[id(variable)] = (variable, variable._version, start, stop)
+        binary.flags.writeable = False
+        # the layout keeps the variables alive so that their ids are not reused
+        object.__setattr__(self, '_binary_cache', (state, binary, layout))
+        return binary
+
     @property
     def flat(self) -> np.ndarray:
         """
         A flat array with all the data layed out as expected.
 
+        The array is shared with ``binary`` and ``content`` and is read-only.
+
         Returns
         -------
         np.ndarray
             The flattened array.
         """
-        return np.concatenate([v.flat.astype(DTYPE) for v in self.variables]).astype(DTYPE)
+        return self._encode()
+
+    @property
+    def binary(self) -> memoryview:
+        """
+        The bytes of the ``<BINARY>`` section of the config.
+
+        It is a read-only view of ``flat``, which can be written to a file
+        or sent without copying it.
+
+        :type: memoryview
+        """
+        return memoryview(self._encode()).cast('B')
 
     @property
     def molecules(self):
@@ -292,14 +361,18 @@ class PyGCM:
     def update_params(self, atmosphere: EquilibriumAtmosphere = None):
         """
         Update the config.
+
+        Each molecule is given the opacity database set for it in
+        ``settings.atmosphere_type_dict``, and a ``KeyError`` is raised
+        for a molecule that has none.
         """
         if not isinstance(atmosphere, EquilibriumAtmosphere):
             atmosphere = EquilibriumAtmosphere()
 
         gases = [molec.name for molec in self.molecules]
         aeros = [aerosol.name for aerosol in self.aerosols]
-        gas_types = [f'HIT[{mtype[gas]}]' if isinstance(
-            mtype[gas], int) else mtype[gas] for gas in gases]
+        molec_data = get_molecule_database()
+        gas_types = [molec_data.opacity_type(gas) for gas in gases]
         aerosol_types = [atype[aerosol] for aerosol in aeros]
 
         molecules = [Molecule(gas, gas_type, 1)
@@ -376,24 +449,31 @@ class PyGCM:
         ----------
         header : str
             The header of the GCM.
-        binary : bytes
+        binary : bytes or memoryview
             The binary data of the GCM.
         """
         decoder = GCMdecoder(header, np.frombuffer(binary,dtype='float32'))
         return cls.from_decoder(decoder)
 
     @classmethod
-    def from_cfg(cls, d: dict):
+    def from_cfg(cls, d: Union[dict, BinConfig]):
         """
         Read a GCM from a config dict.
 
         Parameters
         ----------
-        d : dict
-            A dictionary read from a PSG config file.
-        """
-        header = d['ATMOSPHERE-GCM-PARAMETERS']
-        dat = d['BINARY']
+        d : dict or BinConfig
+            A dictionary read from a PSG config file. ``d['BINARY']`` can be
+            bytes, or a view such as ``BinConfig.binary_view``. A
+            ``BinConfig`` is read through its ``binary_view``, so the GCM is
+            decoded without the binary being copied.
+        """
+        if isinstance(d, BinConfig):
+            header = d._keywords()['ATMOSPHERE-GCM-PARAMETERS']
+            dat = d.binary_view
+        else:
+            header = d['ATMOSPHERE-GCM-PARAMETERS']
+            dat = d['BINARY']
         return cls.from_bytes(header, dat)
 
     @property
@@ -406,9 +486,37 @@ class PyGCM:
         bytes
             The content of the GCM.
         """
-        gcm_params = b'<ATMOSPHERE-GCM-PARAMETERS>' + self.header.encode(get_setting('encoding'))
-        binary = b'<BINARY>' + self.flat.tobytes(order='C') + b'</BINARY>'
-        return gcm_params + b'\n' + binary
+        state = self._state
+        cache = self._content_cache
+        if cache is not None and cache[0] == state:
+            return cache[1]
+        content = b''.join(self.iter_chunks())
+        object.__setattr__(self, '_content_cache', (state, content))
+        return content
+
+    def iter_chunks(self) -> Iterator[Union[bytes, memoryview]]:
+        """
+        The pieces of ``content``, without joining them.
+
+        The binary is yielded as the view given by ``binary``, so unless
+        ``content`` has already been read no copy of it is made.
+
+        Yields
+        ------
+        bytes or memoryview
+            The next piece of the content.
+        """
+        cache = self._content_cache
+        if cache is not None and cache[0] == self._state:
+            yield cache[1]
+            return
+        yield b''.join([
+            b'<ATMOSPHERE-GCM-PARAMETERS>',
+            self.header.encode(get_setting('encoding')),
+            b'\n<BINARY>'
+        ])
+        yield self.binary
+        yield b'</BINARY>'
     
     def altitude(self, mass: u.Quantity, radius: u.Quantity, mean_molecular_mass: float) -> u.Quantity:
         """
@@ -429,133 +537,99 @@ class PyGCM:
         z : u.Quantity
             The altitude of each grid point.
         """
-        pressure = self.pressure
-        temperature = self.temperature
-        nlayer, nlon, nlat = self.shape
-        z_unit = u.km
-        z = np.zeros(shape=(nlayer, nlon, nlat))
-        for i in range(nlayer-1):
-            pressure_bottom = pressure.dat[i, :, :].to(u.bar)
-            pressure_top = pressure.dat[i+1, :, :].to(u.bar)
-            dP = pressure_top - pressure_bottom
-            # pylint: disable-next=no-member
-            rho = mean_molecular_mass*u.Unit('g mol-1') * \
-                (pressure_bottom + 0.5*dP) / c.R / temperature.dat[i, :, :]
-            distance_from_planet_center = radius + z[i, :, :]*z_unit
-            # pylint: disable-next=no-member
-            accel_due_to_gravity = c.G * mass / distance_from_planet_center**2
-            dz = -dP / rho / accel_due_to_gravity
-            z[i+1, :, :] = z[i, :, :] + dz.to_value(z_unit)
-        return z*z_unit
-
-    @staticmethod
-    def _column_gas(
-        molecule: structure.Molecule,
-        pressure: u.Quantity,
-        temperature: u.Quantity,
-        altitude: u.Quantity
-    ) -> u.Quantity:
-        """
-        Get the column density of a gas.
-
-        Parameters
-        ----------
-        molecule : structure.Molecule
-            The molecule to get the column density of.
-        pressure : u.Quantity
-            The pressure at each grid point.
-        temperature : u.Quantity
-            The temperature at each grid point.
-        altitude : u.Quantity
-            The altitude at each grid point.
+        z = hydrostatic.altitude(
+            pressure=self.pressure.dat.to_value(u.bar),
+            temperature=self.temperature.dat.to_value(u.K),
+            molar_mass=(mean_molecular_mass*u.g/u.mol).to_value(u.kg/u.mol),
+            gm=(c.G*mass).to_value(u.m**3/u.s**2),  # pylint: disable=no-member
+            radius=radius.to_value(u.m)
+        )
+        return (z*u.m).to(u.km)
 
-        Returns
-        -------
-        u.Quantity
-            The column density of the gas.
-        """
-        abundance = molecule.dat.to(u.dimensionless_unscaled)
-        partial_pressure = pressure * abundance
-        heights = np.diff(altitude, axis=0)
-        # pylint: disable-next=no-member
-        surface_density: u.Quantity = partial_pressure[:-
-                                                       1] * heights / c.R / temperature[:-1]
-        return surface_density.sum(axis=0).to(u.mol/u.cm**2)
-
-    @staticmethod
-    def _column_aerosol(
-        aerosol: structure.Aerosol,
-        pressure: u.Quantity,
-        temperature: u.Quantity,
-        altitude: u.Quantity,
+    def column(
+        self,
+        var: str,
+        mass: u.Quantity,
+        radius: u.Quantity,
         mean_molecular_mass: float
     ):
         """
-        Get the column density of an aerosol.
+        Get a 2D column density map of a GCM variable.
 
         Parameters
         ----------
-        aerosol : structure.Aerosol
-            The aerosol to get the column density of.
-        pressure : u.Quantity
-            The pressure at each grid point.
-        temperature : u.Quantity
-            The temperature at each grid point.
-        altitude : u.Quantity
-            The altitude at each grid point.
+        var : str
+            The name of the variable to get the column density of.
+        mass : u.Quantity
+            The mass of the planet.
+        radius : u.Quantity
+            The radius of the planet.
         mean_molecular_mass : float
             The mean molecular mass of the atmosphere.
 
         Returns
         -------
         u.Quantity
-            The column density of the aerosol.
+            The column density of the variable. The unit depends on the type of variable.
         """
-        mass_frac = aerosol.dat.to_value(u.dimensionless_unscaled)[:-1,:,:]
-        heights = np.diff(altitude, axis=0)
-        mean_molecular_mass = mean_molecular_mass * u.g/u.mol
-        # pylint: disable-next=no-member
-        moles_of_gas_per_cm2 = pressure[:-1]*heights / c.R / temperature[:-1]
-        mass_of_gas_per_cm2 = moles_of_gas_per_cm2 * mean_molecular_mass
-        mass_of_aero_per_cm2 = mass_of_gas_per_cm2 * mass_frac
-        return mass_of_aero_per_cm2.sum(axis=0).to(u.kg/u.cm**2)
+        variable = self.__getattribute__(var)
+        if not isinstance(variable, structure.Variable3D):
+            raise ValueError(f'{var} is not a 3D variable.')
+        return self.columns(mass, radius, mean_molecular_mass, names=[var])[var]
 
-    def column(
+    def columns(
         self,
-        var: str,
         mass: u.Quantity,
         radius: u.Quantity,
-        mean_molecular_mass: float
-    ):
+        mean_molecular_mass: float,
+        names: List[str] = None
+    ) -> Dict[str, u.Quantity]:
         """
-        Get a 2D column density map of a GCM variable.
+        Get the 2D column density maps of several GCM variables.
+
+        The altitude is only found once for every variable.
 
         Parameters
         ----------
-        var : str
-            The name of the variable to get the column density of.
         mass : u.Quantity
             The mass of the planet.
         radius : u.Quantity
             The radius of the planet.
         mean_molecular_mass : float
             The mean molecular mass of the atmosphere.
+        names : list of str, optional
+            The variables to get the column density of. By default every
+            molecule and aerosol.
 
         Returns
         -------
-        u.Quantity
-            The column density of the variable. The unit depends on the type of variable.
+        dict
+            The column density of each variable, keyed by name, in
+            mol/cm2 for molecules and kg/cm2 for aerosols.
         """
-        variable = self.__getattribute__(var)
-        if not isinstance(variable, structure.Variable3D):
-            raise ValueError(f'{var} is not a 3D variable.')
-
-        pressure = self.pressure.dat.to(u.bar)
-        altitude = self.altitude(mass, radius, mean_molecular_mass)
-        temperature = self.temperature.dat.to(u.K)
-        if isinstance(variable, structure.Molecule):
-            return self._column_gas(variable, pressure, temperature, altitude)
-        elif isinstance(variable, structure.Aerosol):
-            return self._column_aerosol(variable, pressure, temperature, altitude, mean_molecular_mass)
+        if names is None:
+            variables = {variable.name: variable for variable in [*self.molecules, *self.aerosols]}
         else:
-            raise ValueError(f'{var} is not a molecule or aerosol.')
+            variables = {name: self.__getattribute__(name) for name in names}
+        for name, variable in variables.items():
+            if not isinstance(variable, (structure.Molecule, structure.Aerosol)):
+                raise ValueError(f'{name} is not a molecule or aerosol.')
+        molar_mass = (mean_molecular_mass*u.g/u.mol).to_value(u.kg/u.mol)
+        pressure = self.pressure.dat.to_value(u.Pa)
+        temperature = self.temperature.dat.to_value(u.K)
+        z = hydrostatic.altitude(
+            pressure=pressure,
+            temperature=temperature,
+            molar_mass=molar_mass,
+            gm=(c.G*mass).to_value(u.m**3/u.s**2),  # pylint: disable=no-member
+            radius=radius.to_value(u.m)
+        )
+        moles = hydrostatic.layer_moles(pressure, temperature, z)
+        columns = {}
+        for name, variable in variables.items():
+            fraction = variable.dat.to_value(u.dimensionless_unscaled)
+            if isinstance(variable, structure.Molecule):
+                columns[name] = (hydrostatic.gas_column(moles, fraction)*u.mol/u.m**2).to(u.mol/u.cm**2)
+            else:
+                columns[name] = (hydrostatic.aerosol_column(moles, molar_mass, fraction)*u.kg/u.m**2).to(u.kg/u.cm**2)
+        return columns
@@ -0,0 +1,134 @@
+"""
+Hydrostatic equilibrium
+-----------------------
+
+Kernels for the altitude and column densities of a GCM.
+
+Every function takes and returns plain ``float64`` arrays in SI units, with
+the layer along the first axis, so that units are applied once by the caller
+rather than on every layer.
+"""
+from typing import Union
+
+import numpy as np
+from astropy import constants as c
+
+GAS_CONSTANT = c.R.si.value  # pylint: disable=no-member
+"""
+The molar gas constant in J/mol/K.
+
+:type: float
+"""
+
+
+def altitude(
+    pressure: np.ndarray,
+    temperature: np.ndarray,
+    molar_mass: Union[float, np.ndarray],
+    gm: float,
+    radius: float
+) -> np.ndarray:
+    """
+    Integrate the equation of hydrostatic equilibrium up from the bottom layer.
+
+    Each layer is given the density at the mean pressure of it and the layer
+    above, and the gravity at its own altitude.
+
+    Parameters
+    ----------
+    pressure : np.ndarray
+        The pressure at each grid point, in any unit.
+    temperature : np.ndarray
+        The temperature at each grid point in K.
+    molar_mass : float or np.ndarray
+        The mean molar mass of the atmosphere in kg/mol, either one value
+        or one per grid point.
+    gm : float
+        The gravitational parameter of the planet in m3/s2.
+    radius : float
+        The radius of the bottom layer in m.
+
+    Returns
+    -------
+    np.ndarray
+        The altitude of each grid point in m, zero at the bottom layer.
+    """
+    pressure = np.asarray(pressure, dtype=float)
+    temperature = np.asarray(temperature, dtype=float)
+    molar_mass = np.asarray(molar_mass, dtype=float)
+    if molar_mass.ndim == pressure.ndim:
+        molar_mass = molar_mass[:-1]
+    dp = np.diff(pressure, axis=0)
+    # dz = -dP / (rho * g), where rho = m P_mid / (R T) and g = GM / r**2
+    scale = -dp / (pressure[:-1] + 0.5*dp) * (GAS_CONSTANT/gm) * temperature[:-1] / molar_mass
+    z = np.zeros(pressure.shape)
+    for i in range(pressure.shape[0] - 1):
+        r = radius + z[i]
+        z[i+1] = z[i] + scale[i]*r*r
+    return z
+
+
+def layer_moles(pressure: np.ndarray, temperature: np.ndarray, altitude: np.ndarray) -> np.ndarray:
+    """
+    The moles of gas per unit area in each layer.
+
+    Parameters
+    ----------
+    pressure : np.ndarray
+        The pressure at each grid point in Pa.
+    temperature : np.ndarray
+        The temperature at each grid point in K.
+    altitude : np.ndarray
+        The altitude of each grid point in m.
+
+    Returns
+    -------
+    np.ndarray
+        The moles per square metre between each layer and the one above it.
+        There is one layer fewer than in ``pressure``.
+    """
+    return pressure[:-1] * np.diff(altitude, axis=0) / GAS_CONSTANT / temperature[:-1]
+
+
+def gas_column(moles: np.ndarray, abundance: np.ndarray) -> np.ndarray:
+    """
+    The column density of a gas.
+
+    Parameters
+    ----------
+    moles : np.ndarray
+        The moles of gas per unit area in each layer, from ``layer_moles``.
+    abundance : np.ndarray
+        The volume mixing ratio of the gas at each grid point.
+
+    Returns
+    -------
+    np.ndarray
+        The column density in mol/m2.
+    """
+    return np.einsum('i...,i...->...', moles, abundance[:-1])
+
+
+def aerosol_column(moles: np.ndarray, molar_mass: Union[float, np.ndarray], mass_fraction: np.ndarray) -> np.ndarray:
+    """
+    The column mass density of an aerosol.
+
+    Parameters
+    ----------
+    moles : np.ndarray
+        The moles of gas per unit area in each layer, from ``layer_moles``.
+    molar_mass : float or np.ndarray
+        The mean molar mass of the atmosphere in kg/mol, either one value
+        or one per grid point.
+    mass_fraction : np.ndarray
+        The mass fraction of the aerosol at each grid point.
+
+    Returns
+    -------
+    np.ndarray
+        The column density in kg/m2.
+    """
+    molar_mass = np.asarray(molar_mass, dtype=float)
+    if molar_mass.ndim == mass_fraction.ndim:
+        molar_mass = molar_mass[:-1]
+    return np.einsum('i...,i...->...', moles*molar_mass, mass_fraction[:-1])
@@ -0,0 +1,203 @@
+"""
+Molecule database
+-----------------
+
+The HITRAN ID and molar mass of each gas that a GCM can hold, read once from
+``molec.json`` and shared by everything that needs them.
+"""
+from pathlib import Path
+from types import MappingProxyType
+from typing import Iterable, Iterator, Tuple, Union
+import functools
+import json
+
+import numpy as np
+
+from pypsg import settings
+
+MOLEC_DATA_PATH = Path(__file__).parent / 'molec.json'
+"""
+The file the database is read from.
+
+:type: pathlib.Path
+"""
+
+
+class MoleculeDatabase:
+    """
+    An immutable table of molecules.
+
+    Parameters
+    ----------
+    names : iterable of str
+        The name of each molecule.
+    ids : iterable of int
+        The HITRAN ID of each molecule.
+    masses : iterable of float
+        The molar mass of each molecule in g/mol.
+
+    Attributes
+    ----------
+    names : tuple of str
+        The name of each molecule, in the order of the table.
+    ids : np.ndarray
+        The HITRAN ID of each molecule. Read-only.
+    masses : np.ndarray
+        The molar mass of each molecule in g/mol. Read-only.
+
+    Examples
+    --------
+    >>> db = get_molecule_database()
+    >>> db.masses_of(['H2O', 'CO2'])
+    array([18.01528, 44.01   ])
+    """
+
+    def __init__(self, names: Iterable[str], ids: Iterable[int], masses: Iterable[float]):
+        self.names: Tuple[str, ...] = tuple(names)
+        self.ids = np.array(list(ids), dtype=int)
+        self.masses = np.array(list(masses), dtype=float)
+        if not len(self.names) == len(self.ids) == len(self.masses):
+            raise ValueError('There must be one ID and one mass per molecule.')
+        self.ids.flags.writeable = False
+        self.masses.flags.writeable = False
+        self._index = MappingProxyType({name: i for i, name in enumerate(self.names)})
+
+    @classmethod
+    def from_json(cls, path: Union[Path, str] = MOLEC_DATA_PATH):
+        """
+        Read a database from a JSON file.
+
+        Parameters
+        ----------
+        path : pathlib.Path or str, optional
+            A file mapping each name to its ``"ID"`` and ``"mass"``.
+            By default the file that ships with ``pypsg``.
+        """
+        with open(path, 'rt', encoding='UTF-8') as file:
+            data: dict = json.loads(file.read())
+        return cls(
+            names=data.keys(),
+            ids=(molec['ID'] for molec in data.values()),
+            masses=(molec['mass'] for molec in data.values())
+        )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._index
+
+    def index(self, names: Iterable[str]) -> np.ndarray:
+        """
+        The position of each molecule in the table.
+
+        Parameters
+        ----------
+        names : iterable of str
+            The molecules to look up.
+
+        Returns
+        -------
+        np.ndarray
+            The positions, to index ``ids`` or ``masses`` with.
+
+        Raises
+        ------
+        KeyError
+            If a molecule is not in the table.
+        """
+        try:
+            return np.array([self._index[name] for name in names], dtype=int)
+        except KeyError as err:
+            raise KeyError(f'{err.args[0]} is not in the molecule database.') from err
+
+    def id(self, name: str) -> int:
+        """
+        The HITRAN ID of a molecule.
+        """
+        return int(self.ids[self.index([name])[0]])
+
+    def mass(self, name: str) -> float:
+        """
+        The molar mass of a molecule in g/mol.
+        """
+        return float(self.masses[self.index([name])[0]])
+
+    def masses_of(self, names: Iterable[str]) -> np.ndarray:
+        """
+        The molar mass of each of several molecules.
+
+        Parameters
+        ----------
+        names : iterable of str
+            The molecules to look up.
+
+        Returns
+        -------
+        np.ndarray
+            The masses in g/mol.
+        """
+        return self.masses[self.index(names)]
+
+    def ids_of(self, names: Iterable[str]) -> np.ndarray:
+        """
+        The HITRAN ID of each of several molecules.
+
+        Parameters
+        ----------
+        names : iterable of str
+            The molecules to look up.
+
+        Returns
+        -------
+        np.ndarray
+            The IDs.
+        """
+        return self.ids[self.index(names)]
+
+    def opacity_type(self, name: str) -> str:
+        """
+        The opacity database for PSG to use for a molecule.
+
+        It is read from ``settings.atmosphere_type_dict``, which gives
+        each molecule in this database its HITRAN entry unless it is
+        overridden.
+
+        Parameters
+        ----------
+        name : str
+            The molecule.
+
+        Returns
+        -------
+        str
+            The value to give PSG, e.g. ``'HIT[1]'``.
+
+        Raises
+        ------
+        KeyError
+            If no opacity database is set for the molecule.
+        """
+        try:
+            mtype = settings.atmosphere_type_dict[name]
+        except KeyError as err:
+            raise KeyError(f'No opacity database is set for {name}.') from err
+        return f'HIT[{mtype}]' if isinstance(mtype, int) else mtype
+
+
+@functools.cache
+def get_molecule_database() -> MoleculeDatabase:
+    """
+    Get the database that ships with ``pypsg``.
+
+    It is read the first time it is needed.
+
+    Returns
+    -------
+    MoleculeDatabase
+        The database.
+    """
+    return MoleculeDatabase.from_json(MOLEC_DATA_PATH)
@@ -50,10 +50,20 @@ class Variable(ABC):
         The array is of dtype 'float32' and the flattening order is 'C'. This is the
         format in which PSG assumes GCM binaries are written.
 
+    write_flat(out: np.ndarray) -> None:
+        Writes the same values as ``flat`` into an existing array.
+
     shape() -> Tuple[int]:
         Returns the shape of the data values of the variable as a tuple of integers.
 
+    Notes
+    -----
+    ``_version`` counts the attributes set, so that the binary of a GCM is
+    only encoded again after it changes. ``dat`` is stored as a read-only
+    view, so assign new data rather than changing it in place. The view is
+    not a copy, so do not change the array that was assigned either.
     """
+    _version = 0
 
     def __init__(
         self,
@@ -69,6 +79,13 @@ class Variable(ABC):
         self.psg_unit = psg_unit
         self.dat = dat
 
+    def __setattr__(self, __name: str, __value) -> None:
+        if __name == 'dat' and isinstance(__value, np.ndarray) and __value.flags.writeable:
+            __value = __value.view()
+            __value.flags.writeable = False
+        super().__setattr__(__name, __value)
+        super().__setattr__('_version', self._version + 1)
+
     @property
     def flat(self) -> np.ndarray:
         """
@@ -84,15 +101,36 @@ class Variable(ABC):
         np.array
             The flattened array.
         """
-        if self.dat.ndim == 1:
-            return self.dat.to_value(self.psg_unit).astype(DTYPE).flatten('C')
-        if self.dat.ndim == 2:
-            axes = (0, 1)
-            return np.swapaxes(self.dat.to_value(self.psg_unit).astype(DTYPE), *axes).flatten('C')
-            # return self.dat.to_value(self.psg_unit).T[:,::-1].astype(DTYPE).flatten('C')
-        else:
-            axes = (1, 2)
-        return np.swapaxes(self.dat.to_value(self.psg_unit).astype(DTYPE), *axes).flatten('C')
+        out = np.empty(self.dat.size, dtype=DTYPE)
+        self.write_flat(out)
+        return out
+
+    def write_flat(self, out: np.ndarray) -> None:
+        """
+        Write the flattened data into an existing array.
+
+        The values are converted to ``psg_unit``, transposed and cast as
+        they are written, so no flattened copy is made.
+
+        Parameters
+        ----------
+        out : np.ndarray
+            A contiguous 1D array with one element per data value, usually
+            a slice of the binary of a whole GCM.
+
+        Raises
+        ------
+        ValueError
+            If ``out`` is not the size of the data.
+        """
+        if out.size != self.dat.size:
+            raise ValueError(f'out must have {self.dat.size} elements, not {out.size}.')
+        values = self.dat.to_value(self.psg_unit)
+        if values.ndim == 2:
+            values = np.swapaxes(values, 0, 1)
+        elif values.ndim > 2:
+            values = np.swapaxes(values, 1, 2)
+        out.reshape(values.shape)[...] = values
 
     @property
     def shape(self) -> tuple:
@@ -4,4 +4,5 @@ Whole Atmosphere Community Climate Model (WACCM) module
 """
 
 from .waccm import to_pygcm as waccm_to_pygcm
+from .waccm import to_pygcm_series as waccm_to_pygcm_series
 from .waccm import download_test_data as download_waccm_test_data
@@ -11,8 +11,9 @@ written by Geronimo Villanueva
 
 """
 import warnings
+from itertools import islice
 import requests
-from typing import Tuple, Type
+from typing import Dict, Iterable, Iterator, Tuple, Type
 from netCDF4 import Dataset
 from astropy import units as u
 import numpy as np
@@ -27,6 +28,12 @@ EMISSIVITY_DEFAULT = 1.0
 DEFAULT_DESCRIPTION = 'Whole Atmosphere Community Climate Model (WACCM)'
 TEST_URL = 'https://zenodo.org/records/10426886/files/vspec_waccm_test.nc?#mode=bytes'
 TEST_PATH = USER_DATA_PATH / 'data' / 'waccm_test.nc'
+BLOCK_SIZE = 8
+"""
+The default number of timesteps read at once by ``to_pygcm_series``.
+
+:type: int
+"""
 
 REQUIRED_VARIABLES = [
     "hyam",
@@ -557,6 +564,171 @@ def to_pygcm(
     )
 
 
+class _BlockVariable:
+    """
+    A variable of a dataset, read once for a block of timesteps.
+
+    Indexing with a timestep in the block gives the same array as indexing
+    the variable itself. Other attributes, such as ``units``, are those of
+    the variable.
+
+    Parameters
+    ----------
+    variable : netCDF4.Variable
+        The variable to read.
+    times : np.ndarray or None
+        The sorted timesteps of the block, or None if the variable does not
+        depend on time.
+    """
+
+    def __init__(self, variable, times: np.ndarray = None):
+        self._variable = variable
+        self._times = times
+        self._dat = None
+        self.shape = variable.shape
+
+    def __getattr__(self, name: str):
+        return getattr(self._variable, name)
+
+    def _read(self) -> np.ma.MaskedArray:
+        if self._dat is None:
+            times = self._times
+            if times is None:
+                self._dat = self._variable[:]
+            elif times[-1] - times[0] + 1 == len(times):
+                self._dat = self._variable[times[0]:times[-1]+1]
+            else:
+                self._dat = self._variable[times]
+        return self._dat
+
+    def __getitem__(self, key):
+        dat = self._read()
+        if self._times is None:
+            if isinstance(key, slice) and key == slice(None):
+                # also for scalars, such as ``P0``
+                return dat
+            if isinstance(key, tuple) and len(key) > dat.ndim:
+                # as raised by netCDF4
+                raise ValueError('slicing expression exceeds the number of dimensions of the variable')
+            return dat[key]
+        key = key if isinstance(key, tuple) else (key,)
+        itime = key[0]
+        if isinstance(itime, (int, np.integer)):
+            position = np.searchsorted(self._times, itime)
+            if position < len(self._times) and self._times[position] == itime:
+                return dat[(position,) + key[1:]]
+        return self._variable[key]
+
+
+class _BlockDataset:
+    """
+    A dataset whose variables are each read once for a block of timesteps.
+
+    Variables that do not depend on time are shared between blocks
+    through ``static``.
+
+    Parameters
+    ----------
+    data : netCDF4.Dataset
+        The dataset to read.
+    times : np.ndarray
+        The sorted timesteps of the block.
+    static : dict
+        The variables that do not depend on time, by name. Updated as they
+        are read.
+    """
+
+    def __init__(self, data: Dataset, times: np.ndarray, static: Dict[str, _BlockVariable]):
+        self._data = data
+        self._times = times
+        self._static = static
+        self._time_dimension = data.variables['T'].dimensions[0]
+        self._variables: Dict[str, _BlockVariable] = {}
+
+    @property
+    def variables(self) -> '_BlockDataset':
+        return self
+
+    def __getitem__(self, name: str) -> _BlockVariable:
+        if name in self._variables:
+            return self._variables[name]
+        if name in self._static:
+            return self._static[name]
+        variable = self._data.variables[name]
+        if variable.dimensions[:1] == (self._time_dimension,):
+            self._variables[name] = _BlockVariable(variable, self._times)
+            return self._variables[name]
+        self._static[name] = _BlockVariable(variable)
+        return self._static[name]
+
+
+def to_pygcm_series(
+    data: Dataset,
+    itimes: Iterable[int],
+    molecules: list,
+    aerosols: list,
+    background=None,
+    lon_start: float = -180.,
+    lat_start: float = -90.,
+    desc: str = DEFAULT_DESCRIPTION,
+    block_size: int = BLOCK_SIZE
+) -> Iterator[PyGCM]:
+    """
+    Convert several timesteps of a WACCM dataset to Planet objects.
+
+    The timesteps are taken ``block_size`` at a time. Each variable is read
+    from the file once per block, as a single slab, and variables that do
+    not depend on time, such as ``hyam`` and ``P0``, are read once for the
+    whole series. Each GCM is the same as the one given by ``to_pygcm``.
+
+    Parameters
+    ----------
+    data : netCDF4.Dataset
+        The GCM dataset.
+    itimes : iterable of int
+        The time indices, in the order to convert them.
+    molecules : list
+        The variable names of the molecules.
+    aerosols : list
+        The variable names of the aerosols.
+    background : str, optional
+        The optional background gas to assume.
+    lon_start : float, optional
+        The starting longitude of the GCM. Defaults to -180.
+    lat_start : float, optional
+        The starting latitude of the GCM. Defaults to -90.
+    desc : str, optional
+        A description of the GCM.
+    block_size : int, optional
+        The number of timesteps to read at once. Larger blocks need fewer
+        reads and more memory.
+
+    Yields
+    ------
+    PyGCM
+        The GCM at each time index, converted when it is asked for.
+
+    Examples
+    --------
+    >>> with Dataset(path) as data:
+    ...     for gcm in to_pygcm_series(data, range(365), ['CO2', 'H2O'], None):
+    ...         ...
+    """
+    if block_size < 1:
+        raise ValueError(f'block_size must be at least 1, not {block_size}.')
+    n_time, *_ = get_shape(data)
+    static: Dict[str, _BlockVariable] = {}
+    itimes = iter(itimes)
+    while True:
+        # negative indices count from the end, as in ``to_pygcm``
+        block = [range(n_time)[itime] for itime in islice(itimes, block_size)]
+        if not block:
+            return
+        view = _BlockDataset(data, np.unique(block), static)
+        for itime in block:
+            yield to_pygcm(view, itime, molecules, aerosols, background, lon_start, lat_start, desc)
+
+
 def download_test_data(rewrite=False):
     """
     Download the WACCM test data.
@@ -1,8 +1,9 @@
 """
 PSG Layer files
 """
-from typing import Tuple, List
+from typing import Tuple, List, Union
 from pathlib import Path
+import io
 import re
 import numpy as np
 from astropy import units as u
@@ -11,6 +12,8 @@ from astropy.io import fits
 
 from pypsg.cfg.base import Profile
 from pypsg import settings
+from pypsg.memo import memoize
+from pypsg.parse import remove_cr, split_lines
 
 class PyLyr:
     """
@@ -18,6 +21,7 @@ class PyLyr:
     """
     PROF_EXT = 'PROFILE'
     CG_EXT = "CG"
+    _MEMO_ATTRS = ('prof', 'cg')
     def __init__(
         self,
         prof:QTable,
@@ -28,88 +32,123 @@ class PyLyr:
         self.cg = cg
         self.cg.meta['EXTNAME'] = self.CG_EXT
     
+    _TABLE_CHARS = b'0123456789e-+. \t\f\v'
+    _METADATA_PREFIXES = (
+        ('molecules', b'# Molecules considered: '),
+        ('molec_sources', b'# Molecular sources: '),
+        ('molec_abuns', b'# Molecular abundances: '),
+        ('molec_abun_units', b'# Molecular abundance units: '),
+        ('aerosols', b'Aerosols considered: '),
+        ('aero_sources', b'Aerosols sources: '),
+        ('aero_abns', b'Aerosols abundances: '),
+        ('aero_abn_units', b'Aerosol abundance units: '),
+        ('aero_sizes', b'Aerosol sizes: '),
+        ('aero_size_units', b'Aerosol size units: '),
+    )
+    _REQUIRED_METADATA = ('molecules', 'molec_sources', 'molec_abuns', 'molec_abun_units')
+
+    @classmethod
+    def _table_row(cls, line:bytes):
+        """
+        Classify a line of a .lyr file.
+
+        Returns None if the line is not part of a table, the numbers in the
+        line (without the ``#``) if it is a row, and an empty bytes object if
+        it separates two tables.
+        """
+        start = line.rfind(b'#')
+        if start == -1:
+            return None
+        rest = line[start+1:]
+        if len(rest) < 2 or rest[0] != 32 or rest.translate(None, cls._TABLE_CHARS):
+            return None
+        return rest if b'.' in rest else b''
+
     @staticmethod
-    def _parse(text:str)->Tuple[dict,str,str,str]:
-        metadata = {}
-        other_data = {}
-        def find(s:str):
-            """TODO: Change all below to use this func.
-            If something break this is probably why."""
-            try:
-                return re.findall(s,text)[0]
-            except IndexError:
-                return None
-        # metadata['source'] = re.findall(r'# (NASA-GSFC.*)',text)[0]
-        # metadata['scattering'] = re.findall(r'# (.*), LMAX',text)[0]
-        # metadata['date'] = re.findall(r'# Synthesized on (.*)',text)[0]
-        # metadata['rad_tran_method'] = re.findall(r'# Radiative transfer method: (.*)',text)[0]
-        # syn_res_unit = u.Unit(
-        #     re.findall(r'# Synthesis resolution \[(.*)\]',text)[0]
-        # )
-        # syn_res_val, l_over_dl, points, fine_scalar =  re.findall(
-        #     r'# Synthesis resolution .*: (.*)',text
-        # )[0].split(' ')
-        # metadata['syn_res'] = float(syn_res_val) * syn_res_unit
-        # metadata['l_over_dl'] = float(l_over_dl)
-        # metadata['points'] = float(points)
-        # metadata['fine_scalar'] = float(fine_scalar)
-        
-        # metadata['profile_source'] = re.findall(r'# Molecular abundance profile: (.*)',text)[0]
-        metadata['molecules'] = re.findall(r'# Molecules considered: (.*)',text)[0]
-        metadata['molec_sources'] = re.findall(r'# Molecular sources: (.*)',text)[0]
-        metadata['molec_abuns'] = re.findall(r'# Molecular abundances: (.*)',text)[0]
-        metadata['molec_abun_units'] = re.findall(r'# Molecular abundance units: (.*)',text)[0]
-        # metadata['collisional'] = re.findall(r'# Collissional partners (.*)',text)[0]
-        # metadata['uv_cross_sections'] = find(r'UV cross-sections included: (.*)')
-        # metadata['cia'] = re.findall(r'# Collision-Induced-Absorption: (.*)',text)[0]
-        # metadata['molec_rayleigh'] = re.findall(r'# Molecular Rayleigh (.*)',text)[0]
-        # rmax_minus_1, bending = re.findall(r'# Refraction .*: (.*)',text)[0].split(' ')
-        # bending_unit = u.Unit(re.findall(r'# Refraction .* bending \[(.*)\]',text)[0])
-        # metadata['rmax_minus_1'] = float(rmax_minus_1)
-        # metadata['bending'] = float(bending) * bending_unit
-        
-        metadata['aerosols'] = find(r'Aerosols considered: (.*)')
-        metadata['aero_sources'] = find(r'Aerosols sources: (.*)')
-        metadata['aero_abns'] = find(r'Aerosols abundances: (.*)')
-        metadata['aero_abn_units'] = find(r'Aerosol abundance units: (.*)')
-        metadata['aero_sizes'] = find(r'Aerosol sizes: (.*)')
-        metadata['aero_size_units'] = find(r'Aerosol size units: (.*)')
-        
-        other_data['tab1_names'] = re.findall(r'#[ ]*(Alt\[km\].*)',text)[0]
-        other_data['tab2_names'] = re.findall(r'#[ ]*(Alt\[km\].*)',text)[0]
-        
+    def _integrated(line:bytes):
+        """
+        Get the values from an ``Integrated ...`` line.
+        """
+        start = line.find(b'Integrated')
+        while start != -1:
+            pos = start + len(b'Integrated')
+            end = pos
+            while end < len(line) and line[end:end+1] in b'abcdefghijklmnopqrstuvwxyz ':
+                end += 1
+            if end > pos:
+                return line[end:]
+            start = line.find(b'Integrated', pos)
+        return None
+
+    @classmethod
+    def _tokenize(cls, b:Union[bytes,memoryview])->Tuple[dict,dict,np.ndarray,np.ndarray,str]:
+        """
+        Read the metadata, the two tables and the integrated values in one
+        pass over the lines of a .lyr file.
+
+        Parameters
+        ----------
+        b : bytes or memoryview
+            The content of the file, without carriage returns. A memoryview
+            is split into lines without being copied first.
 
-        possible_table_lines =re.compile(r"(#[ ]+[\de\-\+\.\s]+)\n").findall(text,re.MULTILINE)
+        Returns
+        -------
+        dict
+            The molecule and aerosol metadata.
+        dict
+            The column names of the two tables.
+        np.ndarray
+            The profile table.
+        np.ndarray
+            The column density table.
+        str
+            The integrated values.
+        """
+        metadata = {key: None for key, _ in cls._METADATA_PREFIXES}
+        names = None
+        integrated_vals = None
         tabs = []
         current_tab = []
-        for line in possible_table_lines:
-            if not '.' in line:
-                if len(current_tab) == 0:
-                    pass
-                else:
+        for line in split_lines(b):
+            row = cls._table_row(line)
+            if row is not None:
+                if row:
+                    current_tab.append(row)
+                elif current_tab:
                     tabs.append(current_tab)
                     current_tab = []
-            else:
-                current_tab.append(line)
-        tab1_raw = '\n'.join(tabs[0])
-        tab2_raw = '\n'.join(tabs[1])
-                
-        
-        # tab1_raw = re.findall(
-        #     r'Alt.*\n.*\n((# +\d[ \d.einf\-\+]+\n)+)',
-        #     text
-        # )[0]
-        
-        # tab2_raw = re.findall(
-        #     r'Low.*\n.*\n((# +\d[ \d.einf\-\+]+\n)+)',
-        #     text
-        # )[0]
-        
-        integrated_vals = re.findall(
-            r'Integrated[a-z ]+(.*)',text
-        )[0]
-        return metadata, other_data, tab1_raw, tab2_raw, integrated_vals
-    
+                continue
+            for key, prefix in cls._METADATA_PREFIXES:
+                if metadata[key] is None:
+                    pos = line.find(prefix)
+                    if pos != -1:
+                        metadata[key] = line[pos+len(prefix):]
+            if names is None:
+                pos = line.find(b'Alt[km]')
+                if pos != -1 and line[:pos].rstrip(b' ').endswith(b'#'):
+                    names = line[pos:]
+            if integrated_vals is None:
+                integrated_vals = cls._integrated(line)
+        for key in cls._REQUIRED_METADATA:
+            if metadata[key] is None:
+                raise IndexError(f'The .lyr file has no {key} line.')
+        if names is None:
+            raise IndexError('The .lyr file has no Alt[km] header.')
+        if integrated_vals is None:
+            raise IndexError('The .lyr file has no integrated values.')
+        encoding = settings.get_setting('encoding')
+        metadata = {
+            key: None if value is None else value.decode(encoding)
+            for key, value in metadata.items()
+        }
+        names = names.decode(encoding)
+        # both tables are labelled with the first header
+        other_data = {'tab1_names': names, 'tab2_names': names}
+        tab1 = cls._parse_tab_data(tabs[0])
+        tab2 = cls._parse_tab_data(tabs[1])
+        return metadata, other_data, tab1, tab2, integrated_vals.decode(encoding)
+
     @staticmethod
     def _get_tab_cols(
         raw_names:list,
@@ -146,10 +185,8 @@ class PyLyr:
                 units.append(unit)
         return names, units
     @staticmethod
-    def _parse_tab_data(tab_raw:str)->np.ndarray:
-        return np.array([
-            np.fromstring(line[1:],sep=' ') for line in tab_raw.split('\n')
-        ])
+    def _parse_tab_data(rows:List[bytes])->np.ndarray:
+        return np.loadtxt(io.BytesIO(b'\n'.join(rows)), dtype=np.float64, comments=None, ndmin=2)
     
     @staticmethod
     def _build_tab(
@@ -166,14 +203,14 @@ class PyLyr:
     
     
     @classmethod
-    def from_bytes(cls, b: bytes):
+    @memoize
+    def from_bytes(cls, b: Union[bytes, memoryview]):
         """
-        From a bytes object read from a .lyr file
+        From a bytes object or memoryview read from a .lyr file
         """
-        b = b.replace(b'\r',b'')
-        s = b.decode(settings.get_setting('encoding'))
+        b = remove_cr(b)
         
-        metadata, other_data, tab1_raw, tab2_raw, integrated_vals = cls._parse(s)
+        metadata, other_data, tab1_dat, tab2_dat, _ = cls._tokenize(b)
         tab1_names, tab1_units = cls._get_tab_cols(
             other_data['tab1_names'].split(),
             u.dimensionless_unscaled,
@@ -181,7 +218,6 @@ class PyLyr:
             molecs=metadata['molecules'],
             aeros=metadata['aerosols']
         )
-        tab1_dat = cls._parse_tab_data(tab1_raw)
         
         tab2_names, tab2_units = cls._get_tab_cols(
             other_data['tab2_names'].split(),
@@ -190,7 +226,6 @@ class PyLyr:
             molecs=metadata['molecules'],
             aeros=metadata['aerosols']
         )
-        tab2_dat = cls._parse_tab_data(tab2_raw)
         
         tab1 = cls._build_tab(
             tab1_names,
@@ -0,0 +1,257 @@
+"""
+PyPSG Parse Memo
+----------------
+
+An in-process memo of parsed PSG outputs.
+
+Parsing the same ``.rad`` or ``.lyr`` payload more than once returns the
+object that was built the first time instead of parsing again. Payloads are
+identified by a digest of their bytes, and the memo is bounded by the memory
+used by the parsed objects rather than by the number of entries. A reply
+that holds several files is not memoized as a whole; each file in it is.
+
+Cached tables are made read-only. Each lookup returns a new table that shares
+the read-only column data, so callers may add, remove or replace columns on
+their copy, but cannot modify the cached values in place.
+
+The memo is disabled by default. Turn it on with :func:`enable`.
+"""
+from typing import Any, Callable, Dict, Hashable, Tuple
+from collections import OrderedDict
+from copy import deepcopy
+import functools
+import hashlib
+import threading
+
+from astropy.table import Table
+
+DEFAULT_MAX_BYTES = 256*1024**2
+"""
+The default memory budget used by :func:`enable`, 256 MiB.
+
+:type: int
+"""
+
+
+def _nbytes(obj: Any, fallback: int) -> int:
+    """
+    Estimate the memory held by a parsed object.
+    """
+    if isinstance(obj, Table):
+        return sum(col.nbytes for col in obj.itercols())
+    attrs = getattr(obj, '_MEMO_ATTRS', None)
+    if attrs is not None:
+        return sum(_nbytes(getattr(obj, attr), 0) for attr in attrs)
+    return fallback
+
+
+def _freeze(obj: Any):
+    """
+    Make the data of a parsed object read-only.
+    """
+    if isinstance(obj, Table):
+        for col in obj.itercols():
+            col.flags.writeable = False
+        return None
+    for attr in getattr(obj, '_MEMO_ATTRS', ()):
+        _freeze(getattr(obj, attr))
+
+
+def _share(obj: Any) -> Any:
+    """
+    Get a new object that shares the read-only data of a cached one.
+    """
+    if obj is None:
+        return None
+    if isinstance(obj, Table):
+        return obj.copy(copy_data=False)
+    attrs = getattr(obj, '_MEMO_ATTRS', None)
+    if attrs is not None:
+        new = object.__new__(obj.__class__)
+        new.__dict__.update(obj.__dict__)
+        for attr in attrs:
+            setattr(new, attr, _share(getattr(obj, attr)))
+        return new
+    return deepcopy(obj)
+
+
+class ParsedMemo:
+    """
+    A byte-bounded LRU memo of parsed objects.
+
+    Parameters
+    ----------
+    max_bytes : int
+        The maximum memory held by the memoized objects. Zero disables the memo.
+
+    Attributes
+    ----------
+    max_bytes : int
+        The maximum memory held by the memoized objects.
+    hits : int
+        The number of lookups that found a parsed object.
+    misses : int
+        The number of lookups that had to parse.
+    """
+
+    def __init__(self, max_bytes: int = 0):
+        if max_bytes < 0:
+            raise ValueError('max_bytes cannot be negative.')
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, Tuple[Any, int]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """
+        True if the memo stores anything.
+
+        :type: bool
+        """
+        return self.max_bytes > 0
+
+    @property
+    def size(self) -> int:
+        """
+        The estimated memory held by the memoized objects, in bytes.
+
+        :type: int
+        """
+        return self._size
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        Hit and miss counters, and the current size of the memo.
+
+        :type: dict
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(self._entries),
+            'size': self._size
+        }
+
+    @staticmethod
+    def digest(payload: bytes) -> bytes:
+        """
+        Identify a payload.
+
+        Parameters
+        ----------
+        payload : bytes
+            The raw bytes to be parsed.
+
+        Returns
+        -------
+        bytes
+            A 128-bit digest of ``payload``.
+        """
+        return hashlib.blake2b(payload, digest_size=16).digest()
+
+    def lookup(self, key: Hashable, payload: bytes, parse: Callable[[], Any]) -> Any:
+        """
+        Get a parsed object, parsing it only if it is not memoized.
+
+        Parameters
+        ----------
+        key : hashable
+            Identifies what ``parse`` builds, e.g. the class being parsed.
+        payload : bytes
+            The raw bytes to be parsed.
+        parse : callable
+            Called with no arguments to parse ``payload`` on a miss.
+
+        Returns
+        -------
+        Any
+            The parsed object. Tables share read-only data with the memo.
+        """
+        if not self.enabled:
+            return parse()
+        key = (key, self.digest(payload))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return _share(entry[0])
+            self.misses += 1
+        obj = parse()
+        _freeze(obj)
+        size = _nbytes(obj, len(payload))
+        if size <= self.max_bytes:
+            with self._lock:
+                if key not in self._entries:
+                    self._entries[key] = (obj, size)
+                    self._size += size
+                    self._evict()
+        return _share(obj)
+
+    def _evict(self):
+        """
+        Drop the least recently used objects until the memo fits.
+        """
+        while self._size > self.max_bytes and len(self._entries) > 0:
+            _, (_, size) = self._entries.popitem(last=False)
+            self._size -= size
+
+    def clear(self):
+        """
+        Drop every memoized object and reset the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self.hits = 0
+            self.misses = 0
+
+
+memo = ParsedMemo()
+"""
+The memo shared by every ``from_bytes`` parser.
+
+:type: ParsedMemo
+"""
+
+
+def enable(max_bytes: int = DEFAULT_MAX_BYTES):
+    """
+    Turn on memoization of parsed PSG outputs.
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        The maximum memory held by the memoized objects.
+    """
+    if max_bytes < 0:
+        raise ValueError('max_bytes cannot be negative.')
+    with memo._lock:
+        memo.max_bytes = max_bytes
+        memo._evict()
+
+
+def disable():
+    """
+    Turn off memoization and drop every memoized object.
+    """
+    memo.max_bytes = 0
+    memo.clear()
+
+
+def memoize(from_bytes: Callable) -> Callable:
+    """
+    Memoize a ``from_bytes(cls, b)`` parser.
+
+    Apply this below ``@classmethod``.
+    """
+    @functools.wraps(from_bytes)
+    def wrapper(cls, b: bytes):
+        if not memo.enabled:
+            return from_bytes(cls, b)
+        return memo.lookup(cls, b, lambda: from_bytes(cls, b))
+    return wrapper
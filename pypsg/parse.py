@@ -0,0 +1,369 @@
+"""
+PyPSG text table parsing
+------------------------
+
+Fast parsing of the text tables PSG returns.
+
+Files such as ``.rad`` and ``.trn`` are a block of ``#`` comment lines
+followed by whitespace-separated numbers. The numbers are parsed in a single
+call to NumPy's C reader rather than line by line.
+
+Replies that hold several files, such as those of type ``all``, are split
+into sections by offset, so the reply is not copied to find them. The
+sections can also be found while the reply is still being received.
+"""
+from typing import Iterator, List, Tuple, Union
+import io
+import re
+import numpy as np
+
+from pypsg import settings
+
+COMMENT = b'#'
+SECTION_MARKER = b'results_'
+_WORD = frozenset(b'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_')
+_WHITESPACE = frozenset(b' \t\n\r\x0b\x0c')
+_INCOMPLETE = object()
+
+
+def _find(b: Union[bytes, memoryview], sub: bytes, start: int = 0) -> int:
+    """
+    ``b.find(sub, start)``, which also works on a memoryview without copying it.
+    """
+    if isinstance(b, memoryview):
+        match = re.compile(re.escape(sub)).search(b, start)
+        return -1 if match is None else match.start()
+    return b.find(sub, start)
+
+
+def split_lines(b: Union[bytes, memoryview]) -> List[bytes]:
+    """
+    ``b.split(b'\\n')``, which also works on a memoryview without copying it.
+
+    Parameters
+    ----------
+    b : bytes or memoryview
+        The content of the file.
+
+    Returns
+    -------
+    list of bytes
+        The lines.
+    """
+    if isinstance(b, memoryview):
+        return re.split(b'\n', b)
+    return b.split(b'\n')
+
+
+def remove_cr(b: Union[bytes, memoryview]) -> Union[bytes, memoryview]:
+    """
+    Remove the carriage returns from ``b``.
+
+    ``b`` is only copied if it contains any.
+
+    Parameters
+    ----------
+    b : bytes or memoryview
+        The content of the file.
+
+    Returns
+    -------
+    bytes or memoryview
+        The content without carriage returns.
+    """
+    if _find(b, b'\r') == -1:
+        return b
+    return bytes(b).replace(b'\r', b'')
+
+
+class _ViewReader(io.RawIOBase):
+    """
+    A file that reads from a memoryview, so it is not copied all at once.
+    """
+    def __init__(self, view: memoryview):
+        super().__init__()
+        self._view = view
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        n = min(len(buffer), len(self._view) - self._pos)
+        buffer[:n] = self._view[self._pos:self._pos+n]
+        self._pos += n
+        return n
+
+
+def _as_file(b: Union[bytes, memoryview]) -> io.BufferedIOBase:
+    """
+    A file to read ``b`` from.
+    """
+    if isinstance(b, memoryview):
+        return io.BufferedReader(_ViewReader(b))
+    return io.BytesIO(b)
+
+
+def _split_comment_lines(b: Union[bytes, memoryview]) -> Tuple[List[bytes], bytes]:
+    """
+    Separate the comment lines from the data.
+
+    This handles comment lines anywhere in the file.
+    """
+    header = []
+    data = []
+    for line in split_lines(b):
+        if line.startswith(COMMENT):
+            header.append(line)
+        elif len(line) > 0:
+            data.append(line)
+    return header, b'\n'.join(data)
+
+
+def split_header(b: Union[bytes, memoryview]) -> Tuple[str, Union[bytes, memoryview]]:
+    """
+    Separate the comment lines from the data.
+
+    Parameters
+    ----------
+    b : bytes or memoryview
+        The content of the file.
+
+    Returns
+    -------
+    str
+        The comment lines, joined by newlines.
+    bytes or memoryview
+        The data. It is a view of ``b`` if ``b`` is a memoryview with all of
+        its comment lines before the data.
+    """
+    b = remove_cr(b)
+    header = []
+    pos = 0
+    # PSG writes every comment line before the data, so only walk the header
+    while b[pos:pos+len(COMMENT)] == COMMENT:
+        end = _find(b, b'\n', pos)
+        if end == -1:
+            end = len(b)
+        header.append(bytes(b[pos:end]))
+        pos = end + 1
+    data = b[pos:]
+    if _find(data, COMMENT) != -1:
+        more_header, data = _split_comment_lines(data)
+        header += more_header
+    encoding = settings.get_setting('encoding')
+    return '\n'.join(line.decode(encoding) for line in header), data
+
+
+def parse_table(b: Union[bytes, memoryview]) -> Tuple[str, np.ndarray]:
+    """
+    Parse a commented table of numbers.
+
+    Parameters
+    ----------
+    b : bytes or memoryview
+        The content of the file. A memoryview is read without being copied.
+
+    Returns
+    -------
+    str
+        The comment lines, joined by newlines.
+    np.ndarray
+        The numbers, with one row per line of data.
+
+    Raises
+    ------
+    ValueError
+        If the lines of data do not all have the same number of values.
+    """
+    header, data = split_header(b)
+    start, end = _strip(data, 0, len(data))
+    if start == end:
+        return header, np.empty((0, 0))
+    values = np.loadtxt(_as_file(data), dtype=np.float64, comments=None, ndmin=2)
+    return header, values
+
+
+def _match_marker(b: Union[bytes, bytearray], start: int, final: bool = True):
+    """
+    Match ``results_<name>.txt`` at ``start``.
+
+    Like the pattern ``results_([\\w]+).txt``, the name is the longest run of
+    word characters that is followed by any character but a newline and
+    then ``txt``.
+
+    Returns
+    -------
+    tuple or None
+        The name and the end of the marker, or None if there is no match.
+        If ``final`` is False and more data could complete the match,
+        ``_INCOMPLETE`` is returned instead.
+    """
+    pos = start + len(SECTION_MARKER)
+    end = pos
+    n = len(b)
+    while end < n and b[end] in _WORD:
+        end += 1
+    if end == n and not final:
+        return _INCOMPLETE
+    for name_end in range(end, pos, -1):
+        if name_end + 4 > n:
+            if not final:
+                return _INCOMPLETE
+            continue
+        if b[name_end] != 10 and b[name_end+1:name_end+4] == b'txt':
+            return bytes(b[pos:name_end]), name_end + 4
+    return None
+
+
+def _strip(b: Union[bytes, bytearray, memoryview], start: int, end: int) -> Tuple[int, int]:
+    """
+    The offsets of ``b[start:end].strip()``.
+    """
+    while start < end and b[start] in _WHITESPACE:
+        start += 1
+    while end > start and b[end-1] in _WHITESPACE:
+        end -= 1
+    return start, end
+
+
+def _find_marker(b: Union[bytes, bytearray], pos: int, final: bool = True):
+    """
+    Find the next section marker at or after ``pos``.
+
+    Returns
+    -------
+    int
+        The start of the marker, or -1.
+    tuple or None or object
+        The result of ``_match_marker``.
+    """
+    start = b.find(SECTION_MARKER, pos)
+    while start != -1:
+        match = _match_marker(b, start, final)
+        if match is not None:
+            return start, match
+        start = b.find(SECTION_MARKER, start + 1)
+    return -1, None
+
+
+def split_sections(b: bytes) -> Iterator[Tuple[bytes, memoryview]]:
+    """
+    Split a reply with several files into its sections.
+
+    Each section starts with a ``results_<name>.txt`` marker. Anything before
+    the first marker is ignored.
+
+    Parameters
+    ----------
+    b : bytes
+        The reply. It should not contain carriage returns.
+
+    Yields
+    ------
+    bytes
+        The name of the section, e.g. ``b'rad'``.
+    memoryview
+        The content of the section, without surrounding whitespace. It
+        refers to ``b``, so no data is copied.
+    """
+    view = memoryview(b)
+    start, match = _find_marker(b, 0)
+    while match is not None:
+        name, content_start = match
+        start, next_match = _find_marker(b, content_start)
+        content_end = len(b) if next_match is None else start
+        lo, hi = _strip(b, content_start, content_end)
+        yield name, view[lo:hi]
+        match = next_match
+
+
+class SectionSplitter:
+    """
+    Find the sections of a reply while it is being received.
+
+    Feed the reply in chunks. Each section is returned as soon as the marker
+    of the next one arrives, so it can be parsed while the rest of the reply
+    is still on its way.
+
+    Examples
+    --------
+    >>> splitter = SectionSplitter()
+    >>> for chunk in reply.iter_content(2**16):
+    ...     for name, content in splitter.feed(chunk):
+    ...         parse(name, content)
+    >>> for name, content in splitter.close():
+    ...     parse(name, content)
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._name: Union[bytes, None] = None
+        self._content_start = 0
+        self._scan = 0
+
+    def _take(self, start: int, end: int) -> bytes:
+        """
+        Copy out a section, without surrounding whitespace.
+        """
+        lo, hi = _strip(self._buffer, start, end)
+        # the view must be released before the buffer can be resized
+        with memoryview(self._buffer) as view:
+            return bytes(view[lo:hi])
+
+    def _sections(self, final: bool) -> List[Tuple[bytes, bytes]]:
+        found = []
+        buffer = self._buffer
+        while True:
+            start, match = _find_marker(buffer, self._scan, final)
+            if match is _INCOMPLETE:
+                # wait for the rest of the marker
+                self._scan = start
+                break
+            if match is None:
+                # a marker may be split between this chunk and the next
+                self._scan = max(self._content_start, len(buffer) - len(SECTION_MARKER) + 1)
+                break
+            if self._name is not None:
+                found.append((self._name, self._take(self._content_start, start)))
+            self._name, end = match
+            # drop what has been handed out
+            del buffer[:end]
+            self._content_start = 0
+            self._scan = 0
+        return found
+
+    def feed(self, chunk: bytes) -> List[Tuple[bytes, bytes]]:
+        """
+        Add the next chunk of the reply.
+
+        Parameters
+        ----------
+        chunk : bytes
+            The next part of the reply.
+
+        Returns
+        -------
+        list of tuple
+            The name and content of each section completed by this chunk.
+        """
+        if b'\r' in chunk:
+            chunk = chunk.replace(b'\r', b'')
+        self._buffer += chunk
+        return self._sections(final=False)
+
+    def close(self) -> List[Tuple[bytes, bytes]]:
+        """
+        Signal the end of the reply.
+
+        Returns
+        -------
+        list of tuple
+            The name and content of the remaining sections.
+        """
+        found = self._sections(final=True)
+        if self._name is not None:
+            found.append((self._name, self._take(0, len(self._buffer))))
+            self._name = None
+        self._buffer = bytearray()
+        return found
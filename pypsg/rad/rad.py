@@ -4,12 +4,12 @@ Python representation of rad files.
 
 from pathlib import Path
 import re
-import numpy as np
 
 import astropy.units as u
 from astropy import table
 
-from pypsg import settings
+from pypsg.memo import memoize
+from pypsg.parse import parse_table
 
 
 
@@ -86,23 +86,16 @@ class PyRad(table.QTable):
         return metadata
         
     @classmethod
+    @memoize
     def from_bytes(cls,b:bytes):
-        b = b.replace(b'\r',b'')
-        lines = b.split(b'\n')
-        header = [line.decode(settings.get_setting('encoding')) for line in lines if line.startswith(b'#')]
-        content = [line.decode(settings.get_setting('encoding')) for line in lines if (not line.startswith(b'#') and len(line)>0)]
+        header, content = parse_table(b)
         
-        metadata = cls._get_metadata('\n'.join(header))
+        metadata = cls._get_metadata(header)
         
         spectral_unit:u.Unit = metadata[cls.SPEC_UNIT]
         radiance_unit:u.Unit = metadata[cls.RAD_UNIT]
         
         names = metadata[cls._NAMES].split(' ')
-        content = np.array(
-            [
-                np.fromstring(line,sep=' ') for line in content
-            ]
-        )
         data = {}
         for i, name in enumerate(names):
             data[name] = content[:,i] * (spectral_unit if i==0 else radiance_unit)
@@ -5,7 +5,7 @@ PyPSG Requests
 Direct access to the PSG API
 """
 import warnings
-from typing import Union, Dict
+from typing import Any, Callable, Union, Dict, Iterable, List, Tuple
 import re
 import requests
 import logging
@@ -17,8 +17,12 @@ from pypsg.rad import PyRad
 from pypsg.lyr import PyLyr
 from pypsg.trn import PyTrn
 from pypsg import docker
-
-docker.set_url_and_run()
+from pypsg.session import SessionPool, get_default_pool
+from pypsg.cache import ResponseCache
+from pypsg.backends import BackendPool
+from pypsg.retry import RetryPolicy, limit as rate_limit
+from pypsg.parse import split_sections, SectionSplitter
+from pypsg.upload import MultipartBody
 
 typedict: Dict[bytes, Union[PyConfig, PyRad, PyLyr]] = {
     b'cfg': PyConfig,
@@ -28,11 +32,92 @@ typedict: Dict[bytes, Union[PyConfig, PyRad, PyLyr]] = {
     b'trn': PyTrn
 }
 
+STREAM_CHUNK_SIZE = 2**16
+"""
+The number of bytes read at a time from a streamed reply.
+
+:type: int
+"""
+STATE_TYPES = ('set', 'upd')
+"""
+The output types that change the config stored by PSG rather than run it.
+
+:type: tuple of str
+"""
+
+WARNING_MARKER = b'WARNING | '
+ERROR_MARKER = b'ERROR | '
+BINARY_START = b'<BINARY>'
+BINARY_END = b'</BINARY>'
+_MESSAGE = re.compile(rb'([\w]+) \| (.*)')
+
+
+def _strip_binary(content: bytes) -> bytes:
+    """
+    Remove the ``<BINARY>`` blocks from a reply.
+
+    The blocks are found by offset, so the text between them is the only
+    part that is copied. A block that is never closed is kept.
+    """
+    start = content.find(BINARY_START)
+    if start == -1:
+        return content
+    view = memoryview(content)
+    pieces = []
+    pos = 0
+    while start != -1:
+        end = content.find(BINARY_END, start + len(BINARY_START))
+        if end == -1:
+            break
+        pieces.append(view[pos:start])
+        pos = end + len(BINARY_END)
+        start = content.find(BINARY_START, pos)
+    pieces.append(view[pos:])
+    return b''.join(pieces)
+
+
+def _find_messages(text: bytes, marker: bytes) -> List[Tuple[str, str]]:
+    """
+    Find every ``<marker><name> | <message>`` line.
+
+    Like ``re.findall``, the search continues after the end of each match.
+    """
+    encoding = settings.get_setting('encoding')
+    found = []
+    pos = text.find(marker)
+    while pos != -1:
+        match = _MESSAGE.match(text, pos + len(marker))
+        if match is None:
+            pos = text.find(marker, pos + 1)
+            continue
+        name, message = match.groups()
+        found.append((name.decode(encoding), message.decode(encoding)))
+        pos = text.find(marker, match.end())
+    return found
+
+
 def parse_exceptions(content:bytes):
-    
-    content = re.sub(b'<BINARY>.*</BINARY>',b'',content)
-    content = content.replace(b'\r',b'')
-    content = str(content,encoding=settings.get_setting('encoding'))
+    """
+    Raise the errors and warn the warnings reported in a reply from PSG.
+
+    The ``<BINARY>`` blocks of the reply, which can hold many megabytes of
+    GCM data, are skipped by offset rather than searched.
+
+    Parameters
+    ----------
+    content : bytes
+        The content of the reply.
+
+    Raises
+    ------
+    pypsg.exceptions.PSGError
+        The error reported by PSG, or a ``PSGMultiError`` if there are several.
+    """
+    content = _strip_binary(content)
+    if WARNING_MARKER not in content and ERROR_MARKER not in content:
+        return None
+    if b'\r' in content:
+        content = content.replace(b'\r',b'')
     
     exception_dict = {
         'GlobES': exceptions.GlobESError,
@@ -43,7 +128,7 @@ def parse_exceptions(content:bytes):
         'PUMAS': exceptions.PUMASWarning
     }
     
-    matchs = re.findall(r'WARNING \| ([\w]+) \| (.*)', content)
+    matchs = _find_messages(content, WARNING_MARKER)
     psg_warnings = [
         warning_dict.get(match[0], exceptions.UnknownPSGWarning)(match[1]) for match in matchs
     ]
@@ -51,7 +136,7 @@ def parse_exceptions(content:bytes):
         warnings.warn(warning)
     
     
-    matchs = re.findall(r'ERROR \| ([\w]+) \| (.*)', content)
+    matchs = _find_messages(content, ERROR_MARKER)
     if len(matchs) == 0:
         return None
     errors = [
@@ -96,20 +181,19 @@ class PSGResponse:
     def from_bytes(cls, b: bytes):
         """
         Read the response from PSG as a byte string.
+
+        The response itself is not memoized, but each table in it is,
+        so that no table is held twice by ``pypsg.memo``.
         
         Parameters
         ----------
         b : bytes
             The response from the PSG. This is the returned file read as bytes.
         """
-        b = b.replace(b'\r',b'')
-        pattern = rb'results_([\w]+).txt'
-        split_text = re.split(pattern, b)
-        names = split_text[1::2]
-        content = split_text[2::2]
-        data = {}
-        for name, dat in zip(names, content):
-            data[name] = dat.strip()
+        if b'\r' in b:
+            b = b.replace(b'\r',b'')
+        # if a file appears twice, the last one is used
+        data = dict(split_sections(b))
         kwargs = {}
         for key, value in typedict.items():
             value: PyConfig | PyRad | PyLyr | PyTrn
@@ -117,6 +201,30 @@ class PSGResponse:
                 kwargs[key.decode(settings.get_setting('encoding'))] = value.from_bytes(data[key])
         return cls(**kwargs)
     @classmethod
+    def from_chunks(cls, chunks: Iterable[bytes]):
+        """
+        Read the response from PSG as it is received.
+
+        Each file is parsed as soon as it has been received in full, while
+        the rest of the response is still on its way.
+
+        Parameters
+        ----------
+        chunks : iterable of bytes
+            The response from PSG, in order.
+        """
+        splitter = SectionSplitter()
+        kwargs = {}
+        encoding = settings.get_setting('encoding')
+        def parse(sections):
+            for name, content in sections:
+                if name in typedict:
+                    kwargs[name.decode(encoding)] = typedict[name].from_bytes(content)
+        for chunk in chunks:
+            parse(splitter.feed(chunk))
+        parse(splitter.close())
+        return cls(**kwargs)
+    @classmethod
     def null(cls):
         return cls()
 
@@ -133,8 +241,29 @@ class APICall:
         The type of output to ask for.
     app : str or None
         The app to use.
-    url : str
-        The URL to send the request to.
+    url : str, optional
+        The URL to send the request to. If None, the URL is found by
+        ``pypsg.docker.resolve_url`` the first time it is needed.
+    logger : logging.Logger, optional
+        A logger to write the request and reply to.
+    session : SessionPool, optional
+        The pool of keep-alive connections to send the request over.
+        If None, the default pool from ``pypsg.session`` is used.
+    cache : ResponseCache, optional
+        A cache of previous replies. If given, identical calls are served
+        from the cache without contacting PSG.
+    backends : BackendPool, optional
+        A pool of PSG servers to send the request to, in place of ``url``.
+    retry : RetryPolicy, optional
+        When to try the request again if it fails. By default a failed
+        request is not retried.
+    stream : bool, optional
+        If True, parse each file of a multi-file reply as soon as it has been
+        received, rather than waiting for the whole reply. By default False.
+    stream_upload : bool, optional
+        If True, send the config as a ``multipart/form-data`` body that is
+        read from the config as it is sent, rather than encoding all of it
+        in memory first. By default False.
 
     Attributes
     ----------
@@ -146,6 +275,24 @@ class APICall:
         The app to use.
     url : str
         The URL to send the request to.
+    session : SessionPool or None
+        The pool of keep-alive connections to use.
+    cache : ResponseCache or None
+        The cache of previous replies.
+    backends : BackendPool or None
+        The pool of PSG servers to use.
+    retry : RetryPolicy or None
+        When to try the request again if it fails.
+    stream : bool
+        Whether to parse a multi-file reply as it is received.
+    stream_upload : bool
+        Whether to stream the config to PSG.
+
+    Notes
+    -----
+    Requests to the public PSG server are sent one at a time per API key,
+    because it rejects a call made while another is running. Use
+    ``pypsg.retry.set_limiter`` to change this, or to limit other servers.
     """
 
     def __init__(
@@ -154,15 +301,25 @@ class APICall:
         output_type: str = None,
         app: str = None,
         url: str = None,
-        logger: logging.Logger = None
+        logger: logging.Logger = None,
+        session: SessionPool = None,
+        cache: ResponseCache = None,
+        backends: BackendPool = None,
+        retry: RetryPolicy = None,
+        stream: bool = False,
+        stream_upload: bool = False
     ):
         self.cfg = cfg
         self._type = output_type
         self.app = app
-        self.url = url
-        if self.url is None:
-            self.url = settings.get_setting('url')
+        self._url = url
         self.logger = logger
+        self.session = session
+        self.cache = cache
+        self.backends = backends
+        self.retry = retry
+        self.stream = stream
+        self.stream_upload = stream_upload
         self._validate()
 
     def _validate(self):
@@ -178,7 +335,13 @@ class APICall:
         TypeError
             If self.app is not a string or None.
         TypeError
-            If self.url is not a string.
+            If self.url is not a string or None.
+        ValueError
+            If both self.url and self.backends are given.
+        TypeError
+            If self.stream is not a bool.
+        TypeError
+            If self.stream_upload is not a bool.
         """
         if not isinstance(self.cfg, (PyConfig, BinConfig)):
             raise TypeError(
@@ -193,8 +356,37 @@ class APICall:
                 #         raise TypeError('apiCall.type must be a string or None')
         if not (isinstance(self.app, str) or self.app is None):
             raise TypeError('apiCall.app must be a string or None')
-        if not isinstance(self.url, str):
-            raise TypeError('apiCall.url must be a string')
+        if not (isinstance(self._url, str) or self._url is None):
+            raise TypeError('apiCall.url must be a string or None')
+        if not (isinstance(self.session, SessionPool) or self.session is None):
+            raise TypeError('apiCall.session must be a SessionPool or None')
+        if not (isinstance(self.cache, ResponseCache) or self.cache is None):
+            raise TypeError('apiCall.cache must be a ResponseCache or None')
+        if not (isinstance(self.backends, BackendPool) or self.backends is None):
+            raise TypeError('apiCall.backends must be a BackendPool or None')
+        if self.backends is not None and self._url is not None:
+            raise ValueError('apiCall.url and apiCall.backends cannot both be set')
+        if not (isinstance(self.retry, RetryPolicy) or self.retry is None):
+            raise TypeError('apiCall.retry must be a RetryPolicy or None')
+        if not isinstance(self.stream, bool):
+            raise TypeError('apiCall.stream must be a bool')
+        if not isinstance(self.stream_upload, bool):
+            raise TypeError('apiCall.stream_upload must be a bool')
+
+    @property
+    def url(self) -> str:
+        """
+        The URL to send the request to.
+
+        :type: str
+        """
+        if self._url is None:
+            self._url = docker.resolve_url()
+        return self._url
+
+    @url.setter
+    def url(self, value: str):
+        self._url = value
 
     @property
     def is_single_file(self):
@@ -237,7 +429,10 @@ class APICall:
         api_key: str | None,
         url: str,
         header: dict,
-        timeout: float = 30
+        timeout: float = 30,
+        session: SessionPool = None,
+        stream: bool = False,
+        stream_upload: bool = False
     )->requests.Response:
         """
         Call the PSG API and return the raw response.
@@ -250,70 +445,143 @@ class APICall:
             The type of output to ask for.
         app : str or None
             The app to use.
+        api_key : str or None
+            The API key to use.
         url : str
             The URL to send the request to.
+        header : dict
+            The HTTP headers to send.
+        timeout : float, optional
+            The request timeout in seconds.
+        session : SessionPool, optional
+            The pool of keep-alive connections to use. If None,
+            the default pool is used.
+        stream : bool, optional
+            If True, return once the headers have been received and leave the
+            body to be read from the reply. By default False.
+        stream_upload : bool, optional
+            If True, send the config as a streamed ``multipart/form-data``
+            body. By default False.
 
         Returns
         -------
         requests.Response
             The reply from PSG.
         """
-        data = dict(file=cfg.content)
+        fields = {}
         if output_type is not None:
-            data['type'] = output_type
+            fields['type'] = output_type
         if app is not None:
-            data['app'] = app
+            fields['app'] = app
         if api_key is not None:
-            data['key'] = api_key
-        reply: requests.Response = requests.post(
+            fields['key'] = api_key
+        if stream_upload:
+            data = MultipartBody(cfg, fields)
+            header = {**header, 'Content-Type': data.content_type}
+        else:
+            data = dict(file=cfg.content, **fields)
+        if session is None:
+            session = get_default_pool()
+        reply: requests.Response = session.post(
             url=url,
             data=data,
             timeout=timeout,
-            headers=header
+            headers=header,
+            stream=stream
         )
         return reply
     
     def reset(self):
         """
         Reset PSG to its initial state.
+
+        If ``self.backends`` is set, every backend in the pool is reset.
         """
         api_key = settings.get_setting('api_key')
-        url = self.url
-        if '/api.php' not in url:
-            url = f'{url}/api.php'
-        _ = self.call(
-            cfg=PyConfig(),
-            output_type='set',
-            app=None,
-            api_key=api_key,
-            url=url,
-            header=settings.get_setting('header'),
-            timeout=settings.get_setting('timeout')
-        )
+        if self.backends is None:
+            urls = [self.url]
+        else:
+            urls = [backend.url for backend in self.backends.backends]
+        for url in urls:
+            if '/api.php' not in url:
+                url = f'{url}/api.php'
+            _ = self.call(
+                cfg=PyConfig(),
+                output_type='set',
+                app=None,
+                api_key=api_key,
+                url=url,
+                header=settings.get_setting('header'),
+                timeout=settings.get_setting('timeout'),
+                session=self.session
+            )
 
-    def __call__(self) -> PSGResponse:
+    def _send(
+        self,
+        url: str = None,
+        read: Callable[[requests.Response], Any] = None,
+        stream: bool = False
+    ) -> Any:
         """
-        Call the PSG API
+        Send the request to PSG and read the reply.
+
+        The rate limiter for the URL is held until ``read`` returns, so a
+        streamed reply counts against the limit until its body is consumed.
+
+        Parameters
+        ----------
+        url : str, optional
+            The URL to send the request to. By default ``self.url``.
+        read : callable, optional
+            Called with the raw reply. By default ``self._check_reply``.
+        stream : bool, optional
+            If True, do not read the body of the reply before ``read`` is called.
 
         Returns
         -------
-        bytes
-            The reply from PSG.
+        Any
+            The value returned by ``read``.
         """
         api_key = settings.get_setting('api_key')
-        url = self.url
+        if url is None:
+            url = self.url
         if '/api.php' not in url:
             url = f'{url}/api.php'
-        
-        reply = self.call(
-            cfg=self.cfg,
-            output_type=self.type,
-            app=self.app,
-            api_key=api_key,
-            url=url,
-            header=settings.get_setting('header'),
-            timeout=settings.get_setting('timeout')
-        )
+        if read is None:
+            read = self._check_reply
+        with rate_limit(url, api_key):
+            reply = self.call(
+                cfg=self.cfg,
+                output_type=self.type,
+                app=self.app,
+                api_key=api_key,
+                url=url,
+                header=settings.get_setting('header'),
+                timeout=settings.get_setting('timeout'),
+                session=self.session,
+                stream=stream,
+                stream_upload=self.stream_upload
+            )
+            return read(reply)
+
+    def _check_reply(self, reply: requests.Response, content: bytes = None) -> bytes:
+        """
+        Check a reply from PSG for connection errors.
+
+        Parameters
+        ----------
+        reply : requests.Response
+            The raw reply from PSG.
+        content : bytes, optional
+            The content of the reply, if it has already been read.
+
+        Returns
+        -------
+        bytes
+            The content of the reply.
+        """
+        if content is None:
+            content = reply.content
         if self.logger is not None:
             def format_content(content,title):
                 if b'<BINARY>' in content:
@@ -323,22 +591,196 @@ class APICall:
                     + str(content, encoding=settings.get_setting('encoding')) \
                         + '\n' + '~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~'
                 return s
-            self.logger.debug(format_content(self.cfg.content,f'Sent to {self.url} (app: {self.app}) with mode `{self.type}`'))
-            self.logger.debug(format_content(reply.content, 'Received from PSG'))
+            self.logger.debug(format_content(self.cfg.content,f'Sent to {reply.url} (app: {self.app}) with mode `{self.type}`'))
+            self.logger.debug(format_content(content, 'Received from PSG'))
         try:
             reply.raise_for_status()
         except requests.HTTPError as err:
-            raise exceptions.PSGConnectionError(reply.content) from err
-        too_many_calls = 'Your other API call is still running, please let it finish, wait 10 minutes, or consider installing the PSG Docker version'
-        if too_many_calls in reply.text:
-            raise exceptions.PSGConnectionError(reply.text)
-        parse_exceptions(reply.content)
-        if self._type in ['upd', 'set']:
+            raise exceptions.PSGConnectionError(content) from err
+        too_many_calls = b'Your other API call is still running, please let it finish, wait 10 minutes, or consider installing the PSG Docker version'
+        if too_many_calls in content:
+            raise exceptions.PSGBusyError(str(content, encoding=settings.get_setting('encoding')))
+        return content
+
+    def _cache_key(self) -> Union[str, None]:
+        """
+        The key of this call in the cache, or None if it should not be cached.
+
+        ``set`` and ``upd`` change the config stored by PSG, so they must
+        always reach the server.
+        """
+        if self.cache is None or self._type in STATE_TYPES:
+            return None
+        # every backend in a pool gives the same reply
+        url = self.url if self.backends is None else None
+        # hashed a piece at a time, so a streamed upload is not joined
+        return self.cache.key(self.cfg.iter_chunks(), self.type, self.app, url)
+
+    def _fetch(self) -> Tuple[bytes, Union[str, None]]:
+        """
+        Get the raw reply, from the cache if possible.
+
+        Returns
+        -------
+        bytes
+            The content of the reply.
+        str or None
+            The cache key to store the reply under once it has been
+            parsed successfully. None if the reply should not be stored.
+        """
+        key = self._cache_key()
+        if key is not None:
+            content = self.cache.get(key)
+            if content is not None:
+                if self.logger is not None:
+                    self.logger.debug(f'Served from cache (key: {key})')
+                return content, None
+        if self.retry is None:
+            return self._request(), key
+        return self.retry.run(self._request), key
+
+    def _request(self) -> bytes:
+        """
+        Make a single attempt at the request.
+
+        Returns
+        -------
+        bytes
+            The content of the reply.
+        """
+        if self.backends is None:
+            return self._send()
+        with self.backends.lease() as url:
+            return self._send(url)
+
+    @property
+    def _streams(self) -> bool:
+        """
+        True if the reply should be parsed as it is received.
+        """
+        return self.stream and not self.is_single_file
+
+    def _receive(self, reply: requests.Response) -> Tuple[bytes, PSGResponse]:
+        """
+        Parse a streamed reply as it is received.
+
+        Parameters
+        ----------
+        reply : requests.Response
+            A reply sent with ``stream=True``.
+
+        Returns
+        -------
+        bytes
+            The content of the reply.
+        PSGResponse
+            The parsed reply.
+        """
+        try:
+            if not reply.ok:
+                self._check_reply(reply)
+            received = []
+            def tee(chunks):
+                for chunk in chunks:
+                    received.append(chunk)
+                    yield chunk
+            chunks = reply.iter_content(chunk_size=STREAM_CHUNK_SIZE)
+            try:
+                response = PSGResponse.from_chunks(tee(chunks))
+                parse_error = None
+            except Exception as err:  # pylint: disable=broad-except
+                # PSG errors explain a reply that cannot be parsed,
+                # so look for them before giving up
+                response = None
+                parse_error = err
+                received.extend(chunks)
+            content = self._check_reply(reply, b''.join(received))
+        finally:
+            reply.close()
+        parse_exceptions(content)
+        if parse_error is not None:
+            raise parse_error
+        return content, response
+
+    def _request_streaming(self) -> Tuple[bytes, PSGResponse]:
+        """
+        Make a single attempt at the request, parsing the reply as it is
+        received.
+
+        Returns
+        -------
+        bytes
+            The content of the reply.
+        PSGResponse
+            The parsed reply.
+        """
+        if self.backends is None:
+            return self._send(read=self._receive, stream=True)
+        with self.backends.lease() as url:
+            return self._send(url, read=self._receive, stream=True)
+
+    def _call_streaming(self) -> PSGResponse:
+        """
+        Call the PSG API, parsing the reply as it is received.
+
+        Returns
+        -------
+        PSGResponse
+            The reply from PSG.
+        """
+        key = self._cache_key()
+        if key is not None:
+            content = self.cache.get(key)
+            if content is not None:
+                if self.logger is not None:
+                    self.logger.debug(f'Served from cache (key: {key})')
+                return self._parse_content(content)
+        if self.retry is None:
+            content, response = self._request_streaming()
+        else:
+            content, response = self.retry.run(self._request_streaming)
+        if key is not None:
+            self.cache.put(key, content)
+        return response
+
+    def _parse_content(self, content: bytes) -> PSGResponse:
+        """
+        Check the content of a reply for PSG errors and parse it.
+
+        Parameters
+        ----------
+        content : bytes
+            The content of the reply from PSG.
+
+        Returns
+        -------
+        PSGResponse
+            The parsed reply.
+        """
+        parse_exceptions(content)
+        if self._type in STATE_TYPES:
             return PSGResponse.null()
         elif not self.is_single_file:
-            return PSGResponse.from_bytes(reply.content)
+            return PSGResponse.from_bytes(content)
         elif self._type is None:
-            return PSGResponse(rad=PyRad.from_bytes(reply.content))
+            return PSGResponse(rad=PyRad.from_bytes(content))
         else:
             returntype = typedict[self._type.encode(settings.get_setting('encoding'))]
-            return PSGResponse(**{self._type:returntype.from_bytes(reply.content)})
+            return PSGResponse(**{self._type:returntype.from_bytes(content)})
+
+    def __call__(self) -> PSGResponse:
+        """
+        Call the PSG API
+
+        Returns
+        -------
+        PSGResponse
+            The reply from PSG.
+        """
+        if self._streams:
+            return self._call_streaming()
+        content, key = self._fetch()
+        response = self._parse_content(content)
+        if key is not None:
+            self.cache.put(key, content)
+        return response
@@ -0,0 +1,325 @@
+"""
+PyPSG Retries and Rate Limits
+-----------------------------
+
+Wait and try again instead of failing.
+
+The public PSG server allows one call per API key at a time, and replies
+with an error to any call made while another is running. A
+:class:`RateLimiter` makes calls to the same URL with the same key wait their
+turn, and a :class:`RetryPolicy` retries calls that fail for reasons that are
+likely to go away, such as a busy server or a dropped connection.
+
+By default, calls to ``pypsg.settings.PSG_URL`` are limited to one at a time
+per key, calls to any other URL are not limited, and nothing is retried.
+"""
+from typing import Callable, Dict, Tuple, Type, TypeVar, Union
+from contextlib import contextmanager
+import random
+import threading
+import time
+
+import requests
+
+from pypsg import exceptions
+from pypsg import settings
+
+T = TypeVar('T')
+
+RETRYABLE_ERRORS = (
+    exceptions.PSGBusyError,
+    requests.ConnectionError,
+    requests.Timeout,
+)
+"""
+The errors that are retried by default.
+
+:type: tuple
+"""
+RETRYABLE_STATUSES = (429, 502, 503, 504)
+"""
+The HTTP status codes that are retried by default.
+
+:type: tuple
+"""
+
+
+class RetryPolicy:
+    """
+    When and how long to wait before trying a call again.
+
+    The wait after the ``n``-th failed attempt is drawn uniformly between
+    zero and ``min(max_backoff, backoff * multiplier**(n-1))``. Drawing
+    the wait at random keeps many clients that failed at the same time from
+    retrying at the same time.
+
+    Parameters
+    ----------
+    max_attempts : int, optional
+        The maximum number of attempts, including the first. By default 5.
+    backoff : float, optional
+        The base wait in seconds. By default 1.
+    multiplier : float, optional
+        The factor the wait grows by after each attempt. By default 2.
+    max_backoff : float, optional
+        The longest wait in seconds. By default 60.
+    jitter : bool, optional
+        If False, always wait the full time. By default True.
+    retry_on : tuple of type, optional
+        The errors to retry.
+    retry_statuses : tuple of int, optional
+        The HTTP status codes to retry.
+
+    Examples
+    --------
+    >>> policy = RetryPolicy(max_attempts=10, backoff=2)
+    >>> response = APICall(cfg, 'rad', retry=policy)()
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 5,
+        backoff: float = 1.0,
+        multiplier: float = 2.0,
+        max_backoff: float = 60.0,
+        jitter: bool = True,
+        retry_on: Tuple[Type[BaseException], ...] = RETRYABLE_ERRORS,
+        retry_statuses: Tuple[int, ...] = RETRYABLE_STATUSES
+    ):
+        if max_attempts < 1:
+            raise ValueError('max_attempts must be at least 1.')
+        if backoff < 0 or max_backoff < 0:
+            raise ValueError('backoff cannot be negative.')
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.multiplier = multiplier
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retry_on = retry_on
+        self.retry_statuses = retry_statuses
+
+    def is_retryable(self, err: BaseException) -> bool:
+        """
+        Decide if a failed call should be tried again.
+
+        Parameters
+        ----------
+        err : Exception
+            The error raised by the call.
+
+        Returns
+        -------
+        bool
+            True if the call should be tried again.
+        """
+        if isinstance(err, self.retry_on):
+            return True
+        cause = err.__cause__
+        if isinstance(err, exceptions.PSGConnectionError) and isinstance(cause, requests.HTTPError):
+            return cause.response is not None and cause.response.status_code in self.retry_statuses
+        return False
+
+    def delay(self, attempt: int) -> float:
+        """
+        Get the wait before an attempt.
+
+        Parameters
+        ----------
+        attempt : int
+            The number of attempts already made.
+
+        Returns
+        -------
+        float
+            The wait in seconds.
+        """
+        cap = min(self.max_backoff, self.backoff * self.multiplier**(attempt - 1))
+        return random.uniform(0, cap) if self.jitter else cap
+
+    def run(self, func: Callable[[], T], sleep: Callable[[float], None] = time.sleep) -> T:
+        """
+        Call ``func`` until it succeeds or the attempts run out.
+
+        Parameters
+        ----------
+        func : callable
+            Called with no arguments.
+        sleep : callable, optional
+            Used to wait between attempts.
+
+        Returns
+        -------
+        Any
+            The value returned by ``func``.
+        """
+        attempt = 1
+        while True:
+            try:
+                return func()
+            except Exception as err:  # pylint: disable=broad-except
+                if attempt >= self.max_attempts or not self.is_retryable(err):
+                    raise
+            sleep(self.delay(attempt))
+            attempt += 1
+
+
+class RateLimiter:
+    """
+    Limit how many calls are made at once, and how often.
+
+    Parameters
+    ----------
+    concurrency : int, optional
+        The maximum number of calls in flight. By default 1.
+    rate : float, optional
+        The maximum average number of calls started per second. If None,
+        the rate is not limited.
+    burst : int, optional
+        The number of calls that may start at once before ``rate`` applies.
+        By default 1.
+
+    Examples
+    --------
+    >>> limiter = RateLimiter(concurrency=1)
+    >>> with limiter.limit():
+    ...     reply = send()
+    """
+
+    def __init__(self, concurrency: int = 1, rate: float = None, burst: int = 1):
+        if concurrency < 1:
+            raise ValueError('concurrency must be at least 1.')
+        if rate is not None and rate <= 0:
+            raise ValueError('rate must be positive.')
+        if burst < 1:
+            raise ValueError('burst must be at least 1.')
+        self.concurrency = concurrency
+        self.rate = rate
+        self.burst = burst
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+
+    def _take_token(self):
+        """
+        Wait for the token bucket to allow another call.
+        """
+        if self.rate is None:
+            return None
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last)*self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return None
+                wait = (1 - self._tokens)/self.rate
+            time.sleep(wait)
+
+    def acquire(self):
+        """
+        Wait until a call may start.
+        """
+        self._slots.acquire()
+        try:
+            self._take_token()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self):
+        """
+        Signal that a call has finished.
+        """
+        self._slots.release()
+
+    @contextmanager
+    def limit(self):
+        """
+        Hold a slot for the duration of a ``with`` block.
+        """
+        self.acquire()
+        try:
+            yield self
+        finally:
+            self.release()
+
+
+_limiters: Dict[Tuple[str, Union[str, None]], Union[RateLimiter, None]] = {}
+_limiters_lock = threading.Lock()
+
+
+def _default_limiter(url: str) -> Union[RateLimiter, None]:
+    """
+    The limiter used for a URL that has not been configured.
+    """
+    if url == settings.PSG_URL:
+        return RateLimiter(concurrency=1)
+    return None
+
+
+def get_limiter(url: str, api_key: str = None) -> Union[RateLimiter, None]:
+    """
+    Get the limiter shared by calls to a URL with an API key.
+
+    Parameters
+    ----------
+    url : str
+        The URL of the PSG API.
+    api_key : str or None
+        The API key sent with the call.
+
+    Returns
+    -------
+    RateLimiter or None
+        The limiter, or None if calls are not limited.
+    """
+    key = (url, api_key)
+    with _limiters_lock:
+        if key not in _limiters:
+            _limiters[key] = _default_limiter(url)
+        return _limiters[key]
+
+
+def set_limiter(url: str, limiter: Union[RateLimiter, None], api_key: str = None):
+    """
+    Set the limiter used for calls to a URL with an API key.
+
+    Parameters
+    ----------
+    url : str
+        The URL of the PSG API.
+    limiter : RateLimiter or None
+        The limiter. None turns limiting off.
+    api_key : str or None
+        The API key sent with the call.
+
+    Examples
+    --------
+    >>> set_limiter(PSG_URL, RateLimiter(concurrency=1, rate=0.5), api_key=key)
+    """
+    if not (isinstance(limiter, RateLimiter) or limiter is None):
+        raise TypeError('limiter must be a RateLimiter or None')
+    with _limiters_lock:
+        _limiters[(url, api_key)] = limiter
+
+
+@contextmanager
+def limit(url: str, api_key: str = None):
+    """
+    Hold the limiter for a URL and API key, if there is one.
+
+    Parameters
+    ----------
+    url : str
+        The URL of the PSG API.
+    api_key : str or None
+        The API key sent with the call.
+    """
+    limiter = get_limiter(url, api_key)
+    if limiter is None:
+        yield None
+    else:
+        with limiter.limit():
+            yield limiter
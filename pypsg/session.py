@@ -0,0 +1,243 @@
+"""
+PyPSG HTTP Sessions
+-------------------
+
+Pooled, keep-alive connections to the PSG API.
+
+Every call to PSG is a ``POST`` request. Sending each one over a fresh
+connection means paying for a TCP (and possibly TLS) handshake per spectrum.
+A :class:`SessionPool` keeps connections open between calls so that
+subsequent requests to the same host reuse them.
+"""
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_CONNECTIONS = 10
+"""
+The default number of per-host connection pools to cache.
+
+:type: int
+"""
+DEFAULT_POOL_MAXSIZE = 10
+"""
+The default maximum number of connections to keep open per host.
+
+:type: int
+"""
+
+
+class SessionPool:
+    """
+    A pool of keep-alive HTTP sessions.
+
+    Parameters
+    ----------
+    pool_connections : int, optional
+        The number of per-host connection pools to cache.
+    pool_maxsize : int, optional
+        The maximum number of connections to keep open to a single host.
+    pool_block : bool, optional
+        If True, block when no free connection to a host is available instead
+        of opening a throwaway one. By default False.
+    shared : bool, optional
+        If True, a single ``requests.Session`` is shared by every thread.
+        Otherwise each thread gets its own session. By default True.
+
+    Notes
+    -----
+    Sessions are rebuilt after a ``fork``, so a pool created in a parent
+    process can be safely used by worker processes.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        pool_block: bool = False,
+        shared: bool = True
+    ):
+        if pool_connections < 1:
+            raise ValueError('pool_connections must be at least 1.')
+        if pool_maxsize < 1:
+            raise ValueError('pool_maxsize must be at least 1.')
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._session: requests.Session | None = None
+        self._sessions: list[requests.Session] = []
+        self._pid = os.getpid()
+
+    def _new_session(self) -> requests.Session:
+        """
+        Create a session with a pooled adapter mounted.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        self._sessions.append(session)
+        return session
+
+    def _check_pid(self):
+        """
+        Drop any sessions inherited from a parent process.
+        """
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._session = None
+                    self._sessions = []
+                    self._local = threading.local()
+                    self._pid = os.getpid()
+
+    @property
+    def session(self) -> requests.Session:
+        """
+        The session to use from the current thread.
+
+        :type: requests.Session
+        """
+        self._check_pid()
+        if self.shared:
+            if self._session is None:
+                with self._lock:
+                    if self._session is None:
+                        self._session = self._new_session()
+            return self._session
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            with self._lock:
+                session = self._new_session()
+            self._local.session = session
+        return session
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """
+        Send a ``POST`` request over a pooled connection.
+
+        Parameters
+        ----------
+        url : str
+            The URL to send the request to.
+        **kwargs
+            Passed to ``requests.Session.post``.
+
+        Returns
+        -------
+        requests.Response
+            The reply.
+        """
+        return self.session.post(url=url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """
+        Send a ``GET`` request over a pooled connection.
+
+        Parameters
+        ----------
+        url : str
+            The URL to send the request to.
+        **kwargs
+            Passed to ``requests.Session.get``.
+
+        Returns
+        -------
+        requests.Response
+            The reply.
+        """
+        return self.session.get(url=url, **kwargs)
+
+    def close(self):
+        """
+        Close every session and the connections they hold.
+        """
+        with self._lock:
+            for session in self._sessions:
+                session.close()
+            self._sessions = []
+            self._session = None
+            self._local = threading.local()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+_default_pool = SessionPool()
+
+
+def get_default_pool() -> SessionPool:
+    """
+    Get the session pool used when none is given explicitly.
+
+    Returns
+    -------
+    SessionPool
+        The default session pool.
+    """
+    return _default_pool
+
+
+def set_default_pool(pool: SessionPool):
+    """
+    Replace the default session pool.
+
+    Parameters
+    ----------
+    pool : SessionPool
+        The new default pool. The previous one is closed.
+    """
+    if not isinstance(pool, SessionPool):
+        raise TypeError('pool must be a SessionPool object')
+    # pylint: disable-next=global-statement
+    global _default_pool
+    old = _default_pool
+    _default_pool = pool
+    if old is not pool:
+        old.close()
+
+
+def configure(
+    pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+    pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+    pool_block: bool = False,
+    shared: bool = True
+) -> SessionPool:
+    """
+    Configure the default session pool.
+
+    Parameters
+    ----------
+    pool_connections : int, optional
+        The number of per-host connection pools to cache.
+    pool_maxsize : int, optional
+        The maximum number of connections to keep open to a single host.
+    pool_block : bool, optional
+        If True, block when no free connection is available.
+    shared : bool, optional
+        If True, share one session across all threads.
+
+    Returns
+    -------
+    SessionPool
+        The new default pool.
+    """
+    pool = SessionPool(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        pool_block=pool_block,
+        shared=shared
+    )
+    set_default_pool(pool)
+    return pool
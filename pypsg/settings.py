@@ -27,6 +27,7 @@ DEFAULT_SETTINGS = {
     'cfg_max_lines': 1500,
     'timeout': REQUEST_TIMEOUT,
     'header': {'User-Agent': f'pypsg/{__version__}'},
+    'docker_autostart': False,
 }
 
 
@@ -73,7 +74,12 @@ def load_settings():
     settings_need_reload = False
     return settings
 
-user_settings = load_settings()
+user_settings = None
+"""
+The user settings. These are read from disk the first time a setting is requested.
+
+:type: dict or None
+"""
 
 def reload_settings():
     # pylint: disable-next=global-statement
@@ -88,6 +94,8 @@ def get_setting(key):
         msg = 'Your user settings have changed recently.\n'
         msg += 'Please reload the settings using the `pypsg.settings.reload_settings()` function.'
         warnings.warn(msg,StaleSettingsWarning) 
+    if user_settings is None:
+        reload_settings()
     if key in user_settings:
         return user_settings[key]
     else:
@@ -119,14 +127,18 @@ standardize aerosol size in VSPEC.
 :type: astropy.units.Unit
 """
 
-atmosphere_type_dict = {'H2':45,'He':0,'H2O':1,'CO2':2,'O3':3,'N2O':4,'CO':5,'CH4':6,'O2':7,
-                        'NO':8,'SO2':9,'NO2':10,'N2':22,'HNO3':12,'HO2NO2':'SEC[26404-66-0] Peroxynitric acid',
-                        'N2O5':'XSEC[10102-03-1] Dinitrogen pentoxide','O':'KZ[08] Oxygen',
-                        'OH':'EXO[OH]'}
+atmosphere_type_overrides = {'NO':8,'HNO3':12,'HO2NO2':'SEC[26404-66-0] Peroxynitric acid',
+                             'N2O5':'XSEC[10102-03-1] Dinitrogen pentoxide','O':'KZ[08] Oxygen',
+                             'OH':'EXO[OH]'}
 """
-A dictionary mapping molecular species to the default
-database to use to create opacities. These are all
-internal to PSG, but must be set by ``VSPEC``.
+The opacity databases in ``atmosphere_type_dict`` that are not read from
+the molecule database: molecules it does not hold, and molecules that are
+not to use their HITRAN entry.
+
+``atmosphere_type_dict`` maps molecular species to the default database
+to use to create opacities. It is built the first time it is used, from
+the HITRAN ID of each molecule in ``pypsg.globes.molecules`` and then
+these entries. These are all internal to PSG, but must be set by ``VSPEC``.
 
 Integers mean that we want to use data from the HITRAN database, which for a number ``N``
 is represented in PSG by ``HIT[N]``. Strings are sent straight to PSG as is.
@@ -161,4 +173,20 @@ database to use. These are all
 internal to PSG, but must be set by ``VSPEC``.
 
 :type: dict
-"""
\ No newline at end of file
+"""
+
+
+def __getattr__(name: str):
+    if name == 'atmosphere_type_dict':
+        # ``pypsg.globes.molecules`` imports this module
+        from pypsg.globes.molecules import get_molecule_database  # pylint: disable=import-outside-toplevel
+        db = get_molecule_database()
+        value = dict(zip(db.names, db.ids.tolist()))
+        value.update(atmosphere_type_overrides)
+        globals()[name] = value
+        return value
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__():
+    return sorted(set(globals()) | {'atmosphere_type_dict'})
@@ -0,0 +1,324 @@
+"""
+Stateful PSG sessions
+---------------------
+
+Keep the config stored by a PSG server in step with the configs being run,
+sending only what has changed.
+
+PSG can store a config for later calls: ``set`` replaces the stored config
+and ``upd`` changes some of its keywords. A :class:`StatefulSession` tracks
+what each server has stored. It sends a full config once, and after that only
+the lines that differ from the last config it ran. For a large GCM config
+whose geometry or noise changes from call to call, this cuts each request
+from megabytes to a few bytes.
+"""
+from typing import Dict, List, Union
+from contextlib import ExitStack
+import logging
+import threading
+
+from pypsg.cfg import BinConfig, PyConfig
+from pypsg.request import APICall, PSGResponse
+from pypsg.session import SessionPool
+from pypsg.backends import BackendPool
+from pypsg.retry import RetryPolicy
+from pypsg import docker
+
+BINARY_START = b'<BINARY>'
+BINARY_END = b'</BINARY>'
+GCM_KEYWORDS = ('ATMOSPHERE-GCM-PARAMETERS', 'BINARY')
+"""
+Keywords that PSG reads together, so that one is sent whenever the other is.
+
+:type: tuple of str
+"""
+
+
+def config_lines(content: bytes) -> Dict[str, bytes]:
+    """
+    Split the content of a config into its lines, keyed by keyword.
+
+    Parameters
+    ----------
+    content : bytes
+        The content of the config.
+
+    Returns
+    -------
+    dict
+        Each line of the config, including its keyword, keyed by the keyword.
+        A ``<BINARY>`` block is kept whole, under ``'BINARY'``.
+
+    Raises
+    ------
+    ValueError
+        If a line has no keyword.
+    """
+    lines = {}
+    pos = 0
+    n = len(content)
+    while pos < n:
+        if content.startswith(BINARY_START, pos):
+            end = content.find(BINARY_END, pos)
+            if end == -1:
+                raise ValueError('The config has an unterminated <BINARY> block.')
+            end += len(BINARY_END)
+            lines['BINARY'] = content[pos:end]
+            pos = end + 1 if content.startswith(b'\n', end) else end
+            continue
+        end = content.find(b'\n', pos)
+        if end == -1:
+            end = n
+        line = content[pos:end].rstrip(b'\r')
+        pos = end + 1
+        if line.strip() == b'' or line.startswith(b'#'):
+            continue
+        close = line.find(b'>')
+        if not line.startswith(b'<') or close == -1:
+            raise ValueError(f'Invalid config line: {line[:80]!r}')
+        lines[line[1:close].decode(BinConfig.encoding)] = line
+    return lines
+
+
+def config_changes(old: Dict[str, bytes], new: Dict[str, bytes]) -> Union[Dict[str, bytes], None]:
+    """
+    Find the lines that ``upd`` must send to turn one config into another.
+
+    Parameters
+    ----------
+    old : dict
+        The lines of the stored config, as given by ``config_lines``.
+    new : dict
+        The lines of the config to run.
+
+    Returns
+    -------
+    dict or None
+        The lines of ``new`` that are missing from or differ in ``old``.
+        None if ``new`` lacks a keyword of ``old``, which ``upd`` cannot
+        remove.
+    """
+    if any(keyword not in new for keyword in old):
+        return None
+    changes = {keyword: line for keyword, line in new.items() if old.get(keyword) != line}
+    if any(keyword in changes for keyword in GCM_KEYWORDS):
+        for keyword in GCM_KEYWORDS:
+            if keyword in new:
+                changes[keyword] = new[keyword]
+    return changes
+
+
+def _join(lines: Dict[str, bytes]) -> bytes:
+    """
+    Put lines back together, with the GCM parameters before the binary block.
+    """
+    binary = lines.get('BINARY')
+    parts = [line for keyword, line in lines.items() if keyword != 'BINARY']
+    if binary is not None:
+        parts.append(binary)
+    return b'\n'.join(parts)
+
+
+class StatefulSession:
+    """
+    Run configs against PSG servers that store the last config they were sent.
+
+    Parameters
+    ----------
+    url : str, optional
+        The URL of the server. If None, the URL is found by
+        ``pypsg.docker.resolve_url`` the first time it is needed.
+    app : str or None, optional
+        The app to use.
+    logger : logging.Logger, optional
+        A logger to write each request and reply to.
+    session : SessionPool, optional
+        The pool of keep-alive connections to send requests over.
+    backends : BackendPool, optional
+        A pool of PSG servers to use in place of ``url``. The config stored
+        by each one is tracked separately.
+    retry : RetryPolicy, optional
+        When to try a request again if it fails.
+
+    Attributes
+    ----------
+    url : str
+        The URL of the server.
+    app : str or None
+        The app to use.
+    logger : logging.Logger or None
+        A logger to write each request and reply to.
+    session : SessionPool or None
+        The pool of keep-alive connections to use.
+    backends : BackendPool or None
+        The pool of PSG servers to use.
+    retry : RetryPolicy or None
+        When to try a request again if it fails.
+    n_full : int
+        The number of full configs sent with ``set``.
+    n_updates : int
+        The number of changes sent with ``upd``.
+
+    Notes
+    -----
+    A server stores one config per API key, so the session assumes that
+    nothing else uses the same server and key while it runs. Call ``reset``
+    if something might have.
+
+    Calls to the same server are run one at a time, and calls to different
+    servers in a pool run at once.
+
+    The full config is sent the first time a server is used, after ``reset``,
+    and whenever the new config lacks a keyword of the stored one.
+
+    Examples
+    --------
+    >>> session = StatefulSession(url='http://localhost:3000')
+    >>> for cfg in base.sweep(geometry__observer_angle=[0, 30, 60]*u.deg):
+    ...     response = session(cfg, 'rad')
+    """
+
+    def __init__(
+        self,
+        url: str = None,
+        app: str = None,
+        logger: logging.Logger = None,
+        session: SessionPool = None,
+        backends: BackendPool = None,
+        retry: RetryPolicy = None
+    ):
+        if backends is not None and url is not None:
+            raise ValueError('StatefulSession.url and StatefulSession.backends cannot both be set')
+        self._url = url
+        self.app = app
+        self.logger = logger
+        self.session = session
+        self.backends = backends
+        self.retry = retry
+        self.n_full = 0
+        self.n_updates = 0
+        self._stored: Dict[str, Dict[str, bytes]] = {}
+        self._url_locks: Dict[str, threading.Lock] = {}
+        # guards ``_stored``, ``_url_locks`` and the counters
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        """
+        The URL of the server.
+
+        :type: str
+        """
+        if self._url is None:
+            self._url = docker.resolve_url()
+        return self._url
+
+    @url.setter
+    def url(self, value: str):
+        self._url = value
+
+    def _api_call(self, cfg: BinConfig, output_type: Union[str, None], url: str) -> APICall:
+        return APICall(
+            cfg=cfg,
+            output_type=output_type,
+            app=self.app,
+            url=url,
+            logger=self.logger,
+            session=self.session,
+            retry=self.retry
+        )
+
+    def _url_lock(self, url: str) -> threading.Lock:
+        """
+        The lock held while a config is stored on and run by a server.
+        """
+        with self._lock:
+            lock = self._url_locks.get(url)
+            if lock is None:
+                lock = self._url_locks[url] = threading.Lock()
+            return lock
+
+    def _sync(self, lines: Dict[str, bytes], cfg: Union[BinConfig, PyConfig], url: str):
+        """
+        Make the config stored by a server match ``lines``.
+
+        The lock of ``url`` must be held.
+        """
+        with self._lock:
+            stored = self._stored.pop(url, None)
+        changes = None if stored is None else config_changes(stored, lines)
+        if changes is None:
+            self._api_call(cfg, 'set', url)()
+        elif changes:
+            self._api_call(BinConfig(_join(changes)), 'upd', url)()
+        with self._lock:
+            if changes is None:
+                self.n_full += 1
+            elif changes:
+                self.n_updates += 1
+            # only remembered once the server has accepted it
+            self._stored[url] = lines
+
+    def _run(self, cfg: Union[BinConfig, PyConfig], output_type: Union[str, None], url: str) -> PSGResponse:
+        with self._url_lock(url):
+            self._sync(config_lines(cfg.content), cfg, url)
+            return self._api_call(BinConfig(b''), output_type, url)()
+
+    def __call__(self, cfg: Union[BinConfig, PyConfig], output_type: str = None) -> PSGResponse:
+        """
+        Run a config.
+
+        Parameters
+        ----------
+        cfg : BinConfig or PyConfig
+            The config to run.
+        output_type : str or None, optional
+            The type of output to ask for.
+
+        Returns
+        -------
+        PSGResponse
+            The reply from PSG.
+        """
+        if not isinstance(cfg, (PyConfig, BinConfig)):
+            raise TypeError('cfg must be a PyConfig or BinConfig object')
+        if output_type in ('set', 'upd'):
+            raise ValueError(f'A StatefulSession sends {output_type!r} requests itself.')
+        if self.backends is None:
+            return self._run(cfg, output_type, self.url)
+        with self.backends.lease() as url:
+            return self._run(cfg, output_type, url)
+
+    @property
+    def urls(self) -> List[str]:
+        """
+        The URLs of the servers whose stored config is known.
+
+        :type: list of str
+        """
+        with self._lock:
+            return list(self._stored)
+
+    def forget(self):
+        """
+        Forget what every server has stored, so that the next call to each
+        sends the full config.
+        """
+        with self._lock:
+            self._stored.clear()
+
+    def reset(self):
+        """
+        Reset every server to its initial state.
+        """
+        urls = [self.url] if self.backends is None else [b.url for b in self.backends.backends]
+        with ExitStack() as stack:
+            # wait for the calls in flight, so none is stored after the reset
+            for url in urls:
+                stack.enter_context(self._url_lock(url))
+            with self._lock:
+                self._stored.clear()
+            if self.backends is None:
+                APICall(PyConfig(), url=self.url, session=self.session).reset()
+            else:
+                APICall(PyConfig(), backends=self.backends, session=self.session).reset()
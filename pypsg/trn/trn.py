@@ -4,12 +4,12 @@ Transmitance module
 
 from pathlib import Path
 import re
-import numpy as np
 
 import astropy.units as u
 from astropy import table
 
-from pypsg import settings
+from pypsg.memo import memoize
+from pypsg.parse import parse_table
 
 
 class PyTrn(table.QTable):
@@ -34,26 +34,19 @@ class PyTrn(table.QTable):
         return metadata
     
     @classmethod
+    @memoize
     def from_bytes(cls, b:bytes):
         """
         Load a `.trn` file from a bytes object.
         """
-        b = b.replace(b'\r',b'')
-        lines = b.split(b'\n')
-        header = [line.decode(settings.get_setting('encoding')) for line in lines if line.startswith(b'#')]
-        content = [line.decode(settings.get_setting('encoding')) for line in lines if (not line.startswith(b'#') and len(line)>0)]
+        header, content = parse_table(b)
         
-        metadata = cls._get_metadata('\n'.join(header))
+        metadata = cls._get_metadata(header)
         
         names = metadata[cls._NAMES].split(' ')
         wl_unit:u.Unit = metadata[cls.SPEC_UNIT]
         trn_unit = u.dimensionless_unscaled
         
-        content = np.array(
-            [
-                np.fromstring(line,sep=' ') for line in content
-            ]
-        )
         data = {}
         for i, name in enumerate(names):
             data[name] = content[:,i] * (wl_unit if i==0 else trn_unit)
@@ -0,0 +1,104 @@
+"""
+PyPSG Streaming Uploads
+-----------------------
+
+Send a config to PSG as a ``multipart/form-data`` body.
+
+By default a config is sent URL-encoded, so the request holds the whole
+content, and every byte of a GCM binary outside the unreserved set is
+escaped to three characters. A :class:`MultipartBody` is read from the config
+a piece at a time while it is sent, and its length is known ahead of time,
+so the request has a ``Content-Length`` rather than being chunked.
+"""
+from typing import Dict, Iterator, Union
+import uuid
+
+from pypsg.cfg import PyConfig, BinConfig
+from pypsg.cfg.config import CHUNK_SIZE
+
+
+class MultipartBody:
+    """
+    A ``multipart/form-data`` request body that streams a config.
+
+    It can be given as ``data`` to ``requests``, and can be iterated over
+    more than once, so the request can be retried.
+
+    Parameters
+    ----------
+    cfg : PyConfig or BinConfig
+        The config to send as the ``file`` field.
+    fields : dict, optional
+        Other form fields to send before the config, such as ``type``.
+    chunk_size : int, optional
+        The largest piece of the config to send at a time.
+    boundary : str, optional
+        The string that separates the parts. By default a random one.
+
+    Attributes
+    ----------
+    cfg : PyConfig or BinConfig
+        The config to send.
+    fields : dict
+        The other form fields.
+    chunk_size : int
+        The largest piece of the config to send at a time.
+    boundary : str
+        The string that separates the parts.
+
+    Notes
+    -----
+    The length is found by encoding the config once without keeping it, so
+    the config must not change while the body is in use.
+    """
+    FILE_FIELD = 'file'
+
+    def __init__(
+        self,
+        cfg: Union[PyConfig, BinConfig],
+        fields: Dict[str, str] = None,
+        chunk_size: int = CHUNK_SIZE,
+        boundary: str = None
+    ):
+        self.cfg = cfg
+        self.fields = {} if fields is None else dict(fields)
+        self.chunk_size = chunk_size
+        self.boundary = uuid.uuid4().hex if boundary is None else boundary
+        self._length = None
+
+    @property
+    def content_type(self) -> str:
+        """
+        The value of the ``Content-Type`` header to send with the body.
+
+        :type: str
+        """
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    def _part_header(self, name: str) -> bytes:
+        return f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'.encode('UTF-8')
+
+    def _head(self) -> bytes:
+        """
+        Every part before the config, and the header of the config part.
+        """
+        parts = [
+            self._part_header(name) + str(value).encode('UTF-8') + b'\r\n'
+            for name, value in self.fields.items()
+        ]
+        parts.append(self._part_header(self.FILE_FIELD))
+        return b''.join(parts)
+
+    def _tail(self) -> bytes:
+        return f'\r\n--{self.boundary}--\r\n'.encode('UTF-8')
+
+    def __iter__(self) -> Iterator[Union[bytes, memoryview]]:
+        yield self._head()
+        yield from self.cfg.iter_chunks(self.chunk_size)
+        yield self._tail()
+
+    def __len__(self) -> int:
+        if self._length is None:
+            size = sum(len(chunk) for chunk in self.cfg.iter_chunks(self.chunk_size))
+            self._length = len(self._head()) + size + len(self._tail())
+        return self._length
@@ -1,11 +1,16 @@
 """
 Configuration for pytest.
 """
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import socket
+import threading
 import pytest
 import time
 
 from pypsg.docker import set_url_and_run, stop_psg
 from pypsg import settings
+from pypsg import PyConfig
 
 def pytest_addoption(parser: pytest.Parser) -> None:
     """
@@ -40,3 +45,100 @@ def psg_url(request: pytest.FixtureRequest)->str:
         yield settings.INTERNAL_PSG_URL
         stop_psg(strict=False)
 
+
+
+RAD_PATH = Path(__file__).parent / 'data' / 'simple.rad'
+CFG_PATH = Path(__file__).parent / 'data' / 'simple.cfg'
+
+
+@pytest.fixture
+def default_cfg():
+    """
+    Get a simple default configuration object.
+    """
+    return PyConfig.from_file(CFG_PATH)
+
+
+class StubPSGHandler(BaseHTTPRequestHandler):
+    """
+    Reply to every ``POST`` with ``server.reply``, after first using up any
+    queued in ``server.replies``, and to every ``GET``
+    with a short health page. Both use the status code ``server.status``.
+    ``server.on_post``, if set, is called before each ``POST`` is answered.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.server.requests.append(self.rfile.read(length))
+        self.server.n_calls += 1
+        self.server.peers.add(self.client_address)
+        if self.server.on_post is not None:
+            self.server.on_post()
+        with self.server.lock:
+            body = self.server.replies.pop(0) if self.server.replies else self.server.reply
+        self._send(body)
+
+    def do_GET(self):
+        self.server.n_checks += 1
+        self._send(b'PSG')
+
+    def _send(self, body: bytes):
+        self.send_response(self.server.status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _start_stub_psg() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubPSGHandler)
+    server.daemon_threads = True
+    server.reply = RAD_PATH.read_bytes()
+    server.replies = []
+    server.lock = threading.Lock()
+    server.status = 200
+    server.requests = []
+    server.n_calls = 0
+    server.n_checks = 0
+    server.peers = set()
+    server.on_post = None
+    server.url = f'http://127.0.0.1:{server.server_address[1]}/api.php'
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+@pytest.fixture
+def make_stub_psg():
+    """
+    A factory of local stand-ins for the PSG API. See ``stub_psg``.
+    """
+    servers = []
+
+    def make():
+        server = _start_stub_psg()
+        servers.append(server)
+        return server
+    yield make
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def stub_psg(make_stub_psg):
+    """
+    A local stand-in for the PSG API that always returns a rad file.
+
+    The server counts calls in ``n_calls`` and health checks in
+    ``n_checks``, keeps the body of each call in ``requests``, and records the client addresses it has seen in
+    ``peers``. Set ``status`` to make it fail.
+    """
+    return make_stub_psg()
@@ -0,0 +1,107 @@
+"""
+Test pypsg.aio module.
+"""
+import asyncio
+import threading
+import pytest
+
+from pypsg import PyRad
+from pypsg.request import PSGResponse
+from pypsg.exceptions import GlobESError
+from pypsg.aio import AsyncAPICall, iter_many, run_many
+
+
+# pylint: disable=redefined-outer-name
+
+
+def test_async_call(default_cfg, stub_psg):
+    """
+    Test a single awaitable call.
+    """
+    response = asyncio.run(AsyncAPICall(default_cfg, 'rad', url=stub_psg.url)())
+    assert isinstance(response, PSGResponse)
+    assert isinstance(response.rad, PyRad)
+
+
+def test_run_many(default_cfg, stub_psg):
+    """
+    Replies come back in order, one per config.
+    """
+    responses = asyncio.run(
+        run_many([default_cfg]*10, concurrency=3, output_type='rad', url=stub_psg.url)
+    )
+    assert len(responses) == 10
+    assert all(isinstance(response.rad, PyRad) for response in responses)
+    assert stub_psg.n_calls == 10
+
+
+def test_run_many_stream_upload(default_cfg, stub_psg):
+    """
+    Configs can be sent as streamed multipart uploads.
+    """
+    responses = asyncio.run(run_many(
+        [default_cfg]*3, concurrency=2, output_type='rad', url=stub_psg.url, stream_upload=True))
+    assert all(isinstance(response.rad, PyRad) for response in responses)
+    assert all(body.startswith(b'--') for body in stub_psg.requests)
+    call = AsyncAPICall(default_cfg, 'rad', url=stub_psg.url, stream_upload=True)
+    assert call.stream_upload
+
+
+def test_backpressure(default_cfg, stub_psg):
+    """
+    Configs are only pulled from the input when there is room for them.
+    """
+    pulled = []
+
+    def configs():
+        for i in range(20):
+            pulled.append(i)
+            yield default_cfg
+
+    async def consume_two():
+        n_seen = 0
+        agen = iter_many(configs(), concurrency=2, output_type='rad', url=stub_psg.url)
+        async for _ in agen:
+            n_seen += 1
+            if n_seen == 2:
+                break
+        await agen.aclose()
+    asyncio.run(consume_two())
+    assert len(pulled) < 20
+
+
+def test_configs_built_off_loop(default_cfg, stub_psg):
+    """
+    Configs are taken from the input in a worker thread, not on the event loop.
+    """
+    threads = []
+
+    def configs():
+        for _ in range(4):
+            threads.append(threading.get_ident())
+            yield default_cfg
+
+    async def run():
+        responses = await run_many(configs(), concurrency=2, output_type='rad', url=stub_psg.url)
+        return responses, threading.get_ident()
+    responses, loop_thread = asyncio.run(run())
+    assert len(responses) == 4
+    assert len(threads) == 4
+    assert loop_thread not in threads
+
+
+def test_errors(default_cfg, stub_psg):
+    """
+    Errors are either raised or returned.
+    """
+    stub_psg.reply = b'ERROR | GlobES | The GCM is malformed'
+    with pytest.raises(GlobESError):
+        asyncio.run(run_many([default_cfg]*3, output_type='rad', url=stub_psg.url))
+    responses = asyncio.run(
+        run_many([default_cfg]*3, output_type='rad', url=stub_psg.url, return_exceptions=True)
+    )
+    assert all(isinstance(response, GlobESError) for response in responses)
+
+
+if __name__ == '__main__':
+    pytest.main(args=[__file__])
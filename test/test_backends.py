@@ -0,0 +1,128 @@
+"""
+Test pypsg.backends module.
+"""
+import socket
+import pytest
+
+from pypsg import APICall
+from pypsg.backends import Backend, BackendPool, container_url
+from pypsg.batch import run_batch
+from pypsg.cache import ResponseCache
+from pypsg.exceptions import PSGBackendUnavailableError, PSGConnectionError
+
+
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def dead_url():
+    """
+    A URL that refuses connections.
+    """
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    return f'http://127.0.0.1:{port}/api.php'
+
+
+def test_least_outstanding():
+    """
+    Each call goes to the backend with the fewest calls in flight.
+    """
+    pool = BackendPool.from_urls(['http://a', 'http://b', 'http://c'])
+    first = [pool.acquire() for _ in range(3)]
+    assert len({b.url for b in first}) == 3
+    pool.release(first[1])
+    assert pool.acquire() is first[1]
+    assert all(b.outstanding == 1 for b in pool.backends)
+
+
+def test_add_remove():
+    """
+    Backends can be added and removed by URL.
+    """
+    pool = BackendPool(['http://a'])
+    pool.add(Backend('http://b'))
+    assert len(pool) == 2
+    with pytest.raises(ValueError):
+        pool.add('http://a/api.php')
+    assert pool.remove('http://a').url == 'http://a/api.php'
+    assert [b.url for b in pool.backends] == ['http://b/api.php']
+
+
+def test_from_containers():
+    """
+    Containers are addressed on localhost.
+    """
+    pool = BackendPool.from_containers({'psg0': 3000, 'psg1': 3001})
+    assert [(b.container, b.url) for b in pool.backends] == [
+        ('psg0', container_url(3000)),
+        ('psg1', container_url(3001))
+    ]
+
+
+def test_dead_backend_is_removed(default_cfg, stub_psg, dead_url):
+    """
+    A backend that refuses connections leaves the rotation.
+    """
+    pool = BackendPool.from_urls([dead_url, stub_psg.url], recheck_interval=60)
+    results = list(run_batch([default_cfg]*8, 'rad', workers=2, backends=pool))
+    assert sum(not result.ok for result in results) <= 1
+    assert [b.url for b in pool.healthy] == [stub_psg.url]
+    assert stub_psg.n_calls >= 7
+
+
+def test_backend_is_readded(default_cfg, stub_psg):
+    """
+    A failed backend comes back once it passes a health check.
+    """
+    pool = BackendPool.from_urls([stub_psg.url], recheck_interval=0)
+    stub_psg.status = 503
+    with pytest.raises(PSGConnectionError):
+        APICall(default_cfg, 'rad', backends=pool)()
+    assert pool.healthy == []
+    with pytest.raises(PSGBackendUnavailableError):
+        pool.acquire()
+    stub_psg.status = 200
+    APICall(default_cfg, 'rad', backends=pool)()
+    assert len(pool.healthy) == 1
+    assert stub_psg.n_checks >= 2
+
+
+@pytest.mark.parametrize('status,healthy', [(400, True), (404, True), (500, False), (503, False)])
+def test_client_error_keeps_backend(default_cfg, stub_psg, status, healthy):
+    """
+    Only a 5xx reply counts against a backend, since a 4xx means it answered.
+    """
+    pool = BackendPool.from_urls([stub_psg.url], recheck_interval=60)
+    stub_psg.status = status
+    with pytest.raises(PSGConnectionError):
+        APICall(default_cfg, 'rad', backends=pool)()
+    assert (len(pool.healthy) == 1) is healthy
+    assert pool.stats[stub_psg.url]['failures'] == (0 if healthy else 1)
+    assert pool.stats[stub_psg.url]['outstanding'] == 0
+
+
+def test_pool_and_url(default_cfg):
+    """
+    A call cannot have both a URL and a pool.
+    """
+    with pytest.raises(ValueError):
+        APICall(default_cfg, 'rad', url='http://a', backends=BackendPool(['http://b']))
+
+
+def test_cache_shared_across_backends(default_cfg, make_stub_psg, tmp_path):
+    """
+    A reply from one backend is served for the same call to any other.
+    """
+    servers = [make_stub_psg(), make_stub_psg()]
+    cache = ResponseCache(tmp_path)
+    pool = BackendPool.from_urls([server.url for server in servers])
+    APICall(default_cfg, 'rad', backends=pool, cache=cache)()
+    APICall(default_cfg, 'rad', backends=pool, cache=cache)()
+    assert sum(server.n_calls for server in servers) == 1
+    assert cache.hits == 1
+
+
+if __name__ == '__main__':
+    pytest.main(args=[__file__])
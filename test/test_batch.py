@@ -0,0 +1,70 @@
+"""
+Test pypsg.batch module.
+"""
+import pytest
+
+from pypsg import PyRad
+from pypsg.exceptions import GlobESError
+from pypsg.batch import run_batch, BatchResult
+
+
+# pylint: disable=redefined-outer-name
+
+
+@pytest.mark.parametrize('ordered', [True, False])
+def test_run_batch(default_cfg, stub_psg, ordered):
+    """
+    Every config gets exactly one result.
+    """
+    results = list(run_batch(
+        [default_cfg]*12, 'rad', workers=3, ordered=ordered, url=stub_psg.url))
+    assert len(results) == 12
+    assert all(isinstance(result, BatchResult) for result in results)
+    assert all(result.ok for result in results)
+    assert all(isinstance(result.response.rad, PyRad) for result in results)
+    indices = [result.index for result in results]
+    if ordered:
+        assert indices == list(range(12))
+    else:
+        assert sorted(indices) == list(range(12))
+
+
+def test_run_batch_stream_upload(default_cfg, stub_psg):
+    """
+    Configs can be sent as streamed multipart uploads.
+    """
+    results = list(run_batch([default_cfg]*3, 'rad', workers=2, url=stub_psg.url, stream_upload=True))
+    assert all(result.ok for result in results)
+    assert len(stub_psg.requests) == 3
+    assert all(body.startswith(b'--') for body in stub_psg.requests)
+
+
+def test_errors_are_captured(default_cfg, stub_psg):
+    """
+    PSG errors are stored on the result rather than raised.
+    """
+    stub_psg.reply = b'ERROR | GlobES | The GCM is malformed'
+    results = list(run_batch([default_cfg]*3, 'rad', workers=2, url=stub_psg.url))
+    assert len(results) == 3
+    assert not any(result.ok for result in results)
+    assert all(isinstance(result.error, GlobESError) for result in results)
+
+
+def test_lazy_input(default_cfg, stub_psg):
+    """
+    Configs are read from the input only as they are needed.
+    """
+    pulled = []
+
+    def configs():
+        for i in range(100):
+            pulled.append(i)
+            yield default_cfg
+    results = run_batch(configs(), 'rad', workers=2, max_pending=4, url=stub_psg.url)
+    next(results)
+    assert len(pulled) <= 5
+    results.close()
+
+
+if __name__ == '__main__':
+    pytest.main(args=[__file__])
@@ -0,0 +1,128 @@
+"""
+Test pypsg.cache module.
+"""
+import pytest
+
+from pypsg import APICall, PyRad
+from pypsg.cache import ResponseCache
+from pypsg.exceptions import GlobESError
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """
+    An empty cache in a temporary directory.
+    """
+    return ResponseCache(tmp_path / 'cache', max_bytes=1000)
+# pylint: disable=redefined-outer-name
+
+
+def test_key():
+    """
+    Keys depend on every part of the call.
+    """
+    key = ResponseCache.key(b'<OBJECT>Exoplanet', 'rad', None, 'url')
+    assert key == ResponseCache.key(b'<OBJECT>Exoplanet', 'rad', None, 'url')
+    assert key != ResponseCache.key(b'<OBJECT>Planet', 'rad', None, 'url')
+    assert key != ResponseCache.key(b'<OBJECT>Exoplanet', 'lyr', None, 'url')
+    assert key != ResponseCache.key(b'<OBJECT>Exoplanet', 'rad', 'globes', 'url')
+    assert key != ResponseCache.key(b'<OBJECT>Exoplanet', 'rad', None, 'other')
+    # content in pieces gives the same key as the whole
+    assert key == ResponseCache.key([b'<OBJECT>', memoryview(b'Exoplanet')], 'rad', None, 'url')
+
+
+def test_get_put(cache):
+    """
+    Test storing and retrieving replies.
+    """
+    assert cache.get('a'*64) is None
+    cache.put('a'*64, b'hello')
+    assert cache.get('a'*64) == b'hello'
+    assert cache.stats['hits'] == 1
+    assert cache.stats['misses'] == 1
+    assert cache.size == 5
+    # a new instance sees the same files
+    other = ResponseCache(cache.path, cache.max_bytes)
+    assert 'a'*64 in other
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.get('a'*64) is None
+
+
+def test_lru_eviction(cache):
+    """
+    The least recently used replies are evicted first.
+    """
+    cache.put('a'*64, b'x'*400)
+    cache.put('b'*64, b'x'*400)
+    cache.get('a'*64)
+    cache.put('c'*64, b'x'*400)
+    assert 'a'*64 in cache
+    assert 'b'*64 not in cache
+    assert 'c'*64 in cache
+    assert cache.size <= cache.max_bytes
+    cache.put('d'*64, b'x'*2000)
+    assert 'd'*64 not in cache
+
+
+def test_apicall_cache(default_cfg, stub_psg, tmp_path):
+    """
+    Identical calls only reach PSG once.
+    """
+    cache = ResponseCache(tmp_path / 'cache')
+    for _ in range(3):
+        response = APICall(default_cfg, 'rad', url=stub_psg.url, cache=cache)()
+        assert isinstance(response.rad, PyRad)
+    assert stub_psg.n_calls == 1
+    assert cache.hits == 2
+    assert cache.misses == 1
+    _ = APICall(default_cfg, 'noi', url=stub_psg.url, cache=cache)()
+    assert stub_psg.n_calls == 2
+
+
+def test_apicall_cache_stream_upload(default_cfg, stub_psg, tmp_path):
+    """
+    A streamed upload is cached without joining the config content.
+    """
+    cache = ResponseCache(tmp_path / 'cache')
+    for _ in range(2):
+        APICall(default_cfg, 'rad', url=stub_psg.url, cache=cache, stream_upload=True)()
+    assert default_cfg._content_cache is None
+    assert stub_psg.n_calls == 1
+    assert cache.hits == 1
+    # the key is the same as for a URL-encoded upload
+    APICall(default_cfg, 'rad', url=stub_psg.url, cache=cache)()
+    assert stub_psg.n_calls == 1
+
+
+def test_errors_not_cached(default_cfg, stub_psg, tmp_path):
+    """
+    Replies containing PSG errors are not stored.
+    """
+    cache = ResponseCache(tmp_path / 'cache')
+    stub_psg.reply = b'ERROR | GlobES | The GCM is malformed'
+    for _ in range(2):
+        with pytest.raises(GlobESError):
+            APICall(default_cfg, 'rad', url=stub_psg.url, cache=cache)()
+    assert stub_psg.n_calls == 2
+    assert len(cache) == 0
+
+
+@pytest.mark.parametrize('output_type', ['set', 'upd'])
+@pytest.mark.parametrize('stream', [False, True])
+def test_state_calls_not_cached(default_cfg, stub_psg, tmp_path, output_type, stream):
+    """
+    Calls that change the config stored by PSG always reach it.
+    """
+    cache = ResponseCache(tmp_path / 'cache')
+    stub_psg.reply = b''
+    for _ in range(2):
+        APICall(default_cfg, output_type, url=stub_psg.url, cache=cache, stream=stream)()
+    assert stub_psg.n_calls == 2
+    assert len(stub_psg.requests) == 2
+    assert cache.hits == cache.misses == 0
+    assert len(cache) == 0
+
+
+if __name__ == '__main__':
+    pytest.main(args=[__file__])
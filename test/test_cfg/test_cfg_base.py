@@ -142,6 +142,23 @@ def test_QuantityField():
     
     
 
+def test_read_only_values():
+    """
+    Arrays are stored as read-only views, and the originals are left alone.
+    """
+    x = np.array([1., 2., 3.])
+    y = np.array([4., 5., 6.])
+    q = QuantityField('quant', u.m, allow_table=True, fmt='.2f')
+    q.value = Table(x, y)
+    with pytest.raises(ValueError):
+        q.value.y[0] = 7.
+    assert x.flags.writeable and y.flags.writeable
+    profile = Profile('H2O', x)
+    with pytest.raises(ValueError):
+        profile._dat[0] = 7.
+    assert x.flags.writeable
+
+
 def test_CodedQuantityField():
     """
     Test the CodedQuantityField class
@@ -1,5 +1,6 @@
 
 
+import io
 import pytest
 
 import numpy as np
@@ -9,8 +10,8 @@ from astropy import units as u
 from pathlib import Path
 
 from pypsg.cfg.config import BinConfig
-from pypsg.cfg.base import Table
-from pypsg.cfg.models import Target, Geometry
+from pypsg.cfg.base import Table, Field
+from pypsg.cfg.models import Target, Geometry, Nadir
 from pypsg.cfg.models import NoAtmosphere, EquilibriumAtmosphere, ComaAtmosphere
 
 from pypsg.cfg.models import (
@@ -178,8 +179,144 @@ def test_CCD():
         )
     )
 
-    
-    
+
+
+def test_compiled_fields():
+    """
+    The fields are found once per class, in ``dir`` order, and each
+    instance gets its own copies.
+    """
+    assert [name for name, _ in Nadir._fields] == [
+        name for name in dir(Nadir) if name != 'content' and isinstance(getattr(Nadir, name), Field)
+    ]
+    assert 'zenith' in dict(Nadir._fields)
+    assert 'zenith' not in dict(Geometry._fields)
+    a = Target(name='a')
+    b = Target()
+    assert a.name is not b.name
+    assert a.name is not Target.name
+    assert Target.name.value is None
+    assert (a.name.value, b.name.value) == ('a', None)
+    assert list(a.fields) == [name for name, _ in Target._fields]
+
+
+def test_cached_content():
+    """
+    The content is cached until a field is set.
+    """
+    target = Target(name='a', diameter=1*u.km)
+    content = target.content
+    assert target.content is content
+    target.name = 'b'
+    assert target.content == content.replace(b'<OBJECT-NAME>a', b'<OBJECT-NAME>b')
+    target.name.value = 'c'
+    assert b'<OBJECT-NAME>c' in target.content
+    # values cannot be changed behind the cache
+    diameter = 2*u.km
+    target.diameter = diameter
+    with pytest.raises(ValueError):
+        target.diameter.value[...] = 3*u.km
+    assert diameter.flags.writeable
+    diameter[...] = 3*u.km
+    assert b'<OBJECT-DIAMETER>2' in target.content
+
+
+def test_binconfig_dict():
+    """
+    Keywords are read around the binary section, which can be viewed without a copy.
+    """
+    dat = np.array([1.5, -2.0, 3.25, 0.0], dtype=np.float32)
+    binary = dat.tobytes() + b'\n>#<' + np.float32(7.0).tobytes()
+    content = (
+        b'<OBJECT>Exoplanet\r\n# a comment\n\n<OBJECT-NAME>a > b\n'
+        b'<ATMOSPHERE-GCM-PARAMETERS>1,1,5\n<BINARY>' + binary + b'</BINARY>\n<GEOMETRY>Observatory'
+    )
+    cfg = BinConfig(content)
+    d = cfg.dict
+    assert list(d) == ['OBJECT', 'OBJECT-NAME', 'ATMOSPHERE-GCM-PARAMETERS', 'GEOMETRY', 'BINARY']
+    assert d['OBJECT'] == 'Exoplanet'
+    assert d['OBJECT-NAME'] == 'a > b'
+    assert d['GEOMETRY'] == 'Observatory'
+    assert isinstance(d['BINARY'], bytes)
+    assert d['BINARY'] == binary == cfg.binary
+    view = cfg.binary_view
+    assert view.readonly and view.obj is content
+    assert view == binary
+    assert np.all(np.frombuffer(view, dtype=np.float32)[:4] == dat)
+    assert 'BINARY' not in BinConfig(b'<OBJECT>Exoplanet').dict
+    with pytest.raises(ValueError):
+        _ = BinConfig(b'<OBJECT>Exoplanet\nGEOMETRY').dict
+    with pytest.raises(ValueError):
+        _ = BinConfig(b'<BINARY>abcd').dict
+
+
+def test_binconfig_memmap(tmp_path):
+    """
+    A config mapped from a file reads the same as one read into memory.
+    """
+    dat = np.arange(12, dtype=np.float32)
+    content = b'<OBJECT>Exoplanet\n<ATMOSPHERE-GCM-PARAMETERS>1,1,5\n<BINARY>' + dat.tobytes() + b'</BINARY>'
+    path = tmp_path / 'gcm.cfg'
+    path.write_bytes(content)
+    with BinConfig.from_file(path, memmap=True) as cfg:
+        assert cfg.has_binary
+        d = cfg.dict
+        assert d == BinConfig(content).dict
+        assert d['BINARY'] == dat.tobytes()
+        view = cfg.binary_view
+        assert view.readonly
+        assert not isinstance(view.obj, bytes)
+        assert np.all(np.frombuffer(view, dtype=np.float32) == dat)
+        # the file cannot be unmapped while a view of it is in use
+        with pytest.raises(BufferError):
+            cfg.close()
+        view.release()
+        assert cfg.binary == dat.tobytes()
+    assert cfg._map.closed
+    with pytest.raises(ValueError):
+        _ = cfg.dict
+    with BinConfig.from_file(path, memmap=True) as cfg:
+        assert cfg.content == content
+        assert isinstance(cfg.content, bytes)
+    assert cfg._map.closed and cfg.content == content
+    # an error with a view still in use is raised, not the failure to unmap
+    with pytest.raises(KeyError):
+        with BinConfig.from_file(path, memmap=True) as cfg:
+            view = cfg.binary_view
+            raise KeyError('in use')
+    view.release()
+    cfg.close()
+    assert cfg._map.closed
+    empty =tmp_path / 'empty.cfg'
+    empty.write_bytes(b'')
+    with BinConfig.from_file(empty, memmap=True) as cfg:
+        assert cfg.dict == {}
+    with BinConfig(content) as cfg:
+        pass
+    assert cfg.dict == BinConfig(content).dict
+
+
+def test_binconfig_chunks(tmp_path):
+    """
+    A config is streamed in views of its content, even when it is memory-mapped.
+    """
+    content = b'<OBJECT>Exoplanet\n<BINARY>' + np.arange(300, dtype=np.float32).tobytes() + b'</BINARY>'
+    path = tmp_path / 'gcm.cfg'
+    path.write_bytes(content)
+    with BinConfig.from_file(path, memmap=True) as cfg:
+        chunks = list(cfg.iter_chunks(chunk_size=500))
+        assert max(len(chunk) for chunk in chunks) == 500
+        assert b''.join(chunks) == content
+        assert not isinstance(cfg._buffer, bytes)
+        for chunk in chunks:
+            chunk.release()
+    file = io.BytesIO()
+    assert BinConfig(content).write_to(file) == len(content)
+    assert file.getvalue() == content
+    assert list(BinConfig(b'').iter_chunks()) == []
+
+
+
 
 if __name__ in '__main__':
     pytest.main([__file__])
\ No newline at end of file
@@ -0,0 +1,113 @@
+"""
+Tests for parameter sweeps.
+"""
+from pathlib import Path
+import numpy as np
+import pytest
+from astropy import units as u
+
+from pypsg.cfg import PyConfig, BinConfig, Sweep, models
+from pypsg.globes import PyGCM, structure
+
+CFG_PATH = Path(__file__).parent.parent / 'data' / 'advanced.cfg'
+
+
+@pytest.fixture
+def base():
+    """
+    The config to sweep.
+    """
+    return PyConfig.from_file(CFG_PATH)
+# pylint: disable=redefined-outer-name
+
+
+def test_sweep(base):
+    """
+    Each point matches the base config with the fields set.
+    """
+    sweep = base.sweep(
+        target__star_distance=[0.1, 0.2]*u.AU,
+        geometry__observer_altitude=[1, 2, 3]*u.pc
+    )
+    assert isinstance(sweep, Sweep)
+    assert len(sweep) == 6
+    n = 0
+    for point, cfg in sweep.items():
+        expected = PyConfig.from_file(CFG_PATH)
+        expected.target.star_distance = point['target__star_distance']
+        expected.geometry.observer_altitude = point['geometry__observer_altitude']
+        assert isinstance(cfg, BinConfig)
+        assert cfg.content == expected.content
+        n += 1
+    assert n == 6
+    assert base.content == PyConfig.from_file(CFG_PATH).content
+
+
+def test_updates(base):
+    """
+    Each update holds the fields that changed since the point before.
+    """
+    sweep = Sweep(
+        base,
+        target__star_distance=[0.1, 0.2]*u.AU,
+        target__season=[0, 90]*u.deg
+    )
+    updates = [cfg.content for cfg in sweep.updates()]
+    assert updates == [
+        b'<OBJECT-STAR-DISTANCE>0.10\n<OBJECT-SEASON>0.00',
+        b'<OBJECT-SEASON>90.00',
+        b'<OBJECT-STAR-DISTANCE>0.20\n<OBJECT-SEASON>0.00',
+        b'<OBJECT-SEASON>90.00',
+    ]
+    with pytest.raises(ValueError):
+        list(base.sweep(target__season=[None]).updates())
+
+
+def test_sweep_gcm():
+    """
+    Atmosphere axes of a config with a GCM match what the config would write.
+    """
+    def make_config():
+        pressure = structure.Pressure.from_limits(1*u.bar, 1e-5*u.bar, (4, 3, 2))
+        temperature = structure.Temperature.from_adiabat(
+            1.0, structure.SurfaceTemperature(300*u.K*np.ones((3, 2))), pressure)
+        h2o = structure.Molecule.constant('H2O', 1e-5*u.dimensionless_unscaled, (4, 3, 2))
+        return PyConfig(
+            target=models.Target(name='Exoplanet'),
+            atmosphere=models.EquilibriumAtmosphere(nmax=1, description='base'),
+            gcm=PyGCM(pressure, temperature, h2o)
+        )
+    sweep = make_config().sweep(
+        atmosphere__nmax=[2, 3],
+        # set by the GCM
+        atmosphere__description=['swept']
+    )
+    n = 0
+    for point, cfg in sweep.items():
+        expected = make_config()
+        expected.atmosphere.nmax = point['atmosphere__nmax']
+        expected.atmosphere.description = point['atmosphere__description']
+        assert cfg.content == expected.content
+        assert b'swept' not in cfg.content
+        n += 1
+    assert n == 2
+
+
+def test_invalid_axes(base):
+    """
+    Axes must name a field of the base config and have values.
+    """
+    with pytest.raises(ValueError):
+        base.sweep()
+    with pytest.raises(ValueError):
+        base.sweep(target__not_a_field=[1])
+    with pytest.raises(ValueError):
+        base.sweep(star_distance=[1])
+    with pytest.raises(ValueError):
+        base.sweep(target__season=[])
+    with pytest.raises(TypeError):
+        base.sweep(target__season=['spring'])
+
+
+if __name__ == '__main__':
+    pytest.main(args=[__file__])
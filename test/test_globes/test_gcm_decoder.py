@@ -1,7 +1,8 @@
 import numpy as np
+import pytest
 
 
-from pypsg.globes.decoder import GCMdecoder
+from pypsg.globes.decoder import GCMdecoder, get_gcm_binary
 
 # Test data
 header = '10,10,10,180,-90,18,9,O2,H2O,CO2'
@@ -64,3 +65,54 @@ def test_remove():
     decoder.remove('O2')
     assert not np.any([var=='O2' for var in decoder.header.split(',')])
     assert len(decoder.dat)==2000
+
+def test_from_psg_memmap(tmp_path):
+    data = np.random.rand(3000).astype('float32')
+    path = tmp_path / 'gcm.cfg'
+    path.write_bytes(
+        b'<OBJECT>Exoplanet\n<ATMOSPHERE-GCM-PARAMETERS>' + header.encode()
+        + b'\n<BINARY>' + data.tobytes() + b'</BINARY>'
+    )
+    for memmap in (False, True):
+        head, view = get_gcm_binary(path, memmap=memmap)
+        assert head == header
+        assert np.all(view == data)
+        assert not view.flags.writeable
+    decoder = GCMdecoder.from_psg(path, memmap=True)
+    assert np.all(decoder['O2'] == data[:1000].reshape(10,10,10))
+    # the view is copied before it is written to
+    decoder['O2'] = np.zeros((10,10,10))
+    assert np.all(decoder['O2'] == 0)
+    assert np.all(decoder['H2O'] == data[1000:2000].reshape(10,10,10))
+    assert np.all(get_gcm_binary(path)[1] == data)
+    with pytest.raises(ValueError, match='not closed'):
+        get_gcm_binary(path.read_bytes()[:-len(b'</BINARY>')])
+
+def test_remove_several():
+    data = np.arange(3000.)
+    decoder = GCMdecoder(header + ',Tsurf', np.concatenate([data, -np.arange(100.)]))
+    decoder.remove('O2', 'CO2')
+    assert decoder.header.split(',')[7:] == ['H2O', 'Tsurf']
+    assert np.all(decoder['H2O'] == data[1000:2000].reshape(10,10,10))
+    assert np.all(decoder['Tsurf'] == -np.arange(100.).reshape(10,10))
+    assert len(decoder.dat) == 1100
+    with pytest.raises(KeyError):
+        _ = decoder['O2']
+    # nothing is removed if any item is unknown
+    with pytest.raises(ValueError, match='O2'):
+        decoder.remove('H2O', 'O2')
+    assert decoder.header.split(',')[7:] == ['H2O', 'Tsurf']
+    assert len(decoder.dat) == 1100
+
+def test_index():
+    decoder = GCMdecoder(header, np.arange(3000.))
+    var = decoder['H2O']
+    assert np.shares_memory(var, decoder.dat)
+    assert np.all(var == np.arange(1000., 2000.).reshape(10,10,10))
+    decoder.rename_var('H2O', 'H2O_new')
+    assert np.all(decoder['H2O_new'] == var)
+    with pytest.raises(KeyError):
+        _ = decoder['H2O']
+    decoder.header = '10,10,10,180,-90,18,9,Tsurf,Psurf'
+    assert decoder['Psurf'].shape == (10, 10)
+    assert np.all(decoder['Psurf'] == np.arange(100., 200.).reshape(10,10))
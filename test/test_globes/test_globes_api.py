@@ -1,13 +1,14 @@
 """
 API tests for GlobES
 """
+import io
 import time
 import numpy as np
 import pytest
 from astropy import units as u
 from pypsg.globes import PyGCM, structure, GCMdecoder
 from pypsg import PyConfig, APICall
-from pypsg.cfg import models
+from pypsg.cfg import models, BinConfig
 
 class TestPyGCM:
     def test_init(self):
@@ -73,6 +74,132 @@ class TestPyGCM:
         cfg = pygcm.update_params()
         assert cfg.molecules.value[0].name == 'H2O'
     
+    def test_cached_content(self):
+        """
+        The GCM and config content is only encoded again after a change.
+        """
+        pressure = structure.Pressure.from_limits(1*u.bar,1e-5*u.bar,(10,10,10))
+        temperature = structure.Temperature.from_adiabat(
+            1.0, structure.SurfaceTemperature(300*u.K*np.ones((10,10))), pressure
+        )
+        pygcm = PyGCM(pressure, temperature)
+        content = pygcm.content
+        assert pygcm.content is content
+        pygcm.temperature.dat = pygcm.temperature.dat + 1*u.K
+        assert pygcm.content != content
+        # data cannot be changed behind the cache
+        with pytest.raises(ValueError):
+            pygcm.temperature.dat[0] = 0*u.K
+        tsurf = 300*u.K*np.ones((10,10))
+        _ = structure.SurfaceTemperature(tsurf)
+        assert tsurf.flags.writeable
+
+        h2o = structure.Molecule.constant('H2O', 1e-5*u.dimensionless_unscaled, (10,10,10))
+        cfg = PyConfig(gcm=PyGCM(pressure, temperature, h2o))
+        content = cfg.content
+        assert cfg.content is content
+        cfg.target.name = 'Earth'
+        assert cfg.content == b'<OBJECT-NAME>Earth\n' + content
+        content = cfg.content
+        cfg.gcm.temperature = structure.Temperature(temperature.dat + 1*u.K)
+        assert cfg.content.startswith(b'<OBJECT-NAME>Earth\n')
+        assert cfg.content != content
+
+    def test_binary(self):
+        """
+        The binary is encoded into one array, and only changed variables are encoded again.
+        """
+        shape = (10, 6, 4)
+        pressure = structure.Pressure.from_limits(1*u.bar,1e-5*u.bar,shape)
+        tsurf = structure.SurfaceTemperature(300*u.K*np.ones(shape[1:]))
+        temperature = structure.Temperature.from_adiabat(1.0, tsurf, pressure)
+        h2o = structure.Molecule.constant('H2O', 1e-5*u.dimensionless_unscaled, shape)
+        pygcm = PyGCM(pressure, temperature, h2o, tsurf=tsurf)
+        expected = np.concatenate([
+            np.swapaxes(v.dat.to_value(v.psg_unit).astype(np.float32), *((0, 1) if v.dat.ndim == 2 else (1, 2))).flatten()
+            for v in pygcm.variables
+        ])
+        flat = pygcm.flat
+        assert flat.dtype == np.float32
+        assert not flat.flags.writeable
+        assert np.all(flat == expected)
+        assert pygcm.flat is flat
+        assert bytes(pygcm.binary) == expected.tobytes()
+        assert pygcm.content == b''.join([
+            b'<ATMOSPHERE-GCM-PARAMETERS>', pygcm.header.encode(),
+            b'\n<BINARY>', expected.tobytes(), b'</BINARY>'
+        ])
+
+        h2o.dat = h2o.dat*2
+        expected[-h2o.dat.size:] = np.log10(2e-5)
+        assert np.allclose(pygcm.flat, expected)
+        assert np.allclose(flat[-h2o.dat.size:], -5)  # the old array is left alone
+        assert np.allclose(h2o.flat, np.log10(2e-5))
+
+        with pytest.raises(ValueError):
+            h2o.write_flat(np.empty(10, dtype=np.float32))
+
+    def test_from_cfg(self):
+        """
+        A GCM is read from a BinConfig through a view of its binary.
+        """
+        pressure = structure.Pressure.from_limits(1*u.bar,1e-5*u.bar,(10,10,10))
+        temperature = structure.Temperature.from_adiabat(
+            1.0, structure.SurfaceTemperature(300*u.K*np.ones((10,10))), pressure
+        )
+        pygcm = PyGCM(pressure, temperature)
+        binconfig = BinConfig(pygcm.content)
+        from_dict = PyGCM.from_cfg(binconfig.dict)
+        from_view = PyGCM.from_cfg(binconfig)
+        assert from_view.header == from_dict.header
+        assert np.all(from_view.flat == from_dict.flat)
+
+    def test_from_file_memmap(self, tmp_path):
+        """
+        A config with a GCM is read from a file mapped into memory, and an
+        error while it is read is not hidden by the file being unmapped.
+        """
+        pressure = structure.Pressure.from_limits(1*u.bar,1e-5*u.bar,(10,10,10))
+        temperature = structure.Temperature.from_adiabat(
+            1.0, structure.SurfaceTemperature(300*u.K*np.ones((10,10))), pressure
+        )
+        content = b'<OBJECT-NAME>Earth\n' + PyGCM(pressure, temperature).content
+        path = tmp_path / 'gcm.cfg'
+        path.write_bytes(content)
+        expected = PyConfig.from_bytes(content)
+        cfg = PyConfig.from_file(path, memmap=True)
+        assert cfg.gcm.header == expected.gcm.header
+        assert np.all(cfg.gcm.flat == expected.gcm.flat)
+        assert cfg.content == expected.content
+
+        # the header names more variables than the binary holds
+        path.write_bytes(content.replace(b'Pressure,Temperature', b'Pressure,Temperature,Pressure'))
+        with pytest.raises(ValueError, match='reshape'):
+            PyConfig.from_file(path, memmap=True)
+
+    def test_iter_chunks(self, tmp_path):
+        """
+        A config with a GCM is streamed without joining its content.
+        """
+        pressure = structure.Pressure.from_limits(1*u.bar,1e-5*u.bar,(10,10,10))
+        temperature = structure.Temperature.from_adiabat(
+            1.0, structure.SurfaceTemperature(300*u.K*np.ones((10,10))), pressure
+        )
+        h2o = structure.Molecule.constant('H2O', 1e-5*u.dimensionless_unscaled, (10,10,10))
+        cfg = PyConfig(target=models.Target(name='Earth'), gcm=PyGCM(pressure, temperature, h2o))
+        chunks = list(cfg.iter_chunks(chunk_size=1000))
+        assert cfg._content_cache is None and cfg.gcm._content_cache is None
+        assert max(len(chunk) for chunk in chunks) == 1000
+        assert any(isinstance(chunk, memoryview) for chunk in chunks)
+        assert b''.join(chunks) == cfg.content
+        # once the content is cached, it is streamed from the cache
+        assert all(chunk.obj is cfg.content for chunk in cfg.iter_chunks(chunk_size=1000))
+        file = io.BytesIO()
+        assert cfg.write_to(file) == len(cfg.content)
+        assert file.getvalue() == cfg.content
+        cfg.to_file(tmp_path / 'gcm.cfg')
+        assert (tmp_path / 'gcm.cfg').read_bytes() == cfg.content
+
     def test_to_psg(self,psg_url):
         nlayer = 10
         nlon = 30
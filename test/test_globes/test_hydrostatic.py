@@ -0,0 +1,101 @@
+"""
+Tests for the hydrostatic kernels.
+"""
+import numpy as np
+import pytest
+from astropy import units as u, constants as c
+
+from pypsg.globes import PyGCM, structure, GCMdecoder
+from pypsg.globes import hydrostatic
+
+MASS = 1*u.M_earth
+RADIUS = 1*u.R_earth
+MMM = 28.0
+
+
+def make_gcm(shape=(12, 5, 4)) -> PyGCM:
+    pressure = structure.Pressure.from_limits(1*u.bar, 1e-5*u.bar, shape)
+    rng = np.random.default_rng(0)
+    tsurf = structure.SurfaceTemperature((250 + 50*rng.random(shape[1:]))*u.K)
+    temperature = structure.Temperature.from_adiabat(1.0, tsurf, pressure)
+    h2o = structure.Molecule('H2O', rng.random(shape)*1e-3*u.dimensionless_unscaled)
+    co2 = structure.Molecule.constant('CO2', 1e-4, shape)
+    n2 = structure.Molecule.constant('N2', 0.79, shape)
+    o2 = structure.Molecule.constant('O2', 0.21, shape)
+    water = structure.Aerosol('Water', rng.random(shape)*1e-6*u.dimensionless_unscaled)
+    water_size = structure.AerosolSize.constant('Water_size', 1e-5*u.m, shape)
+    return PyGCM(pressure, temperature, h2o, co2, n2, o2, water, water_size)
+
+
+def reference_altitude(pressure, temperature, molar_mass):
+    """
+    The layer-by-layer ``Quantity`` integration used before the kernel.
+    """
+    z = [np.zeros(pressure.shape[1:])*u.km]
+    for i in range(pressure.shape[0]-1):
+        dp = pressure[i+1] - pressure[i]
+        rho = molar_mass[i]*(pressure[i] + 0.5*dp)/c.R/temperature[i]
+        g = c.G*MASS/(RADIUS + z[-1])**2
+        z.append((z[-1] - dp/rho/g).to(u.km))
+    return u.Quantity(z)
+
+
+def test_altitude():
+    gcm = make_gcm()
+    pressure = gcm.pressure.dat.to(u.bar)
+    temperature = gcm.temperature.dat.to(u.K)
+    expected = reference_altitude(pressure, temperature, np.full(pressure.shape, MMM)*u.g/u.mol)
+    z = gcm.altitude(MASS, RADIUS, MMM)
+    assert z.unit == u.km
+    assert np.allclose(z, expected, rtol=1e-10)
+    assert np.all(np.diff(z, axis=0) > 0)
+    # the unit of pressure does not matter
+    z_pa = hydrostatic.altitude(pressure.to_value(u.Pa), temperature.value, MMM/1e3,
+                                (c.G*MASS).si.value, RADIUS.si.value)
+    assert np.allclose(z_pa, z.to_value(u.m), rtol=1e-12)
+
+
+def test_columns():
+    gcm = make_gcm()
+    columns = gcm.columns(MASS, RADIUS, MMM)
+    assert list(columns) == ['H2O', 'CO2', 'N2', 'O2', 'Water']
+    pressure = gcm.pressure.dat.to(u.bar)
+    temperature = gcm.temperature.dat.to(u.K)
+    heights = np.diff(gcm.altitude(MASS, RADIUS, MMM), axis=0)
+    moles = pressure[:-1]*heights/c.R/temperature[:-1]
+    h2o = (moles*gcm.H2O.dat[:-1]).sum(axis=0).to(u.mol/u.cm**2)
+    water = (moles*MMM*u.g/u.mol*gcm.Water.dat[:-1]).sum(axis=0).to(u.kg/u.cm**2)
+    assert columns['H2O'].unit == u.mol/u.cm**2
+    assert np.allclose(columns['H2O'], h2o, rtol=1e-10)
+    assert columns['Water'].unit == u.kg/u.cm**2
+    assert np.allclose(columns['Water'], water, rtol=1e-10)
+    assert np.allclose(gcm.column('H2O', MASS, RADIUS, MMM), h2o, rtol=1e-10)
+    assert list(gcm.columns(MASS, RADIUS, MMM, names=['Water'])) == ['Water']
+    with pytest.raises(ValueError):
+        gcm.columns(MASS, RADIUS, MMM, names=['temperature'])
+
+
+def test_decoder_columns():
+    gcm = make_gcm()
+    decoder = GCMdecoder.from_psg(gcm.content)
+    pressure = 10**decoder['Pressure']*u.bar
+    temperature = decoder['Temperature']*u.K
+    molar_mass = decoder.get_mean_molec_mass()
+    expected = reference_altitude(pressure, temperature, molar_mass)
+    z = decoder.get_alt(MASS, RADIUS)
+    assert np.allclose(z, expected, rtol=1e-5)
+    columns = decoder.get_columns(MASS, RADIUS)
+    assert list(columns) == ['H2O', 'CO2', 'N2', 'O2', 'Water']
+    moles = pressure[:-1]*np.diff(z, axis=0)/c.R/temperature[:-1]
+    co2 = (moles*10**decoder['CO2'][:-1]).sum(axis=0).to(u.mol/u.cm**2)
+    water = (moles*molar_mass[:-1]*10**decoder['Water'][:-1]).sum(axis=0).to(u.kg/u.cm**2)
+    assert np.allclose(columns['CO2'], co2, rtol=1e-5)
+    assert np.allclose(columns['Water'], water, rtol=1e-5)
+    assert np.allclose(decoder.get_column_density('CO2', MASS, RADIUS), columns['CO2'])
+    assert np.allclose(decoder.get_column_clouds('Water', MASS, RADIUS), columns['Water'])
+    with pytest.raises(KeyError):
+        decoder.get_columns(MASS, RADIUS, names=['O3'])
+
+
+if __name__ == '__main__':
+    pytest.main(args=[__file__])
@@ -0,0 +1,77 @@
+"""
+Tests for the molecule database.
+"""
+import json
+import numpy as np
+import pytest
+from astropy import units as u
+
+from pypsg import settings
+from pypsg.globes import PyGCM, structure
+from pypsg.globes.molecules import MoleculeDatabase, get_molecule_database, MOLEC_DATA_PATH
+from pypsg.globes.decoder import GCMdecoder
+
+
+def test_database():
+    db = get_molecule_database()
+    assert db is get_molecule_database()
+    with open(MOLEC_DATA_PATH, 'rt', encoding='UTF-8') as file:
+        data = json.loads(file.read())
+    assert db.names == tuple(data)
+    assert len(db) == len(data)
+    for name, molec in data.items():
+        assert name in db
+        assert db.id(name) == molec['ID']
+        assert db.mass(name) == molec['mass']
+    assert np.all(db.masses_of(['CO2', 'H2O']) == [data['CO2']['mass'], data['H2O']['mass']])
+    assert np.all(db.ids_of(['O3', 'N2']) == [3, 22])
+    assert db.masses_of([]).shape == (0,)
+    with pytest.raises(KeyError):
+        db.masses_of(['H2O', 'Unobtainium'])
+    with pytest.raises(ValueError):
+        db.masses[0] = 0
+    with pytest.raises(ValueError):
+        MoleculeDatabase(['H2O'], [1, 2], [18.])
+
+
+def test_opacity_type():
+    db = get_molecule_database()
+    assert db.opacity_type('H2O') == 'HIT[1]'
+    assert db.opacity_type('N2O5') == settings.atmosphere_type_dict['N2O5']
+    assert db.opacity_type('NH3') == 'HIT[11]'
+    # the HITRAN entries come from the database, unless they are overridden
+    for name in db:
+        expected = settings.atmosphere_type_overrides.get(name, db.id(name))
+        assert settings.atmosphere_type_dict[name] == expected
+    assert settings.atmosphere_type_dict['NO'] == 8
+    with pytest.raises(KeyError, match='Unobtainium'):
+        db.opacity_type('Unobtainium')
+
+
+def test_update_params_unknown_molecule():
+    """
+    A GCM with a molecule that has no opacity database cannot set up the atmosphere.
+    """
+    shape = (4, 3, 2)
+    pressure = structure.Pressure.from_limits(1*u.bar, 1e-5*u.bar, shape)
+    temperature = structure.Temperature.from_adiabat(
+        1.0, structure.SurfaceTemperature(300*u.K*np.ones(shape[1:])), pressure)
+    h2o = structure.Molecule.constant('H2O', 1e-5*u.dimensionless_unscaled, shape)
+    atmosphere = PyGCM(pressure, temperature, h2o).update_params()
+    assert atmosphere.molecules.value[0].database == 'HIT[1]'
+    unknown = structure.Molecule.constant('Unobtainium', 1e-5*u.dimensionless_unscaled, shape)
+    with pytest.raises(KeyError, match='Unobtainium'):
+        PyGCM(pressure, temperature, unknown).update_params()
+
+
+def test_mean_molec_mass():
+    header = '3,4,2,180,-90,120,45,Pressure,H2O,CO2,Tsurf'
+    rng = np.random.default_rng(0)
+    h2o = rng.random((2, 3, 4))
+    co2 = rng.random((2, 3, 4))
+    dat = np.concatenate([np.zeros(24), np.log10(h2o).ravel(), np.log10(co2).ravel(), np.zeros(12)])
+    decoder = GCMdecoder(header, dat)
+    assert decoder.get_molecules() == ['H2O', 'CO2']
+    m = decoder.get_mean_molec_mass()
+    db = get_molecule_database()
+    assert np.allclose(m.to_value('g mol-1'), h2o*db.mass('H2O') + co2*db.mass('CO2'))
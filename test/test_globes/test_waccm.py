@@ -170,5 +170,60 @@ def test_call_psg(data_path,psg_url):
         assert not np.any(np.isnan(response.lyr.prof['CO2']))
     
 
+def make_waccm(path: Path, n_time=6, n_layer=5, n_lat=4, n_lon=8):
+    """
+    Write a small WACCM-like file with random data.
+    """
+    rng = np.random.default_rng(0)
+    with nc.Dataset(path, 'w', format='NETCDF4') as data:
+        for name, size in (('time', None), ('nbnd', 2), ('lev', n_layer), ('lat', n_lat), ('lon', n_lon), ('one', 1)):
+            data.createDimension(name, size)
+        data.createVariable('time', 'f8', ('time',))[:] = np.arange(n_time) + 1.
+        data.createVariable('time_bnds', 'f8', ('time', 'nbnd'))[:] = np.stack([np.arange(n_time), np.arange(n_time) + 1.], axis=1)
+        data.createVariable('lat', 'f8', ('lat',))[:] = np.linspace(-90, 90, n_lat)
+        data.createVariable('lon', 'f8', ('lon',))[:] = np.linspace(0, 360, n_lon, endpoint=False)
+        data.createVariable('hyam', 'f8', ('lev',))[:] = np.linspace(1e-3, 0, n_layer)
+        data.createVariable('hybm', 'f8', ('lev',))[:] = np.linspace(0, 1, n_layer)
+        p0 = data.createVariable('P0', 'f8')
+        p0.units = 'Pa'
+        p0.assignValue(1e5)
+        for name, units, dims, low, high in (
+            ('PS', 'Pa', ('time', 'lat', 'lon'), 9e4, 1.1e5),
+            ('TS', 'K', ('time', 'lat', 'lon'), 250, 300),
+            ('ASDIR', None, ('time', 'lat', 'lon'), 0, 1),
+            ('T', 'K', ('time', 'lev', 'lat', 'lon'), 150, 300),
+            ('U', 'm/s', ('time', 'lev', 'lat', 'lon'), -10, 10),
+            ('V', 'm/s', ('time', 'lev', 'lat', 'lon'), -10, 10),
+            ('CO2', 'mol/mol', ('time', 'lev', 'lat', 'lon'), 1e-5, 1e-3),
+            ('CLDLIQ', 'kg/kg', ('time', 'lev', 'lat', 'lon'), 0, 1e-6),
+            ('REL', 'micron', ('time', 'lev', 'lat', 'lon'), 1, 10),
+        ):
+            variable = data.createVariable(name, 'f4', dims)
+            if units is not None:
+                variable.units = units
+            variable[:] = rng.uniform(low, high, size=[n_time if d == 'time' else len(data.dimensions[d]) for d in dims])
+        data.createVariable('O2', 'f8', ('one',))[:] = 0.2
+    return path
+
+
+def test_to_pygcm_series(tmp_path):
+    """
+    A series of timesteps gives the same GCMs as converting each one.
+    """
+    path = make_waccm(tmp_path / 'waccm.nc')
+    itimes = [3, 0, 1, -1, 2, 3]
+    with nc.Dataset(path, 'r', format='NETCDF4') as data:
+        kwargs = dict(molecules=['CO2', 'O2'], aerosols=['Water'], background='N2')
+        expected = [rw.to_pygcm(data, itime, **kwargs).content for itime in itimes]
+        series = rw.to_pygcm_series(data, itimes, block_size=4, **kwargs)
+        assert next(series).content == expected[0]
+        assert [gcm.content for gcm in series] == expected[1:]
+        assert [gcm.content for gcm in rw.to_pygcm_series(data, iter(itimes), block_size=1, **kwargs)] == expected
+        with pytest.raises(IndexError):
+            list(rw.to_pygcm_series(data, [6], **kwargs))
+        with pytest.raises(ValueError):
+            next(rw.to_pygcm_series(data, [0], block_size=0, **kwargs))
+
+
 if __name__ in '__main__':
     pytest.main(args=[__file__,'--local'])
\ No newline at end of file
@@ -0,0 +1,100 @@
+"""
+Test that importing PyPSG has no side effects.
+"""
+from pathlib import Path
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+
+AUDIT_SCRIPT = """
+import sys
+events = []
+def hook(event, args):
+    if event == 'subprocess.Popen':
+        events.append(('popen', str(args[1])))
+    elif event == 'open' and '.pypsg' in str(args[0]):
+        events.append(('open', str(args[0])))
+    elif event == 'os.mkdir' and '.pypsg' in str(args[0]):
+        events.append(('mkdir', str(args[0])))
+sys.addaudithook(hook)
+import pypsg
+import pypsg.request
+print(repr(events))
+"""
+
+
+@pytest.fixture
+def clean_home(tmp_path):
+    env = dict(os.environ)
+    env['HOME'] = str(tmp_path)
+    env['USERPROFILE'] = str(tmp_path)
+    env['PYTHONPATH'] = os.pathsep.join([str(ROOT), env.get('PYTHONPATH', '')])
+    return tmp_path, env
+
+
+def test_import_has_no_side_effects(clean_home):
+    home, env = clean_home
+    result = subprocess.run(
+        [sys.executable, '-c', AUDIT_SCRIPT],
+        env=env, cwd=home, capture_output=True, text=True, check=True
+    )
+    events = eval(result.stdout.strip().splitlines()[-1])  # pylint: disable=eval-used
+    assert events == []
+    assert not (home / '.pypsg').exists()
+
+
+def test_settings_are_read_lazily(clean_home):
+    home, env = clean_home
+    script = 'from pypsg import settings; print(settings.get_setting("docker_autostart"))'
+    result = subprocess.run(
+        [sys.executable, '-c', script],
+        env=env, cwd=home, capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip().splitlines()[-1] == 'False'
+
+
+def test_heavy_modules_are_lazy(clean_home):
+    home, env = clean_home
+    script = (
+        'import sys, pypsg\n'
+        'print(sorted(m for m in ("netCDF4", "requests", "astropy", "pypsg.cfg") if m in sys.modules))\n'
+        'pypsg.PyConfig()\n'
+        'print("netCDF4" in sys.modules or "pypsg.globes" in sys.modules)\n'
+        'pypsg.globes.waccm_to_pygcm\n'
+        'print("netCDF4" in sys.modules)\n'
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', script],
+        env=env, cwd=home, capture_output=True, text=True, check=True
+    )
+    loaded, after_cfg, after_waccm = result.stdout.strip().splitlines()[-3:]
+    assert loaded == '[]'
+    assert after_cfg == 'False'
+    assert after_waccm == 'True'
+
+
+def test_url_is_resolved_on_first_use(monkeypatch):
+    from pypsg import docker, settings
+    from pypsg.cfg import PyConfig
+    from pypsg.request import APICall
+    calls = []
+    monkeypatch.setattr(docker, 'is_psg_installed', lambda: calls.append(1) or False)
+    monkeypatch.setattr(settings, 'get_setting',
+                        lambda key: settings.DEFAULT_SETTINGS[key])
+    docker.reset_url()
+    try:
+        api = APICall(PyConfig.from_file(ROOT / 'test' / 'data' / 'simple.cfg'), 'rad')
+        assert calls == []
+        assert api.url == settings.PSG_URL
+        assert APICall(api.cfg, 'rad').url == settings.PSG_URL
+        assert calls == [1]
+    finally:
+        docker.reset_url()
+
+
+if __name__ == '__main__':
+    pytest.main(args=[__file__])
@@ -0,0 +1,102 @@
+"""
+Test pypsg.lyr module.
+"""
+from pathlib import Path
+import numpy as np
+from astropy import units as u
+import pytest
+
+from pypsg import PyLyr
+
+LYR_PATH = Path(__file__).parent / 'data' / 'simple.lyr'
+
+
+@pytest.fixture
+def lyr_bytes():
+    """
+    The content of a small .lyr file.
+    """
+    return LYR_PATH.read_bytes()
+# pylint: disable=redefined-outer-name
+
+
+def test_from_bytes(lyr_bytes):
+    """
+    Both tables are read with the right names and units.
+    """
+    lyr = PyLyr.from_bytes(lyr_bytes)
+    names = ['Alt', 'Pressure', 'Temperature', 'H2O', 'CO2', 'O3',
+             'Water', 'Water_size', 'WaterIce', 'WaterIce_size']
+    assert lyr.prof.colnames == names
+    assert lyr.cg.colnames == names
+    assert len(lyr.prof) == 8
+    assert len(lyr.cg) == 8
+    assert lyr.prof['Alt'].unit == u.km
+    assert lyr.prof['Water_size'].unit == u.um
+    assert lyr.prof['H2O'].unit == u.dimensionless_unscaled
+    assert lyr.cg['H2O'].unit == u.m**-2
+    assert lyr.cg['Water'].unit == u.kg*u.m**-2
+    assert lyr.prof['Pressure'][0] == 2.6979e-01*u.bar
+    assert lyr.cg['WaterIce_size'][-1] == 5.9464e-02*u.um
+
+
+def test_tokenize(lyr_bytes):
+    """
+    Metadata, tables and integrated values come from one pass.
+    """
+    metadata, other_data, tab1, tab2, integrated = PyLyr._tokenize(lyr_bytes)
+    assert metadata['molecules'] == 'H2O,CO2,O3'
+    assert metadata['aero_size_units'] == 'um,um'
+    assert other_data['tab1_names'] == other_data['tab2_names']
+    assert other_data['tab1_names'].startswith('Alt[km] Pressure[bar]')
+    assert tab1.shape == tab2.shape == (8, 10)
+    assert integrated == ': 1.0e+20 1.0e+20 1.0e+20'
+
+
+def test_tokenize_first_line(lyr_bytes):
+    """
+    The first line is read like any other.
+    """
+    row = lyr_bytes.split(b'\n')[20]
+    _, _, expected, _, _ = PyLyr._tokenize(lyr_bytes)
+    # the row is ended by the separator on the first line of the file
+    _, _, tab1, tab2, _ = PyLyr._tokenize(row + b'\n' + lyr_bytes)
+    assert tab1.shape == (1, 10)
+    assert np.all(tab1[0] == expected[0])
+    assert np.all(tab2 == expected)
+
+
+def test_memoryview(lyr_bytes):
+    """
+    A memoryview is parsed like the bytes it refers to.
+    """
+    expected = PyLyr.from_bytes(lyr_bytes)
+    for b in (lyr_bytes, lyr_bytes.replace(b'\n', b'\r\n')):
+        lyr = PyLyr.from_bytes(memoryview(b))
+        assert lyr.prof.colnames == expected.prof.colnames
+        assert np.all(lyr.prof['Pressure'] == expected.prof['Pressure'])
+        assert np.all(lyr.cg['H2O'] == expected.cg['H2O'])
+
+
+def test_table_row():
+    """
+    Rows contain a decimal point, and separators do not.
+    """
+    assert PyLyr._table_row(b'#   0.000  1.0e+00') == b'   0.000  1.0e+00'
+    assert PyLyr._table_row(b'# -------') == b''
+    assert PyLyr._table_row(b'#   1   2') == b''
+    assert PyLyr._table_row(b'# Alt[km] Pressure[bar]') is None
+    assert PyLyr._table_row(b'no comment 1.0') is None
+
+
+def test_ragged(lyr_bytes):
+    """
+    Rows of different lengths are rejected.
+    """
+    ragged = lyr_bytes.replace(b'  4.6005e-01\n', b'\n', 1)
+    with pytest.raises(ValueError):
+        PyLyr.from_bytes(ragged)
+
+
+if __name__ == '__main__':
+    pytest.main(args=[__file__])
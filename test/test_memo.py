@@ -0,0 +1,89 @@
+"""
+Test pypsg.memo module.
+"""
+from pathlib import Path
+import numpy as np
+import pytest
+
+from pypsg import PyRad, PyTrn, PyConfig
+from pypsg.request import PSGResponse
+from pypsg import memo
+
+DATA = Path(__file__).parent / 'data'
+
+
+@pytest.fixture
+def enabled():
+    """
+    Turn the memo on for the duration of a test.
+    """
+    memo.enable()
+    yield memo.memo
+    memo.disable()
+# pylint: disable=redefined-outer-name,unused-argument
+
+
+def test_disabled_by_default():
+    """
+    Nothing is memoized unless asked for.
+    """
+    b = (DATA / 'simple.rad').read_bytes()
+    rad1 = PyRad.from_bytes(b)
+    rad2 = PyRad.from_bytes(b)
+    assert not np.shares_memory(rad1['Total'].value, rad2['Total'].value)
+    rad1['Total'][0] = 0
+    assert memo.memo.stats['entries'] == 0
+
+
+def test_rad_trn(enabled):
+    """
+    Repeated parses share read-only data.
+    """
+    for path, cls in [(DATA / 'simple.rad', PyRad), (DATA / 'speculoos3.trn', PyTrn)]:
+        b = path.read_bytes()
+        first = cls.from_bytes(b)
+        second = cls.from_bytes(b)
+        assert isinstance(second, cls)
+        assert first is not second
+        assert np.shares_memory(first.wl.value, second.wl.value)
+        with pytest.raises(ValueError):
+            first.wl[0] = 0
+        # replacing a column only changes the caller's copy
+        first['Wave/freq'] = first.wl * 2
+        assert np.all(cls.from_bytes(b).wl == second.wl)
+    assert enabled.hits == 4
+    assert enabled.misses == 2
+
+
+def test_response(enabled):
+    """
+    The tables of multi-file replies are memoized once each.
+    """
+    cfg = (DATA / 'simple.cfg').read_bytes()
+    rad = (DATA / 'simple.rad').read_bytes()
+    b = b'results_cfg.txt\n' + cfg + b'\nresults_rad.txt\n' + rad
+    first = PSGResponse.from_bytes(b)
+    second = PSGResponse.from_bytes(b)
+    assert isinstance(second.cfg, PyConfig)
+    assert first.cfg is not second.cfg
+    assert np.shares_memory(first.rad.wl.value, second.rad.wl.value)
+    assert enabled.stats['entries'] == 1
+    assert enabled.size == sum(col.nbytes for col in first.rad.itercols())
+
+
+def test_byte_budget():
+    """
+    The memo never holds more than its budget.
+    """
+    b = (DATA / 'simple.rad').read_bytes()
+    rad = PyRad.from_bytes(b)
+    nbytes = sum(col.nbytes for col in rad.itercols())
+    small = memo.ParsedMemo(max_bytes=nbytes)
+    small.lookup('a', b, lambda: PyRad.from_bytes(b))
+    small.lookup('b', b, lambda: PyRad.from_bytes(b))
+    assert small.stats['entries'] == 1
+    assert small.size <= nbytes
+
+
+if __name__ == '__main__':
+    pytest.main(args=[__file__])
@@ -0,0 +1,144 @@
+"""
+Test pypsg.parse module.
+"""
+from pathlib import Path
+import re
+import numpy as np
+import pytest
+
+from pypsg import PyRad
+from pypsg.parse import split_header, parse_table, split_sections, SectionSplitter
+
+RAD_PATH = Path(__file__).parent / 'data' / 'simple.rad'
+
+
+def test_parse_table():
+    """
+    The numbers match a line-by-line parse.
+    """
+    b = RAD_PATH.read_bytes()
+    header, values = parse_table(b)
+    lines = [line for line in b.split(b'\n') if line and not line.startswith(b'#')]
+    expected = np.array([np.fromstring(line.decode(), sep=' ') for line in lines])
+    assert np.array_equal(values, expected)
+    assert header.startswith('# ---')
+    assert header.endswith('# Wave/freq Total Noise Stellar Planet')
+
+
+def test_carriage_returns():
+    """
+    Windows line endings are ignored.
+    """
+    b = RAD_PATH.read_bytes()
+    header, values = parse_table(b.replace(b'\n', b'\r\n'))
+    expected_header, expected_values = parse_table(b)
+    assert header == expected_header
+    assert np.array_equal(values, expected_values)
+
+
+def test_comments_in_data():
+    """
+    Comment lines after the start of the data go in the header.
+    """
+    header, values = parse_table(b'# a\n1 2\n# b\n\n3 4\n')
+    assert header == '# a\n# b'
+    assert values.tolist() == [[1, 2], [3, 4]]
+
+
+def test_ragged():
+    """
+    Rows with different numbers of values are rejected.
+    """
+    with pytest.raises(ValueError):
+        parse_table(b'# a\n1 2\n3\n')
+
+
+def test_header_only():
+    """
+    A file with no data gives an empty table.
+    """
+    header, data = split_header(b'# a\n# b')
+    assert (header, data) == ('# a\n# b', b'')
+    assert parse_table(b'# a\n')[1].shape == (0, 0)
+
+
+@pytest.mark.parametrize('b', [
+    RAD_PATH.read_bytes(),
+    RAD_PATH.read_bytes().replace(b'\n', b'\r\n'),
+    b'# a\n1 2\n# b\n\n3 4\n',
+    b'# a\n',
+])
+def test_memoryview(b):
+    """
+    A memoryview is parsed like the bytes it refers to.
+    """
+    header, values = parse_table(memoryview(b))
+    expected_header, expected_values = parse_table(b)
+    assert header == expected_header
+    assert np.array_equal(values, expected_values)
+    with pytest.raises(ValueError):
+        parse_table(memoryview(b'# a\n1 2\n3\n'))
+
+
+def test_rad_from_bytes():
+    """
+    Each named column becomes a quantity.
+    """
+    rad = PyRad.from_bytes(RAD_PATH.read_bytes())
+    assert rad.colnames == ['Wave/freq', 'Total', 'Noise', 'Stellar', 'Planet']
+    assert len(rad) == 50
+    assert rad.wl.unit == 'um'
+
+
+SECTIONS = [
+    b'preamble\nresults_cfg.txt\n<A>1\n\nresults_rad.txt\n# rad\n1 2\n  \n',
+    b'results_rad.txt\nfirst\nresults_rad.txt\nsecond',
+    b'results_rad_txt x results_no\ntxt results_a1.txt\t\x0bb\x0c ',
+    b'results_.txt results_rad.txtresults_noi.txt',
+    b'no sections here',
+]
+
+
+def regex_sections(b: bytes):
+    """
+    The sections found by the original regular expression splitter.
+    """
+    split_text = re.split(rb'results_([\w]+).txt', b)
+    return [(name, dat.strip()) for name, dat in zip(split_text[1::2], split_text[2::2])]
+
+
+@pytest.mark.parametrize('b', SECTIONS)
+def test_split_sections(b):
+    """
+    Sections are found as the regular expression finds them.
+    """
+    sections = [(name, bytes(content)) for name, content in split_sections(b)]
+    assert sections == regex_sections(b)
+
+
+@pytest.mark.parametrize('b', SECTIONS)
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 1000])
+def test_section_splitter(b, size):
+    """
+    The sections do not depend on how the reply is chunked.
+    """
+    splitter = SectionSplitter()
+    sections = []
+    for i in range(0, len(b), size):
+        sections += splitter.feed(b[i:i+size])
+    sections += splitter.close()
+    assert sections == regex_sections(b)
+
+
+def test_section_splitter_early():
+    """
+    A section is handed out once the next marker arrives.
+    """
+    splitter = SectionSplitter()
+    assert splitter.feed(b'results_rad.txt\r\n1 2\r\nresults_tr') == []
+    assert splitter.feed(b'n.txt\n3') == [(b'rad', b'1 2')]
+    assert splitter.close() == [(b'trn', b'3')]
+
+
+if __name__ == '__main__':
+    pytest.main(args=[__file__])
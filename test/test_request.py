@@ -8,6 +8,8 @@ import logging
 
 from pypsg import PyConfig, APICall, PyRad, PyLyr, PyTrn
 from pypsg import request as psgrequest
+from pypsg import exceptions
+from pypsg.upload import MultipartBody
 
 
 @pytest.fixture
@@ -99,5 +101,100 @@ def test_api_call_advanced(advanced_cfg, psg_url,logger):
     assert response.rad.wl.unit == u.micron
 
 
+def all_reply() -> bytes:
+    """
+    A reply with several files, built from the test data.
+    """
+    data = Path(__file__).parent / 'data'
+    parts = []
+    for name, filename in [('cfg', 'simple.cfg'), ('rad', 'simple.rad'), ('lyr', 'simple.lyr'), ('trn', 'speculoos3.trn')]:
+        parts.append(f'results_{name}.txt\r\n'.encode() + (data / filename).read_bytes())
+    return b'\n'.join(parts)
+
+
+def test_response_from_chunks():
+    """
+    A reply parsed as it is received matches one parsed at the end.
+    """
+    b = all_reply()
+    expected = psgrequest.PSGResponse.from_bytes(b)
+    response = psgrequest.PSGResponse.from_chunks(b[i:i+1000] for i in range(0, len(b), 1000))
+    assert response.noi is None and expected.noi is None
+    assert response.cfg.content == expected.cfg.content
+    assert (response.rad['Total'] == expected.rad['Total']).all()
+    assert (response.trn['Total'] == expected.trn['Total']).all()
+    assert (response.lyr.prof['Alt'] == expected.lyr.prof['Alt']).all()
+
+
+def test_api_call_stream(default_cfg, stub_psg):
+    """
+    A streamed call gives the same response.
+    """
+    stub_psg.reply = all_reply()
+    expected = APICall(default_cfg, 'all', url=stub_psg.url)()
+    response = APICall(default_cfg, 'all', url=stub_psg.url, stream=True)()
+    assert response.cfg.content == expected.cfg.content
+    assert (response.rad['Total'] == expected.rad['Total']).all()
+    assert isinstance(response.trn, PyTrn)
+    assert isinstance(response.lyr, PyLyr)
+
+
+def test_api_call_stream_upload(default_cfg, stub_psg):
+    """
+    A streamed upload sends the config as a multipart form with a known length.
+    """
+    expected = APICall(default_cfg, 'rad', url=stub_psg.url)()
+    response = APICall(default_cfg, 'rad', url=stub_psg.url, stream_upload=True)()
+    assert (response.rad['Total'] == expected.rad['Total']).all()
+    body = stub_psg.requests[-1]
+    boundary = body[:body.index(b'\r\n')]
+    parts = body.split(boundary)
+    assert parts[0] == b'' and parts[-1] == b'--\r\n'
+    fields = {}
+    for part in parts[1:-1]:
+        head, _, value = part.partition(b'\r\n\r\n')
+        name = head.split(b'name="')[1].split(b'"')[0].decode()
+        fields[name] = value[:-2]
+    assert fields == {'type': b'rad', 'file': default_cfg.content}
+    body_stream = MultipartBody(default_cfg, {'type': 'rad'}, chunk_size=100)
+    assert len(body_stream) == len(b''.join(body_stream))
+    with pytest.raises(TypeError):
+        APICall(default_cfg, 'rad', url=stub_psg.url, stream_upload='yes')
+
+
+def test_api_call_stream_error(default_cfg, stub_psg):
+    """
+    PSG errors are raised from a streamed call.
+    """
+    stub_psg.reply = b'results_rad.txt\nERROR | GlobES | bad\n'
+    with pytest.raises(exceptions.GlobESError):
+        APICall(default_cfg, 'all', url=stub_psg.url, stream=True)()
+
+
+def test_parse_exceptions():
+    """
+    Errors are raised and warnings are warned.
+    """
+    psgrequest.parse_exceptions(b'results_rad.txt\n1 2\n')
+    with pytest.warns(exceptions.PUMASWarning, match='slow'):
+        psgrequest.parse_exceptions(b'WARNING | PUMAS | slow\r\n')
+    with pytest.raises(exceptions.GlobESError, match='^bad$'):
+        psgrequest.parse_exceptions(b'x\r\nERROR | GlobES | bad\r\n')
+    with pytest.raises(exceptions.PSGMultiError):
+        psgrequest.parse_exceptions(b'ERROR | GlobES | a\nERROR | Other | b')
+    with pytest.raises(exceptions.UnknownPSGError, match=r'^c ERROR \| A \| d$'):
+        psgrequest.parse_exceptions(b'ERROR | | a\nERROR | B | c ERROR | A | d')
+
+
+def test_parse_exceptions_binary():
+    """
+    Text inside a binary block is not searched.
+    """
+    binary = b'<BINARY>\x00\xffERROR | GlobES | no\n\x80</BINARY>'
+    psgrequest.parse_exceptions(b'<DATA>' + binary + b'\n' + binary)
+    with pytest.raises(exceptions.GlobESError, match='^yes$'):
+        psgrequest.parse_exceptions(binary + b'\nERROR | GlobES | yes\n' + binary)
+
+
 if __name__ == '__main__':
     pytest.main(args=[__file__])
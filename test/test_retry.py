@@ -0,0 +1,182 @@
+"""
+Test pypsg.retry module.
+"""
+import threading
+import time
+import pytest
+import requests
+
+from pypsg import APICall, PyRad, settings
+from pypsg import retry
+from pypsg import request as psgrequest
+from pypsg.retry import RetryPolicy, RateLimiter
+from pypsg.exceptions import PSGBusyError, PSGConnectionError, GlobESError
+
+BUSY = b'Your other API call is still running, please let it finish, wait 10 minutes, or consider installing the PSG Docker version'
+
+
+# pylint: disable=redefined-outer-name
+
+
+def _http_error(status: int) -> PSGConnectionError:
+    reply = requests.Response()
+    reply.status_code = status
+    try:
+        raise requests.HTTPError(response=reply)
+    except requests.HTTPError as err:
+        try:
+            raise PSGConnectionError(b'') from err
+        except PSGConnectionError as psg_err:
+            return psg_err
+
+
+def test_is_retryable():
+    """
+    Busy servers, dropped connections and some status codes are retried.
+    """
+    policy = RetryPolicy()
+    assert policy.is_retryable(PSGBusyError('busy'))
+    assert policy.is_retryable(requests.ConnectionError())
+    assert policy.is_retryable(_http_error(503))
+    assert not policy.is_retryable(_http_error(404))
+    assert not policy.is_retryable(GlobESError('bad config'))
+
+
+def test_delay():
+    """
+    The wait grows exponentially up to a cap.
+    """
+    policy = RetryPolicy(backoff=1, multiplier=2, max_backoff=5, jitter=False)
+    assert [policy.delay(n) for n in range(1, 5)] == [1, 2, 4, 5]
+    policy = RetryPolicy(backoff=1, multiplier=2, max_backoff=5)
+    assert all(0 <= policy.delay(3) <= 4 for _ in range(100))
+
+
+def test_run():
+    """
+    Retryable errors are retried, others are raised at once.
+    """
+    waits = []
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise PSGBusyError('busy')
+        return 'done'
+    policy = RetryPolicy(max_attempts=5, jitter=False)
+    assert policy.run(flaky, sleep=waits.append) == 'done'
+    assert waits == [1, 2]
+
+    def broken():
+        raise GlobESError('bad config')
+    with pytest.raises(GlobESError):
+        policy.run(broken, sleep=waits.append)
+    assert len(waits) == 2
+
+    attempts.clear()
+    with pytest.raises(PSGBusyError):
+        RetryPolicy(max_attempts=2).run(flaky, sleep=waits.append)
+    assert len(attempts) == 2
+
+
+def test_single_flight():
+    """
+    No more than ``concurrency`` calls run at once.
+    """
+    limiter = RateLimiter(concurrency=1)
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def work():
+        with limiter.limit():
+            with lock:
+                running.append(1)
+                peak.append(len(running))
+            time.sleep(0.01)
+            with lock:
+                running.pop()
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(peak) == 1
+
+
+def test_token_bucket():
+    """
+    Calls start no faster than ``rate``.
+    """
+    limiter = RateLimiter(concurrency=4, rate=50, burst=1)
+    start = time.monotonic()
+    for _ in range(6):
+        with limiter.limit():
+            pass
+    assert time.monotonic() - start >= 5/50 * 0.9
+
+
+def test_limiter_registry():
+    """
+    Only the public server is limited by default.
+    """
+    assert isinstance(retry.get_limiter(settings.PSG_URL, 'key'), RateLimiter)
+    assert retry.get_limiter(settings.PSG_URL, 'key') is retry.get_limiter(settings.PSG_URL, 'key')
+    assert retry.get_limiter(settings.PSG_URL, 'key') is not retry.get_limiter(settings.PSG_URL, 'other')
+    assert retry.get_limiter('http://localhost:3000/api.php') is None
+    limiter = RateLimiter(concurrency=2)
+    retry.set_limiter('http://localhost:3000/api.php', limiter)
+    try:
+        assert retry.get_limiter('http://localhost:3000/api.php') is limiter
+    finally:
+        retry.set_limiter('http://localhost:3000/api.php', None)
+
+
+def test_busy_server_is_retried(default_cfg, stub_psg):
+    """
+    An APICall with a retry policy waits out a busy server.
+    """
+    stub_psg.replies = [BUSY, BUSY]
+    with pytest.raises(PSGBusyError):
+        APICall(default_cfg, 'rad', url=stub_psg.url)()
+    policy = RetryPolicy(backoff=0.01)
+    response = APICall(default_cfg, 'rad', url=stub_psg.url, retry=policy)()
+    assert isinstance(response.rad, PyRad)
+    assert stub_psg.n_calls == 3
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_limiter_held_while_reading(default_cfg, stub_psg, monkeypatch, stream):
+    """
+    The limiter is not released until the reply has been read.
+    """
+    held = []
+
+    class Limiter(RateLimiter):
+        def acquire(self):
+            super().acquire()
+            held.append(True)
+
+        def release(self):
+            held.append(False)
+            super().release()
+    seen = []
+    from_chunks = psgrequest.PSGResponse.from_chunks
+    def check_held(chunks):
+        seen.append(held[-1])
+        return from_chunks(chunks)
+    monkeypatch.setattr(psgrequest.PSGResponse, 'from_chunks', check_held)
+    stub_psg.reply = b'results_rad.txt\n' + stub_psg.reply
+    retry.set_limiter(stub_psg.url, Limiter(), settings.get_setting('api_key'))
+    try:
+        response = APICall(default_cfg, 'all', url=stub_psg.url, stream=stream)()
+    finally:
+        retry.set_limiter(stub_psg.url, None, settings.get_setting('api_key'))
+    assert isinstance(response.rad, PyRad)
+    assert held == [True, False]
+    assert seen == ([True] if stream else [])
+
+
+if __name__ == '__main__':
+    pytest.main(args=[__file__])
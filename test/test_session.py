@@ -0,0 +1,62 @@
+"""
+Test pypsg.session module.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+
+from pypsg import APICall, PyRad
+from pypsg.session import SessionPool
+
+
+# pylint: disable=redefined-outer-name
+
+
+def test_pool_init():
+    """
+    Test SessionPool initialization.
+    """
+    pool = SessionPool(pool_connections=2, pool_maxsize=4)
+    adapter = pool.session.get_adapter('http://localhost')
+    assert adapter._pool_connections == 2
+    assert adapter._pool_maxsize == 4
+    with pytest.raises(ValueError):
+        SessionPool(pool_maxsize=0)
+
+
+def test_shared_session():
+    """
+    Shared pools hand the same session to every thread, others do not.
+    """
+    shared = SessionPool(shared=True)
+    with ThreadPoolExecutor(4) as executor:
+        sessions = set(executor.map(lambda _: id(shared.session), range(8)))
+    assert len(sessions) == 1
+    local = SessionPool(shared=False)
+    assert local.session is local.session
+    with ThreadPoolExecutor(2) as executor:
+        other = executor.submit(lambda: local.session).result()
+    assert other is not local.session
+
+
+def test_keep_alive(default_cfg, stub_psg):
+    """
+    Consecutive calls reuse the same connection.
+    """
+    with SessionPool() as pool:
+        for _ in range(3):
+            response = APICall(default_cfg, 'rad', url=stub_psg.url, session=pool)()
+            assert isinstance(response.rad, PyRad)
+    assert stub_psg.n_calls == 3
+    assert len(stub_psg.peers) == 1
+
+
+def test_apicall_session_type(default_cfg):
+    """
+    APICall only accepts SessionPool objects.
+    """
+    with pytest.raises(TypeError):
+        APICall(default_cfg, 'rad', url='testurl', session='not a pool')
+
+
+if __name__ == '__main__':
+    pytest.main(args=[__file__])
@@ -0,0 +1,153 @@
+"""
+Test pypsg.stateful module.
+"""
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+import threading
+import pytest
+import numpy as np
+from astropy import units as u
+
+from pypsg import PyConfig, PyRad
+from pypsg.cfg import BinConfig
+from pypsg.globes import PyGCM, structure
+from pypsg.backends import BackendPool
+from pypsg.stateful import StatefulSession, config_lines, config_changes
+
+
+# pylint: disable=redefined-outer-name
+
+
+def gcm_cfg(tsurf=300*u.K) -> PyConfig:
+    """
+    A config with a small GCM.
+    """
+    shape = (5, 4, 3)
+    pressure = structure.Pressure.from_limits(1*u.bar, 1e-5*u.bar, shape)
+    tsurf = structure.SurfaceTemperature(tsurf*np.ones(shape[1:]))
+    temperature = structure.Temperature.from_adiabat(1.0, tsurf, pressure)
+    h2o = structure.Molecule.constant('H2O', 1e-5, shape)
+    cfg = PyConfig.from_file(Path(__file__).parent / 'data' / 'simple.cfg')
+    cfg.gcm = PyGCM(pressure, temperature, h2o, tsurf=tsurf)
+    return cfg
+
+
+def sent(server) -> list:
+    """
+    The type and file of each request a stub server has received.
+    """
+    calls = []
+    for body in server.requests:
+        form = parse_qs(body.decode('ascii'), keep_blank_values=True)
+        calls.append((form.get('type', [None])[0], form['file'][0].encode()))
+    server.requests.clear()
+    return calls
+
+
+def test_config_lines(default_cfg):
+    """
+    Lines are keyed by keyword, and the binary block is kept whole.
+    """
+    lines = config_lines(default_cfg.content)
+    assert lines == {key: f'<{key}>{value}'.encode() for key, value in BinConfig(default_cfg.content).dict.items()}
+    cfg = gcm_cfg()
+    lines = config_lines(cfg.content)
+    assert lines['BINARY'].startswith(b'<BINARY>') and lines['BINARY'].endswith(b'</BINARY>')
+    assert config_lines(b'\r\n'.join(cfg.content.split(b'\n'))) == lines
+    with pytest.raises(ValueError):
+        config_lines(b'OBJECT>Exoplanet')
+
+
+def test_config_changes(default_cfg):
+    """
+    Only changed lines are sent, and a removed keyword cannot be.
+    """
+    old = config_lines(default_cfg.content)
+    assert config_changes(old, old) == {}
+    default_cfg.target.season = 45*u.deg
+    assert config_changes(old, config_lines(default_cfg.content)) == {'OBJECT-SEASON': default_cfg.target.season.content}
+    assert config_changes(old, {}) is None
+    cfg = gcm_cfg()
+    old = config_lines(cfg.content)
+    cfg.gcm = gcm_cfg(301*u.K).gcm
+    assert {'ATMOSPHERE-GCM-PARAMETERS', 'BINARY'} <= set(config_changes(old, config_lines(cfg.content)))
+
+
+def test_stateful_session(default_cfg, make_stub_psg):
+    """
+    The full config is sent once, then only changes.
+    """
+    server = make_stub_psg()
+    session = StatefulSession(url=server.url)
+    response = session(default_cfg, 'rad')
+    assert isinstance(response.rad, PyRad)
+    assert sent(server) == [('set', default_cfg.content), ('rad', b'')]
+
+    default_cfg.target.season = 45*u.deg
+    session(default_cfg, 'rad')
+    assert sent(server) == [('upd', default_cfg.target.season.content), ('rad', b'')]
+    session(BinConfig(default_cfg.content), 'rad')
+    assert sent(server) == [('rad', b'')]
+    assert (session.n_full, session.n_updates) == (1, 1)
+
+    # a keyword cannot be removed with ``upd``
+    default_cfg.target.season = None
+    session(default_cfg, 'rad')
+    assert sent(server) == [('set', default_cfg.content), ('rad', b'')]
+
+    # a new server has stored nothing
+    other = make_stub_psg()
+    session.url = other.url
+    session(default_cfg, 'rad')
+    assert sent(other) == [('set', default_cfg.content), ('rad', b'')]
+
+    session.url = server.url
+    session.forget()
+    session(default_cfg, 'rad')
+    assert sent(server)[0] == ('set', default_cfg.content)
+
+    with pytest.raises(ValueError):
+        session(default_cfg, 'upd')
+
+
+def test_stateful_session_failure(default_cfg, stub_psg):
+    """
+    The full config is sent again after an update fails.
+    """
+    session = StatefulSession(url=stub_psg.url)
+    session(default_cfg, 'rad')
+    default_cfg.target.season = 45*u.deg
+    stub_psg.replies = [b'ERROR | PSG | bad\n']
+    with pytest.raises(Exception):
+        session(default_cfg, 'rad')
+    sent(stub_psg)
+    session(default_cfg, 'rad')
+    assert sent(stub_psg) == [('set', default_cfg.content), ('rad', b'')]
+
+
+def test_stateful_session_concurrent(default_cfg, make_stub_psg):
+    """
+    Calls to different backends run at once.
+    """
+    servers = [make_stub_psg(), make_stub_psg()]
+    # every request waits until the other backend has one in flight too
+    barrier = threading.Barrier(2, timeout=5)
+    for server in servers:
+        server.on_post = barrier.wait
+    session = StatefulSession(backends=BackendPool.from_urls([server.url for server in servers]))
+    with ThreadPoolExecutor(2) as executor:
+        responses = list(executor.map(lambda cfg: session(cfg, 'rad'), [default_cfg]*2))
+    assert all(isinstance(response.rad, PyRad) for response in responses)
+    for server in servers:
+        assert sent(server) == [('set', default_cfg.content), ('rad', b'')]
+    assert sorted(session.urls) == sorted(server.url for server in servers)
+    assert session.n_full == 2
+    for server in servers:
+        server.on_post = None
+    session.reset()
+    assert session.urls == []
+
+
+if __name__ == '__main__':
+    pytest.main(args=[__file__])